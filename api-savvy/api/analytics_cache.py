@@ -0,0 +1,362 @@
+import bisect
+import datetime
+import threading
+from array import array
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api.models import Change, ChangeEntityEnum, ChangeOperationEnum, Group
+from api.spending import spending_cte
+from api.sync import (
+    CHANGE_LOG_ORDER,
+    ChangePosition,
+    change_log_horizon,
+    changes_after,
+)
+
+# Memory the cached columns may take in total, 0 disables the cache
+ANALYTICS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Past this many logged changes since an entry was last read, rebuilding it
+# from the database is cheaper than appending them one by one
+MAX_CATCH_UP_CHANGES = 1000
+
+PAYMENT_ENTITIES = (ChangeEntityEnum.EXPENSE, ChangeEntityEnum.SUBSCRIPTION_CHARGE)
+# Bytes the columns take per payment, before the dictionaries
+PAYMENT_BYTES = 8 + 4 + 4 + 4 + 1
+
+
+class SummaryRow(NamedTuple):
+    dimension: str
+    key: Optional[str]
+    amount: float
+    count: int
+
+
+class TimeseriesRow(NamedTuple):
+    start: datetime.date
+    amount: float
+    count: int
+
+
+class _Dictionary:
+    """Encodes repeated values, e.g. categories, as small integer codes."""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.codes: Dict[Optional[str], int] = {}
+        self.nbytes = 0
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            # Rough cost of the string and of its list and dict slots
+            self.nbytes += len(value or "") + 100
+        return code
+
+
+class GroupColumns:
+    """
+    The payments of a group as parallel typed arrays, sorted by date.
+
+    Amounts are int64 cents, dates int32 ordinals, and categories, creators
+    and expense types dictionary-encoded, about 20 bytes per payment. Date
+    ranges are sliced by bisection.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.amounts = array("q")
+        self.dates = array("i")
+        self.categories = array("I")
+        self.creators = array("I")
+        self.expense_types = array("B")
+        self.category_values = _Dictionary()
+        self.creator_values = _Dictionary()
+        self.expense_type_values = _Dictionary()
+
+        # Group version and change log position the columns are current with
+        self.version: Optional[int] = None
+        self.position: ChangePosition = (0, 0)
+        # Whether payments are logged past the position, but above the log
+        # horizon, so not appended yet
+        self.behind = False
+        # Payments logged past the position but already loaded by a rebuild
+        self.skip: Set[str] = set()
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (
+            self.amounts,
+            self.dates,
+            self.categories,
+            self.creators,
+            self.expense_types,
+        )
+        dictionaries = (
+            self.category_values,
+            self.creator_values,
+            self.expense_type_values,
+        )
+        return sum(column.itemsize * len(column) for column in arrays) + sum(
+            dictionary.nbytes for dictionary in dictionaries
+        )
+
+    def append(self, payment):
+        """Inserts a payment, a row of spending_cte, at its place in date order."""
+        ordinal = payment.date.toordinal()
+        index = bisect.bisect_right(self.dates, ordinal)
+        self.amounts.insert(index, round(payment.amount * 100))
+        self.dates.insert(index, ordinal)
+        self.categories.insert(index, self.category_values.encode(payment.category))
+        self.creators.insert(index, self.creator_values.encode(payment.creator_id))
+        self.expense_types.insert(
+            index, self.expense_type_values.encode(payment.expense_type)
+        )
+
+    def summary_rows(
+        self,
+        from_date: Optional[datetime.date] = None,
+        to_date: Optional[datetime.date] = None,
+    ) -> List[SummaryRow]:
+        """Computes the rows summary_stmt returns, without a query."""
+        with self.lock:
+            start, stop = self._slice(from_date, to_date)
+            amounts = self.amounts[start:stop]
+            dates = self.dates[start:stop]
+            dimensions = {
+                "category": (self.categories[start:stop], self.category_values),
+                "creator": (self.creators[start:stop], self.creator_values),
+                "expense_type": (
+                    self.expense_types[start:stop],
+                    self.expense_type_values,
+                ),
+            }
+
+        rows = []
+        for dimension, (codes, dictionary) in dimensions.items():
+            totals = defaultdict(lambda: [0, 0])
+            for cents, code in zip(amounts, codes):
+                total = totals[code]
+                total[0] += cents
+                total[1] += 1
+            rows.extend(
+                SummaryRow(dimension, dictionary.values[code], cents / 100, count)
+                for code, (cents, count) in totals.items()
+            )
+
+        for start_date, cents, count in self._bucket_totals(amounts, dates, "month"):
+            rows.append(SummaryRow("month", f"{start_date:%Y-%m}", cents / 100, count))
+
+        return rows
+
+    def timeseries_rows(
+        self, bucket: str, from_date: datetime.date, to_date: datetime.date
+    ) -> List[TimeseriesRow]:
+        """Computes the rows timeseries_stmt returns, without a query."""
+        with self.lock:
+            start, stop = self._slice(from_date, to_date)
+            amounts = self.amounts[start:stop]
+            dates = self.dates[start:stop]
+
+        return [
+            TimeseriesRow(start_date, cents / 100, count)
+            for start_date, cents, count in self._bucket_totals(amounts, dates, bucket)
+        ]
+
+    def _slice(
+        self, from_date: Optional[datetime.date], to_date: Optional[datetime.date]
+    ):
+        start = (
+            0
+            if from_date is None
+            else bisect.bisect_left(self.dates, from_date.toordinal())
+        )
+        stop = (
+            len(self.dates)
+            if to_date is None
+            else bisect.bisect_right(self.dates, to_date.toordinal())
+        )
+        return start, stop
+
+    @staticmethod
+    def _bucket_totals(amounts: array, dates: array, bucket: str):
+        # Totals per day first, so each distinct date is bucketed once
+        days = defaultdict(lambda: [0, 0])
+        for cents, ordinal in zip(amounts, dates):
+            day = days[ordinal]
+            day[0] += cents
+            day[1] += 1
+
+        buckets = defaultdict(lambda: [0, 0])
+        for ordinal, (cents, count) in days.items():
+            date = datetime.date.fromordinal(ordinal)
+            if bucket == "week":
+                date -= datetime.timedelta(days=date.weekday())
+            elif bucket == "month":
+                date = date.replace(day=1)
+            total = buckets[date]
+            total[0] += cents
+            total[1] += count
+
+        return [(date, cents, count) for date, (cents, count) in buckets.items()]
+
+
+class AnalyticsCache:
+    """
+    Columns of the payments of recently read groups, evicted least recently
+    used past a memory budget.
+
+    Entries are built from the database on first read. Later reads of a
+    group whose version moved append the payments logged in the change log
+    since, so entries stay current with writes from every worker process.
+    """
+
+    def __init__(self, max_bytes: int = ANALYTICS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, GroupColumns] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, group: Group) -> Optional[GroupColumns]:
+        """
+        The columns of a group, current with its version.
+
+        Args:
+            db: The session to load missing payments with.
+            group: The group read, whose version was just loaded.
+
+        Returns:
+            The columns, or None when the cache is disabled or the group is
+            too large to fit in it, in which case it is better aggregated in
+            the database.
+        """
+        if self.max_bytes <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(group.id)
+            if entry is not None:
+                self._entries.move_to_end(group.id)
+
+        if entry is None:
+            spending = spending_cte(group.id)
+            payment_count = db.scalar(select(func.count()).select_from(spending))
+            if payment_count * PAYMENT_BYTES > self.max_bytes:
+                return None
+
+            with self._lock:
+                entry = self._entries.setdefault(group.id, GroupColumns())
+                self._entries.move_to_end(group.id)
+
+        with entry.lock:
+            if entry.version != group.version or entry.behind:
+                if entry.version is None or not self._catch_up(db, group.id, entry):
+                    self._rebuild(db, group.id, entry)
+                entry.version = group.version
+
+        # Grown past the budget on its own, through its dictionaries or writes
+        # since it was built
+        if entry.nbytes > self.max_bytes:
+            with self._lock:
+                if self._entries.get(group.id) is entry:
+                    del self._entries[group.id]
+            return None
+
+        self._evict()
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _catch_up(
+        self,
+        db: Session,
+        group_id: str,
+        entry: GroupColumns,
+        loaded: Set[str] = frozenset(),
+    ) -> bool:
+        """
+        Appends the payments logged after the entry's position in the change
+        log, up to its horizon.
+
+        Returns False, leaving the entry as it was, when the changes are too
+        many or not all creations and the entry has to be rebuilt instead.
+        """
+        horizon = change_log_horizon(db)
+        changes = db.execute(
+            select(Change.txid, Change.seq, Change.entity_id, Change.operation)
+            .where(
+                Change.group_id == group_id,
+                *changes_after(entry.position, None),
+                Change.entity.in_(PAYMENT_ENTITIES),
+            )
+            .order_by(*CHANGE_LOG_ORDER)
+            .limit(MAX_CATCH_UP_CHANGES + 1)
+        ).all()
+        if len(changes) > MAX_CATCH_UP_CHANGES or any(
+            change.operation != ChangeOperationEnum.UPSERT for change in changes
+        ):
+            return False
+
+        # Changes above the horizon come last, and are left for a later read
+        # as changes below them may still commit
+        settled = [
+            change for change in changes if horizon is None or change.txid < horizon
+        ]
+        pending = {change.entity_id for change in changes[len(settled) :]}
+        settled_ids = {change.entity_id for change in settled}
+
+        ids = settled_ids - loaded - entry.skip
+        entry.skip = (entry.skip - settled_ids) | (pending & loaded)
+        if ids:
+            spending = spending_cte(group_id)
+            for payment in db.execute(select(spending).where(spending.c.id.in_(ids))):
+                entry.append(payment)
+
+        if settled:
+            entry.position = (settled[-1].txid, settled[-1].seq)
+        entry.behind = bool(pending)
+        return True
+
+    def _rebuild(self, db: Session, group_id: str, entry: GroupColumns):
+        entry.reset()
+        horizon = change_log_horizon(db)
+        if horizon is None:
+            last = db.execute(
+                select(*CHANGE_LOG_ORDER)
+                .where(Change.group_id == group_id)
+                .order_by(*(column.desc() for column in CHANGE_LOG_ORDER))
+                .limit(1)
+            ).first()
+            entry.position = tuple(last) if last is not None else (0, 0)
+        else:
+            # Every change below the horizon is committed, so loaded below
+            entry.position = (horizon, 0)
+
+        spending = spending_cte(group_id)
+        loaded = set()
+        for payment in db.execute(select(spending).order_by(spending.c.date)):
+            entry.append(payment)
+            loaded.add(payment.id)
+
+        # Payments committed while loading are logged after the position, but
+        # may already be loaded
+        self._catch_up(db, group_id, entry, loaded)
+
+    def _evict(self):
+        with self._lock:
+            total = sum(entry.nbytes for entry in self._entries.values())
+            while total > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+
+
+analytics_cache = AnalyticsCache()
@@ -0,0 +1,179 @@
+import datetime
+import math
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from api.models import (
+    CategorySpendingStats,
+    Expense,
+    ExpenseTypeEnum,
+    FlaggedExpense,
+    OneTimeExpense,
+)
+from api.rollups import rollup_category
+
+# Expenses further than this many standard deviations from their category
+# mean are flagged
+ANOMALY_Z_SCORE = 3.0
+# Expenses are only scored once their category has this many earlier ones
+MIN_ANOMALY_HISTORY = 5
+
+
+def welford_update(
+    count: int, mean: float, m2: float, value: float
+) -> Tuple[int, float, float]:
+    """Adds a value to a running (count, mean, sum of squared deviations)."""
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return count, mean, m2
+
+
+def sample_stddev(count: int, m2: float) -> float:
+    """
+    The sample standard deviation of running statistics of at least two values.
+
+    Rounding can leave m2 slightly below zero when every value was the same,
+    which counts as no spread.
+    """
+    if m2 <= 0:
+        return 0.0
+    return math.sqrt(m2 / (count - 1))
+
+
+def z_score(count: int, mean: float, m2: float, value: float) -> Optional[float]:
+    """
+    Scores a value against running statistics, in sample standard deviations.
+
+    None when there is too little history to tell, or when every earlier
+    value was the same.
+    """
+    if count < MIN_ANOMALY_HISTORY or m2 <= 0:
+        return None
+
+    stddev = sample_stddev(count, m2)
+    if stddev == 0:
+        return None
+
+    return (value - mean) / stddev
+
+
+def score_expenses(db: Session, group_id: str, expenses: Iterable[OneTimeExpense]):
+    """
+    Scores new one-time expenses against the history of their category.
+
+    Each expense is scored against the running statistics of its category,
+    flagged when unusual, then added to them, so the cost per expense does
+    not depend on the history. The statistics rows are locked on Postgres so
+    concurrent writers apply their updates one after the other.
+
+    Args:
+        db: The session the expenses are being written with.
+        group_id: The group the expenses belong to.
+        expenses: The one-time expenses being created, in creation order.
+    """
+    expenses = list(expenses)
+    categories = {rollup_category(expense.category) for expense in expenses}
+    if not categories:
+        return
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(
+        dialect.insert(CategorySpendingStats)
+        .values(
+            [
+                {"group_id": group_id, "category": category, "count": 0}
+                for category in categories
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+    stats = {
+        row.category: row
+        for row in db.scalars(
+            select(CategorySpendingStats)
+            .where(
+                CategorySpendingStats.group_id == group_id,
+                CategorySpendingStats.category.in_(categories),
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    }
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for expense in expenses:
+        category_stats = stats[rollup_category(expense.category)]
+        running = (category_stats.count, category_stats.mean, category_stats.m2)
+
+        score = z_score(*running, expense.amount)
+        if score is not None and abs(score) >= ANOMALY_Z_SCORE:
+            db.add(
+                FlaggedExpense(
+                    expense_id=expense.id,
+                    group_id=group_id,
+                    z_score=score,
+                    mean=category_stats.mean,
+                    stddev=sample_stddev(category_stats.count, category_stats.m2),
+                    flagged_at=now,
+                )
+            )
+
+        category_stats.count, category_stats.mean, category_stats.m2 = welford_update(
+            *running, expense.amount
+        )
+
+
+def rebuild_category_stats(db: Session, group_id: str):
+    """
+    Recomputes the category statistics of a group from its one-time expenses.
+
+    Replaces them with a single INSERT ... SELECT, to backfill them or repair
+    drift. Expenses already flagged stay flagged.
+
+    Args:
+        db: The session to rebuild with. The caller commits.
+        group_id: The group whose statistics are rebuilt.
+    """
+    db.execute(
+        delete(CategorySpendingStats).where(CategorySpendingStats.group_id == group_id)
+    )
+
+    category = func.coalesce(Expense.category, "")
+    one_time = (
+        Expense.group_id == group_id,
+        Expense.expense_type == ExpenseTypeEnum.ONE_TIME.value,
+    )
+    means = (
+        select(category.label("category"), func.avg(Expense.amount).label("mean"))
+        .where(*one_time)
+        .group_by(category)
+        .subquery()
+    )
+    # m2 summed as squared deviations from the mean, in a second pass, rather
+    # than as sum(x²) - n·mean², which cancels to tiny or negative values when
+    # the amounts are close
+    deviation = Expense.amount - means.c.mean
+    rows = (
+        select(
+            literal(group_id),
+            means.c.category,
+            func.count(),
+            means.c.mean,
+            func.sum(deviation * deviation),
+        )
+        .select_from(Expense)
+        .join(means, category == means.c.category)
+        .where(*one_time)
+        .group_by(means.c.category, means.c.mean)
+    )
+
+    db.execute(
+        insert(CategorySpendingStats).from_select(
+            ["group_id", "category", "count", "mean", "m2"], rows
+        )
+    )
@@ -0,0 +1,106 @@
+import heapq
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select
+
+from api.models import User, user_group_role_table
+from api.spending import spending_cte
+
+
+class Settlement(BaseModel):
+    from_user_id: str
+    to_user_id: str
+    amount_cents: int
+
+
+def member_paid_stmt(group_id: str) -> Select:
+    """
+    Builds the amount each member of a group paid for it, in one aggregate query.
+
+    Every payment of the group (see spending_cte) is attributed to its
+    creator. Members who never paid are listed with 0.
+    """
+    spending = spending_cte(group_id)
+    paid = (
+        select(
+            spending.c.creator_id,
+            func.sum(spending.c.amount).label("paid"),
+        )
+        .group_by(spending.c.creator_id)
+        .subquery("paid")
+    )
+
+    return (
+        select(
+            user_group_role_table.c.user_id,
+            User.name,
+            func.coalesce(paid.c.paid, 0).label("paid"),
+        )
+        .join(User, User.id == user_group_role_table.c.user_id)
+        .outerjoin(paid, paid.c.creator_id == user_group_role_table.c.user_id)
+        .where(user_group_role_table.c.group_id == group_id)
+        .order_by(user_group_role_table.c.user_id)
+    )
+
+
+def net_positions(paid_cents: Dict[str, int]) -> Dict[str, Tuple[int, int]]:
+    """
+    Splits the total paid equally between members.
+
+    Works in cents so that the positions add up to exactly zero: the cents
+    left over by the division go to the first members, in the order given.
+
+    Args:
+        paid_cents: What each member paid, in cents.
+
+    Returns:
+        The (share, net) of each member in cents, net being positive for
+        members who are owed money.
+    """
+    if not paid_cents:
+        return {}
+
+    share, leftover = divmod(sum(paid_cents.values()), len(paid_cents))
+    positions = {}
+    for index, (user_id, paid) in enumerate(paid_cents.items()):
+        member_share = share + (1 if index < leftover else 0)
+        positions[user_id] = (member_share, paid - member_share)
+
+    return positions
+
+
+def settle_up(net_cents: Dict[str, int]) -> List[Settlement]:
+    """
+    Computes transfers that bring every member's net position to zero.
+
+    Greedily pairs the largest debtor with the largest creditor, so each
+    transfer settles at least one of them: at most n - 1 transfers, in
+    O(n log n) time with two heaps.
+
+    Args:
+        net_cents: The net position of each member in cents, adding up to 0.
+
+    Returns:
+        The transfers, in the order they were matched.
+    """
+    creditors = [(-net, user_id) for user_id, net in net_cents.items() if net > 0]
+    debtors = [(net, user_id) for user_id, net in net_cents.items() if net < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    settlements = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        settlements.append(
+            Settlement(from_user_id=debtor, to_user_id=creditor, amount_cents=amount)
+        )
+
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+
+    return settlements
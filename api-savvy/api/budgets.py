@@ -0,0 +1,98 @@
+import datetime
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from api.models import BudgetAlert, GroupBudget, GroupMonthlyRollup
+
+# Percentages of a budget at which an alert is recorded
+BUDGET_ALERT_THRESHOLDS = (80, 100)
+
+
+def month_spent_stmt(
+    group_id: str, keys: Iterable[Tuple[datetime.date, str]]
+) -> Select:
+    """
+    Builds the spending of a group per (month, category) from its monthly rollups.
+
+    Each key reads the one or two rollup rows of its month and category (one
+    per expense type) by primary key, never the payments themselves.
+    """
+    return (
+        select(
+            GroupMonthlyRollup.month,
+            GroupMonthlyRollup.category,
+            func.sum(GroupMonthlyRollup.amount).label("spent"),
+        )
+        .where(
+            GroupMonthlyRollup.group_id == group_id,
+            tuple_(GroupMonthlyRollup.month, GroupMonthlyRollup.category).in_(
+                list(keys)
+            ),
+        )
+        .group_by(GroupMonthlyRollup.month, GroupMonthlyRollup.category)
+    )
+
+
+def crossed_thresholds(spent: float, budget_amount: float) -> Tuple[int, ...]:
+    """The BUDGET_ALERT_THRESHOLDS reached by the spending of a budget."""
+    return tuple(
+        threshold
+        for threshold in BUDGET_ALERT_THRESHOLDS
+        if spent * 100 >= budget_amount * threshold
+    )
+
+
+def evaluate_budgets(
+    db: Session, group_id: str, keys: Iterable[Tuple[datetime.date, str]]
+):
+    """
+    Records alerts for the budgets whose monthly spending crossed a threshold.
+
+    Runs after the monthly rollups were updated, on the (month, category)
+    keys that were written, so it costs the same three indexed statements
+    whatever the size of the group's history. Alerts already recorded for a
+    month are kept as they were.
+
+    Args:
+        db: The session the payments are being written with.
+        group_id: The group the payments belong to.
+        keys: The (month, category) keys whose spending changed.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    budgets: Dict[str, float] = dict(
+        db.execute(
+            select(GroupBudget.category, GroupBudget.amount).where(
+                GroupBudget.group_id == group_id,
+                GroupBudget.category.in_({category for _, category in keys}),
+            )
+        ).all()
+    )
+    keys = {(month, category) for month, category in keys if category in budgets}
+    if not keys:
+        return
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    alerts = [
+        {
+            "group_id": group_id,
+            "category": row.category,
+            "month": row.month,
+            "threshold": threshold,
+            "budget_amount": budgets[row.category],
+            "spent": row.spent,
+            "crossed_at": now,
+        }
+        for row in db.execute(month_spent_stmt(group_id, keys))
+        for threshold in crossed_thresholds(row.spent, budgets[row.category])
+    ]
+    if not alerts:
+        return
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(dialect.insert(BudgetAlert).values(alerts).on_conflict_do_nothing())
@@ -0,0 +1,144 @@
+"""Maintenance commands, run with `python -m api.commands <command>`."""
+
+import argparse
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from api.anomalies import rebuild_category_stats
+from api.database import SessionLocal
+from api.expense_export import remove_expired_exports
+from api.group_stats import reconcile_group_stats
+from api.idempotency import remove_expired_idempotency_keys
+from api.models import Group
+from api.rollups import rebuild_monthly_rollups
+from api.schema_upgrade import upgrade_schema
+
+
+def reconcile_group_stats_command(args: argparse.Namespace):
+    db = SessionLocal()
+    try:
+        updated = reconcile_group_stats(db, args.group_ids or None)
+        db.commit()
+        print(f"Reconciled stats for {updated} group(s)")
+    finally:
+        db.close()
+
+
+def cleanup_exports_command(args: argparse.Namespace):
+    db = SessionLocal()
+    try:
+        expired = remove_expired_exports(db)
+        db.commit()
+        print(f"Removed {expired} expired export(s)")
+    finally:
+        db.close()
+
+
+def cleanup_idempotency_keys_command(args: argparse.Namespace):
+    db = SessionLocal()
+    try:
+        removed = remove_expired_idempotency_keys(db)
+        db.commit()
+        print(f"Removed {removed} expired idempotency key(s)")
+    finally:
+        db.close()
+
+
+def rebuild_monthly_rollups_command(args: argparse.Namespace):
+    db = SessionLocal()
+    try:
+        group_ids = args.group_ids or db.scalars(select(Group.id)).all()
+        # One transaction per group, so a backfill never holds every group's
+        # rollups locked at once
+        for group_id in group_ids:
+            rebuild_monthly_rollups(db, group_id)
+            db.commit()
+        print(f"Rebuilt monthly rollups for {len(group_ids)} group(s)")
+    finally:
+        db.close()
+
+
+def rebuild_category_stats_command(args: argparse.Namespace):
+    db = SessionLocal()
+    try:
+        group_ids = args.group_ids or db.scalars(select(Group.id)).all()
+        for group_id in group_ids:
+            rebuild_category_stats(db, group_id)
+            db.commit()
+        print(f"Rebuilt category stats for {len(group_ids)} group(s)")
+    finally:
+        db.close()
+
+
+def upgrade_schema_command(args: argparse.Namespace):
+    db = SessionLocal()
+    try:
+        added = upgrade_schema(db)
+        db.commit()
+        print(f"Added {len(added)} column(s): {', '.join(added) or 'none'}")
+
+        group_ids = db.scalars(select(Group.id)).all()
+        for group_id in group_ids:
+            rebuild_monthly_rollups(db, group_id)
+            rebuild_category_stats(db, group_id)
+            db.commit()
+        print(f"Rebuilt rollups and category stats for {len(group_ids)} group(s)")
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m api.commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-group-stats",
+        help="Recompute the denormalized group counters from their source rows",
+    )
+    reconcile.add_argument(
+        "group_ids", nargs="*", help="Groups to reconcile, all groups if omitted"
+    )
+    reconcile.set_defaults(handler=reconcile_group_stats_command)
+
+    cleanup = subparsers.add_parser(
+        "cleanup-exports", help="Delete the files of expired expense exports"
+    )
+    cleanup.set_defaults(handler=cleanup_exports_command)
+
+    cleanup_keys = subparsers.add_parser(
+        "cleanup-idempotency-keys", help="Delete the expired idempotency keys"
+    )
+    cleanup_keys.set_defaults(handler=cleanup_idempotency_keys_command)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-monthly-rollups",
+        help="Recompute the monthly spending rollups from the payments",
+    )
+    rebuild.add_argument(
+        "group_ids", nargs="*", help="Groups to rebuild, all groups if omitted"
+    )
+    rebuild.set_defaults(handler=rebuild_monthly_rollups_command)
+
+    rebuild_stats = subparsers.add_parser(
+        "rebuild-category-stats",
+        help="Recompute the running category statistics used to flag expenses",
+    )
+    rebuild_stats.add_argument(
+        "group_ids", nargs="*", help="Groups to rebuild, all groups if omitted"
+    )
+    rebuild_stats.set_defaults(handler=rebuild_category_stats_command)
+
+    upgrade = subparsers.add_parser(
+        "upgrade-schema",
+        help="Add the columns and indexes missing from an existing database, "
+        "then backfill them",
+    )
+    upgrade.set_defaults(handler=upgrade_schema_command)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+import asyncio
+import csv
+import datetime
+import io
+import os
+import tempfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from pydantic_core import to_json
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+
+from api.expense_listing import (
+    EXPENSE_FIELDS,
+    ExpenseFilters,
+    iter_row_batches,
+    listing_stmt,
+    parse_projection,
+    parse_sort,
+)
+from api.models import ExportJob, JobStatusEnum
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet exports are only offered when pyarrow is installed
+    pyarrow = None
+
+EXPORT_COLUMNS = ["id", "expense_type", *EXPENSE_FIELDS]
+EXPORT_BATCH_SIZE = 500
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "json": "application/json",
+}
+
+EXPORT_DIRECTORY = os.path.join(tempfile.gettempdir(), "savvy-exports")
+EXPORT_TTL = datetime.timedelta(hours=24)
+# How often the app sweeps expired exports while it runs
+EXPORT_SWEEP_INTERVAL = datetime.timedelta(hours=1)
+MAX_CONCURRENT_EXPORTS = 2
+
+# Export jobs run on threads of their own rather than on the pool serving
+# requests, those past the cap queue here, still pending, for one to free up
+export_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_EXPORTS, thread_name_prefix="export"
+)
+
+
+def _export_record(row: Row) -> List:
+    mapping = row._mapping
+    return [
+        value.value if hasattr(value, "value") else value
+        for value in (mapping[column] for column in EXPORT_COLUMNS)
+    ]
+
+
+def csv_chunks(batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """
+    Encodes batches of exported rows as CSV, one chunk per batch.
+
+    Args:
+        batches: Expense rows selected with every field of EXPENSE_FIELDS.
+
+    Yields:
+        The header, then the encoded rows of each batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(_export_record(row) for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def json_chunks(batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """Encodes batches of exported rows as a JSON array, one chunk per batch."""
+    separator = b"["
+    for rows in batches:
+        yield separator + b",".join(
+            to_json(dict(zip(EXPORT_COLUMNS, _export_record(row)))) for row in rows
+        )
+        separator = b","
+
+    yield b"]" if separator == b"," else b"[]"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file handing back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_chunks(batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """
+    Encodes batches of exported rows as Parquet, one row group per batch.
+
+    Requires pyarrow, check parquet_available first.
+    """
+    sink = _ChunkSink()
+    schema = pyarrow.schema(
+        [
+            ("id", pyarrow.string()),
+            ("expense_type", pyarrow.string()),
+            ("name", pyarrow.string()),
+            ("amount", pyarrow.float64()),
+            ("category", pyarrow.string()),
+            ("date", pyarrow.date32()),
+            ("on_every", pyarrow.int64()),
+            ("frequency", pyarrow.string()),
+            ("start_date", pyarrow.date32()),
+            ("end_date", pyarrow.date32()),
+        ]
+    )
+
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            records = [_export_record(row) for row in rows]
+            writer.write_table(
+                pyarrow.Table.from_arrays(
+                    [
+                        pyarrow.array([record[index] for record in records], field.type)
+                        for index, field in enumerate(schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            yield sink.drain()
+
+    yield sink.drain()
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compresses a stream of chunks into a single gzip member as it goes."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def export_stmt(group_id: str, filters: ExpenseFilters):
+    """Builds the query selecting every exported column of a group's expenses."""
+    return listing_stmt(
+        group_id, parse_projection(None, None, None), filters, parse_sort("date"), None
+    )
+
+
+def export_chunks(format: str, batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """Encodes batches of exported rows in one of the EXPORT_MEDIA_TYPES formats."""
+    if format == "parquet":
+        return parquet_chunks(batches)
+
+    if format == "json":
+        return json_chunks(batches)
+
+    return csv_chunks(batches)
+
+
+def submit_export_job(session_factory: Callable[[], Session], job_id: str) -> Future:
+    """
+    Queues a job to run on export_executor, at most MAX_CONCURRENT_EXPORTS at
+    once. The job stays pending until a thread picks it up.
+
+    Args:
+        session_factory: Creates the sessions the job runs with.
+        job_id: The ExportJob to run, already committed.
+
+    Returns:
+        The future of the run.
+    """
+    return export_executor.submit(run_export_job, session_factory, job_id)
+
+
+def run_export_job(session_factory: Callable[[], Session], job_id: str):
+    """
+    Materializes the export of a job to a file in EXPORT_DIRECTORY.
+
+    Runs on export_executor, see submit_export_job. The file is written
+    under a temporary name and renamed once complete, so downloads never see
+    a partial export. Expired exports are swept once the job ends.
+
+    Args:
+        session_factory: Creates the sessions the job runs with.
+        job_id: The ExportJob to run.
+    """
+    db = session_factory()
+    try:
+        job = db.get(ExportJob, job_id)
+        job.status = JobStatusEnum.RUNNING
+        db.commit()
+
+        os.makedirs(EXPORT_DIRECTORY, exist_ok=True)
+        path = os.path.join(EXPORT_DIRECTORY, f"{job.id}.{job.format.value}")
+        stmt = export_stmt(
+            job.group_id, ExpenseFilters.model_validate_json(job.filters)
+        )
+
+        row_count = 0
+
+        def counted(batches: Iterable[List[Row]]) -> Iterator[List[Row]]:
+            nonlocal row_count
+            for rows in batches:
+                row_count += len(rows)
+                yield rows
+
+        # A session of its own, as iter_row_batches closes it when done
+        batches = iter_row_batches(session_factory(), stmt, EXPORT_BATCH_SIZE)
+        try:
+            with open(f"{path}.part", "wb") as export:
+                for chunk in export_chunks(job.format.value, counted(batches)):
+                    export.write(chunk)
+            os.replace(f"{path}.part", path)
+        except BaseException:
+            if os.path.exists(f"{path}.part"):
+                os.remove(f"{path}.part")
+            raise
+
+        job.status = JobStatusEnum.COMPLETED
+        job.row_count = row_count
+        job.path = path
+        job.expires_at = datetime.datetime.now(datetime.timezone.utc) + EXPORT_TTL
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job = db.get(ExportJob, job_id)
+        if job is not None:
+            job.status = JobStatusEnum.FAILED
+            job.error = str(e)
+            db.commit()
+    finally:
+        remove_expired_exports(db)
+        db.commit()
+        db.close()
+
+
+def remove_expired_exports(db: Session, now: Optional[datetime.datetime] = None) -> int:
+    """
+    Deletes the files of the completed exports past their expiry.
+
+    Args:
+        db: The session to update the jobs with. The caller commits.
+        now: The reference time, the current time if None.
+
+    Returns:
+        The number of exports expired.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    jobs = db.scalars(
+        select(ExportJob).where(
+            ExportJob.status == JobStatusEnum.COMPLETED, ExportJob.expires_at <= now
+        )
+    ).all()
+
+    for job in jobs:
+        expire_export(job)
+
+    return len(jobs)
+
+
+def expire_export(job: ExportJob):
+    """Deletes the file of a completed export and marks it expired."""
+    if job.path is not None:
+        try:
+            os.remove(job.path)
+        except FileNotFoundError:
+            pass
+    job.status = JobStatusEnum.EXPIRED
+    job.path = None
+
+
+def fail_interrupted_exports(db: Session, started_at: datetime.datetime) -> int:
+    """
+    Fails the exports left pending or running by a previous process.
+
+    Jobs only live in the queue of export_executor, so those created before
+    the process started were lost with the process that queued them. Failing
+    them, rather than queuing them again, lets clients polling them stop and
+    create a new export, and never runs a job twice.
+
+    Args:
+        db: The session to update the jobs with. The caller commits.
+        started_at: When the current process started.
+
+    Returns:
+        The number of exports failed.
+    """
+    jobs = db.scalars(
+        select(ExportJob).where(
+            ExportJob.status.in_([JobStatusEnum.PENDING, JobStatusEnum.RUNNING]),
+            ExportJob.created_at < started_at,
+        )
+    ).all()
+
+    for job in jobs:
+        part = os.path.join(EXPORT_DIRECTORY, f"{job.id}.{job.format.value}.part")
+        if os.path.exists(part):
+            os.remove(part)
+        job.status = JobStatusEnum.FAILED
+        job.error = "Export interrupted by a restart"
+
+    return len(jobs)
+
+
+def _remove_expired_exports(session_factory: Callable[[], Session]):
+    db = session_factory()
+    try:
+        remove_expired_exports(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def sweep_expired_exports(session_factory: Callable[[], Session]):
+    """
+    Removes expired exports every EXPORT_SWEEP_INTERVAL until cancelled, so
+    their files do not wait for the next export to end to be deleted.
+
+    Args:
+        session_factory: Creates the sessions each sweep runs with.
+    """
+    while True:
+        await asyncio.sleep(EXPORT_SWEEP_INTERVAL.total_seconds())
+        try:
+            await asyncio.to_thread(_remove_expired_exports, session_factory)
+        except Exception as e:
+            print("Exception e", e)
+
+
+def is_export_expired(job: ExportJob, now: Optional[datetime.datetime] = None) -> bool:
+    """Whether an export can no longer be downloaded, even if not swept yet."""
+    if job.status == JobStatusEnum.EXPIRED:
+        return True
+
+    if job.expires_at is None:
+        return False
+
+    # Stored in UTC, but read back naive on databases without timezone support
+    expires_at = job.expires_at.replace(tzinfo=datetime.timezone.utc)
+    return expires_at <= (now or datetime.datetime.now(datetime.timezone.utc))
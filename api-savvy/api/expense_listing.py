@@ -0,0 +1,371 @@
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import Row, Select, and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from api.models import (
+    Expense,
+    ExpenseTypeEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+)
+from api.pagination import decode_cursor, encode_cursor
+
+expenses_table = Expense.__table__
+one_time_expenses_table = OneTimeExpense.__table__
+subscriptions_table = Subscription.__table__
+subscription_charges_table = SubscriptionCharge.__table__
+
+COMMON_FIELDS = {
+    "name": expenses_table.c.name,
+    "amount": expenses_table.c.amount,
+    "category": expenses_table.c.category,
+}
+ONE_TIME_FIELDS = {
+    "date": one_time_expenses_table.c.date,
+}
+SUBSCRIPTION_FIELDS = {
+    "on_every": subscriptions_table.c.on_every,
+    "frequency": subscriptions_table.c.frequency,
+    "start_date": subscriptions_table.c.start_date,
+    "end_date": subscriptions_table.c.end_date,
+}
+EXPENSE_FIELDS = {**COMMON_FIELDS, **ONE_TIME_FIELDS, **SUBSCRIPTION_FIELDS}
+
+
+class ExpenseProjection(BaseModel):
+    fields: List[str]
+    include_charges: bool
+    charges_limit: Optional[int] = None
+
+
+def parse_projection(
+    fields: Optional[str], include: Optional[str], charges_limit: Optional[int]
+) -> ExpenseProjection:
+    """
+    Parses the fields and include query parameters of an expense listing.
+
+    Args:
+        fields: Comma separated expense fields to return, all of them if None.
+            The id and expense_type are always returned.
+        include: Comma separated relationships to embed, only "charges" exists.
+        charges_limit: Maximum number of most recent charges to embed per
+            subscription, all of them if None.
+
+    Returns:
+        The projection to build the listing query with.
+    """
+    selected_fields = list(EXPENSE_FIELDS)
+    if fields is not None:
+        selected_fields = [field for field in fields.split(",") if field]
+        unknown_fields = set(selected_fields) - set(EXPENSE_FIELDS)
+        if unknown_fields:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown_fields))}",
+            )
+
+    includes = set(include.split(",")) - {""} if include is not None else set()
+    if includes - {"charges"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(includes - {'charges'}))}",
+        )
+
+    return ExpenseProjection(
+        fields=selected_fields,
+        include_charges="charges" in includes,
+        charges_limit=charges_limit,
+    )
+
+
+class ExpenseFilters(BaseModel):
+    category: Optional[str] = None
+    expense_type: Optional[ExpenseTypeEnum] = None
+    creator_id: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    from_date: Optional[datetime.date] = None
+    to_date: Optional[datetime.date] = None
+
+
+def get_expense_filters(
+    category: Optional[str] = None,
+    expense_type: Optional[ExpenseTypeEnum] = None,
+    creator_id: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    from_date: Optional[datetime.date] = Query(default=None, alias="from"),
+    to_date: Optional[datetime.date] = Query(default=None, alias="to"),
+) -> ExpenseFilters:
+    """Dependency to collect the filters of an expense listing from the query string."""
+    return ExpenseFilters(
+        category=category,
+        expense_type=expense_type,
+        creator_id=creator_id,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        from_date=from_date,
+        to_date=to_date,
+    )
+
+
+SORT_KEYS = {
+    "date": expenses_table.c.effective_date,
+    "amount": expenses_table.c.amount,
+    "name": expenses_table.c.name,
+}
+# JSON types the cursor of each sort key carries its sort value as, dates
+# being ISO strings
+CURSOR_VALUE_TYPES = {"date": str, "amount": (int, float), "name": str}
+
+
+class ExpenseSort(BaseModel):
+    key: str
+    descending: bool
+
+
+def parse_sort(sort: str) -> ExpenseSort:
+    """
+    Parses the sort query parameter of an expense listing.
+
+    Args:
+        sort: One of the SORT_KEYS, prefixed with "-" for descending order.
+
+    Returns:
+        The sort to build the listing query with.
+    """
+    key = sort.removeprefix("-")
+    if key not in SORT_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sort key: {key}",
+        )
+
+    return ExpenseSort(key=key, descending=sort.startswith("-"))
+
+
+def listing_stmt(
+    group_id: str,
+    projection: ExpenseProjection,
+    filters: ExpenseFilters,
+    sort: ExpenseSort,
+    cursor: Optional[str],
+) -> Select:
+    """
+    Builds the query listing a group's expenses.
+
+    Only the projected columns are selected, and the subclass tables are only
+    joined when one of their columns is requested. Filters and sort keys are
+    all on the expenses table, each covered by an index led by group_id.
+
+    Pages are delimited by the (sort value, id) of the last row sent, which
+    walks the sort index and stays stable when expenses are inserted between
+    requests.
+    """
+    from_clause = expenses_table
+    if any(field in ONE_TIME_FIELDS for field in projection.fields):
+        from_clause = from_clause.outerjoin(
+            one_time_expenses_table,
+            one_time_expenses_table.c.id == expenses_table.c.id,
+        )
+    if any(field in SUBSCRIPTION_FIELDS for field in projection.fields):
+        from_clause = from_clause.outerjoin(
+            subscriptions_table, subscriptions_table.c.id == expenses_table.c.id
+        )
+
+    sort_column = SORT_KEYS[sort.key]
+    if sort.descending:
+        order_by = (sort_column.desc(), expenses_table.c.id.desc())
+    else:
+        order_by = (sort_column.asc(), expenses_table.c.id.asc())
+
+    stmt = (
+        select(
+            expenses_table.c.id,
+            expenses_table.c.expense_type,
+            sort_column.label("sort_value"),
+            *(EXPENSE_FIELDS[field].label(field) for field in projection.fields),
+        )
+        .select_from(from_clause)
+        .where(expenses_table.c.group_id == group_id)
+        .order_by(*order_by)
+    )
+
+    if filters.category is not None:
+        stmt = stmt.where(expenses_table.c.category == filters.category)
+
+    if filters.expense_type is not None:
+        stmt = stmt.where(expenses_table.c.expense_type == filters.expense_type.value)
+
+    if filters.creator_id is not None:
+        stmt = stmt.where(expenses_table.c.creator_id == filters.creator_id)
+
+    if filters.min_amount is not None:
+        stmt = stmt.where(expenses_table.c.amount >= filters.min_amount)
+
+    if filters.max_amount is not None:
+        stmt = stmt.where(expenses_table.c.amount <= filters.max_amount)
+
+    if filters.from_date is not None:
+        stmt = stmt.where(expenses_table.c.effective_date >= filters.from_date)
+
+    if filters.to_date is not None:
+        stmt = stmt.where(expenses_table.c.effective_date <= filters.to_date)
+
+    if cursor is not None:
+        cursor_sort, cursor_value, cursor_id = decode_cursor(cursor, 3)
+        if (
+            cursor_sort != sort.key
+            or not isinstance(cursor_id, str)
+            or not isinstance(cursor_value, CURSOR_VALUE_TYPES[sort.key])
+            or isinstance(cursor_value, bool)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+        if sort.key == "date":
+            try:
+                cursor_value = datetime.date.fromisoformat(cursor_value)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+                )
+
+        if sort.descending:
+            after_cursor = or_(
+                sort_column < cursor_value,
+                and_(sort_column == cursor_value, expenses_table.c.id < cursor_id),
+            )
+        else:
+            after_cursor = or_(
+                sort_column > cursor_value,
+                and_(sort_column == cursor_value, expenses_table.c.id > cursor_id),
+            )
+
+        stmt = stmt.where(after_cursor)
+
+    return stmt
+
+
+def next_page_cursor(rows: List[Row], sort: ExpenseSort) -> str:
+    """Encodes the cursor continuing the listing after the last of the rows."""
+    return encode_cursor([sort.key, rows[-1].sort_value, rows[-1].id])
+
+
+def load_charges(
+    db: Session, rows: List[Row], projection: ExpenseProjection
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Loads the charges of the subscriptions among the listed rows in one query.
+
+    Args:
+        db: The session to query with.
+        rows: The listed expense rows.
+        projection: The listing projection, charges are only loaded if included.
+
+    Returns:
+        The charges of each subscription, most recent first.
+    """
+    subscription_ids = [
+        row.id for row in rows if row.expense_type == ExpenseTypeEnum.SUBSCRIPTION.value
+    ]
+    if not projection.include_charges or not subscription_ids:
+        return {}
+
+    charges = subscription_charges_table
+    stmt = select(
+        charges.c.subscription_id,
+        charges.c.id,
+        charges.c.amount,
+        charges.c.charged_date,
+    ).where(charges.c.subscription_id.in_(subscription_ids))
+
+    if projection.charges_limit is not None:
+        ranked = stmt.add_columns(
+            func.row_number()
+            .over(
+                partition_by=charges.c.subscription_id,
+                order_by=(charges.c.charged_date.desc(), charges.c.id.desc()),
+            )
+            .label("position")
+        ).subquery()
+        stmt = select(
+            ranked.c.subscription_id,
+            ranked.c.id,
+            ranked.c.amount,
+            ranked.c.charged_date,
+        ).where(ranked.c.position <= projection.charges_limit)
+        charges = ranked
+
+    stmt = stmt.order_by(charges.c.charged_date.desc(), charges.c.id.desc())
+
+    charges_by_subscription = defaultdict(list)
+    for charge in db.execute(stmt):
+        charges_by_subscription[charge.subscription_id].append(
+            {
+                "id": charge.id,
+                "amount": charge.amount,
+                "charged_date": charge.charged_date,
+            }
+        )
+
+    return charges_by_subscription
+
+
+def expense_item(
+    row: Row,
+    projection: ExpenseProjection,
+    charges_by_subscription: Dict[str, List[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Builds the listed representation of an expense row.
+
+    Args:
+        row: The expense row selected by listing_stmt.
+        projection: The listing projection.
+        charges_by_subscription: The charges loaded by load_charges.
+
+    Returns:
+        The projected fields of the expense, plus its charges if included.
+    """
+    is_subscription = row.expense_type == ExpenseTypeEnum.SUBSCRIPTION.value
+    type_fields = SUBSCRIPTION_FIELDS if is_subscription else ONE_TIME_FIELDS
+
+    item = {"id": row.id, "expense_type": row.expense_type}
+    for field in projection.fields:
+        if field in COMMON_FIELDS or field in type_fields:
+            item[field] = row._mapping[field]
+
+    if is_subscription and projection.include_charges:
+        item["charges"] = charges_by_subscription.get(row.id, [])
+
+    return item
+
+
+def iter_row_batches(db: Session, stmt: Select, batch_size: int) -> Iterator[List[Row]]:
+    """
+    Yields the rows of a query in batches, for streamed responses.
+
+    Rows are pulled through a server-side cursor, and each batch is released
+    before the next one is fetched, so memory stays bounded by the batch size.
+
+    Args:
+        db: The session of the request, closed once the rows are exhausted.
+        stmt: The query to run.
+        batch_size: The number of rows fetched at a time.
+    """
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+        # get_db has already closed the session by the time the body streams,
+        # so release the connection this stream checked out again
+        db.close()
@@ -0,0 +1,148 @@
+import re
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, column, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from api.models import EXPENSE_SEARCH_DOCUMENT, Expense, user_group_role_table
+from api.pagination import decode_cursor
+
+expenses_table = Expense.__table__
+expenses_fts = table("expenses_fts", column("rowid"), column("rank"))
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Splits a search query into lowercase words.
+
+    Raises a 400 if the query has no word to search for.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid search query"
+        )
+
+    return terms
+
+
+def search_stmt(
+    db: Session,
+    user_id: str,
+    query: str,
+    group_id: Optional[str],
+    cursor: Optional[str],
+) -> Select:
+    """
+    Builds the query searching the expenses of the user's groups.
+
+    Every word of the query matches as a prefix of a word of the expense name
+    or category, and results are ranked by relevance, most relevant first.
+    Postgres also matches names similar to the query, to tolerate typos.
+
+    Pages are delimited by the (score, id) of the last row sent.
+
+    Args:
+        db: The session, whose dialect picks the search backend.
+        user_id: The user searching, only their groups are searched.
+        query: The words to search for.
+        group_id: Restricts the search to one of the user's groups.
+        cursor: The next_cursor of the previous page.
+    """
+    terms = search_terms(query)
+    if db.get_bind().dialect.name == "postgresql":
+        matches = _postgres_matches(terms, query)
+    else:
+        matches = _sqlite_matches(terms)
+
+    stmt = (
+        select(
+            expenses_table.c.id,
+            expenses_table.c.group_id,
+            expenses_table.c.expense_type,
+            expenses_table.c.name,
+            expenses_table.c.category,
+            expenses_table.c.amount,
+            expenses_table.c.effective_date,
+            matches.c.score,
+        )
+        .select_from(
+            expenses_table.join(matches, matches.c.id == expenses_table.c.id).join(
+                user_group_role_table,
+                and_(
+                    user_group_role_table.c.group_id == expenses_table.c.group_id,
+                    user_group_role_table.c.user_id == user_id,
+                ),
+            )
+        )
+        .order_by(matches.c.score.desc(), expenses_table.c.id.asc())
+    )
+
+    if group_id is not None:
+        stmt = stmt.where(expenses_table.c.group_id == group_id)
+
+    if cursor is not None:
+        cursor_score, cursor_id = decode_cursor(cursor, 2)
+        if (
+            not isinstance(cursor_score, (int, float))
+            or isinstance(cursor_score, bool)
+            or not isinstance(cursor_id, str)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+        stmt = stmt.where(
+            or_(
+                matches.c.score < cursor_score,
+                and_(matches.c.score == cursor_score, expenses_table.c.id > cursor_id),
+            )
+        )
+
+    return stmt
+
+
+def _postgres_matches(terms: List[str], query: str):
+    document = func.to_tsvector(
+        literal_column("'simple'::regconfig"), literal_column(EXPENSE_SEARCH_DOCUMENT)
+    )
+    ts_query = func.to_tsquery(
+        literal_column("'simple'::regconfig"),
+        " & ".join(f"{term}:*" for term in terms),
+    )
+    similarity = func.similarity(expenses_table.c.name, query)
+
+    return (
+        select(
+            expenses_table.c.id,
+            (func.ts_rank(document, ts_query) + similarity).label("score"),
+        )
+        .where(
+            or_(
+                document.op("@@")(ts_query),
+                # Trigram similarity above pg_trgm.similarity_threshold, so
+                # "netflx" still finds "Netflix"
+                expenses_table.c.name.op("%")(query),
+            )
+        )
+        .subquery("matches")
+    )
+
+
+def _sqlite_matches(terms: List[str]):
+    # FTS5 ranks with bm25, lower is better, so it is negated into a score
+    return (
+        select(expenses_table.c.id, (-expenses_fts.c.rank).label("score"))
+        .select_from(
+            expenses_table.join(
+                expenses_fts, expenses_fts.c.rowid == literal_column("expenses.rowid")
+            )
+        )
+        .where(
+            literal_column("expenses_fts").match(
+                " ".join(f'"{term}"*' for term in terms)
+            )
+        )
+        .subquery("matches")
+    )
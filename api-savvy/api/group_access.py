@@ -0,0 +1,43 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from api.models import Group, GroupRoleEnum, User, user_group_role_table
+
+
+def get_member_group(db: Session, user: User, group_id: str) -> Group:
+    """Loads a group the user belongs to, along with its owner."""
+    group = db.execute(
+        select(Group)
+        .join(user_group_role_table, user_group_role_table.c.group_id == Group.id)
+        .where(Group.id == group_id, user_group_role_table.c.user_id == user.id)
+        .options(joinedload(Group.owner))
+    ).scalar_one_or_none()
+
+    if group is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
+        )
+
+    return group
+
+
+def check_group_write_access(db: Session, user: User, group_id: str):
+    """Ensures the user is a member of the group allowed to add expenses to it."""
+    stmt = select(user_group_role_table).where(
+        user_group_role_table.c.user_id == user.id,
+        user_group_role_table.c.group_id == group_id,
+    )
+
+    result = db.execute(stmt).first()
+
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
+        )
+
+    if result[2] not in [GroupRoleEnum.ADMIN, GroupRoleEnum.MEMBER]:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Insufficient privileges",
+        )
@@ -0,0 +1,204 @@
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from api.models import (
+    ChangeEntityEnum,
+    Expense,
+    ExpenseTypeEnum,
+    Group,
+    SubscriptionCharge,
+    user_group_role_table,
+)
+from api.anomalies import score_expenses
+from api.budgets import evaluate_budgets
+from api.rollups import Payment, add_to_monthly_rollups
+from api.sync import record_changes
+from api.versioning import touch_group
+
+
+def record_expenses_created(db: Session, group_id: str, expenses: Iterable[Expense]):
+    """
+    Adds newly created expenses to the group counters.
+
+    Only one-time expenses count towards the total spent, the monthly rollups
+    and budgets, subscriptions are accounted for through their charges. They
+    are also scored for anomalies against their category.
+
+    Args:
+        db: The session the expenses are being written with.
+        group_id: The group the expenses belong to.
+        expenses: The expenses being created.
+    """
+    expenses = list(expenses)
+    one_time = [
+        expense
+        for expense in expenses
+        if expense.expense_type == ExpenseTypeEnum.ONE_TIME.value
+    ]
+    spent = sum(expense.amount for expense in one_time)
+    _increment_group_stats(db, group_id, expense_count=len(expenses), total_spent=spent)
+    _add_payments(
+        db,
+        group_id,
+        (
+            (
+                expense.date,
+                expense.category,
+                expense.expense_type,
+                expense.amount,
+            )
+            for expense in one_time
+        ),
+    )
+    score_expenses(db, group_id, one_time)
+    touch_group(db, group_id)
+    record_changes(
+        db,
+        ChangeEntityEnum.EXPENSE,
+        [expense.id for expense in expenses],
+        group_id=group_id,
+    )
+
+
+def record_charges_created(
+    db: Session, group_id: str, charges: Iterable[SubscriptionCharge]
+):
+    """
+    Adds newly created subscription charges to the group counters and rollups.
+
+    Args:
+        db: The session the charges are being written with.
+        group_id: The group the charged subscriptions belong to.
+        charges: The charges being created.
+    """
+    charges = list(charges)
+    spent = sum(charge.amount for charge in charges)
+    _increment_group_stats(db, group_id, total_spent=spent)
+
+    # Charges take their category from the subscription, loaded in one query
+    # for the charges built from a subscription_id alone
+    subscription_ids = {
+        charge.subscription_id for charge in charges if charge.subscription is None
+    }
+    subscriptions = {}
+    if subscription_ids:
+        subscriptions = {
+            row.id: row
+            for row in db.execute(
+                select(Expense.id, Expense.category, Expense.expense_type).where(
+                    Expense.id.in_(subscription_ids)
+                )
+            )
+        }
+
+    payments = []
+    for charge in charges:
+        subscription = charge.subscription or subscriptions[charge.subscription_id]
+        payments.append(
+            (
+                charge.charged_date,
+                subscription.category,
+                subscription.expense_type,
+                charge.amount,
+            )
+        )
+    _add_payments(db, group_id, payments)
+    touch_group(db, group_id)
+    record_changes(
+        db,
+        ChangeEntityEnum.SUBSCRIPTION_CHARGE,
+        [charge.id for charge in charges],
+        group_id=group_id,
+    )
+
+
+def _add_payments(db: Session, group_id: str, payments: Iterable[Payment]):
+    """Rolls up new payments and checks the budgets they count towards."""
+    evaluate_budgets(db, group_id, add_to_monthly_rollups(db, group_id, payments))
+
+
+def record_member_joined(db: Session, group_id: str, user_id: str):
+    """
+    Adds a new member to the group counters.
+
+    The membership is logged for the new member alone, whose client has to
+    fetch the group in full as its earlier changes were never synced.
+
+    Args:
+        db: The session the membership is being written with.
+        group_id: The group the member joined.
+        user_id: The member who joined.
+    """
+    _increment_group_stats(db, group_id, member_count=1)
+    touch_group(db, group_id)
+    record_changes(db, ChangeEntityEnum.MEMBERSHIP, [group_id], user_id=user_id)
+
+
+def _increment_group_stats(db: Session, group_id: str, **deltas):
+    """
+    Increments the counters in the database so concurrent writers never lose
+    updates. Deltas that are all zero skip the UPDATE, the callers bump the
+    group version either way.
+    """
+    values = {
+        column: getattr(Group, column) + delta
+        for column, delta in deltas.items()
+        if delta
+    }
+    if not values:
+        return
+
+    db.execute(update(Group).where(Group.id == group_id).values(**values))
+
+
+def reconcile_group_stats(db: Session, group_ids: Optional[List[str]] = None) -> int:
+    """
+    Recomputes the counters of the given groups from their source rows.
+
+    Runs as a single set-based UPDATE, so it can repair every group at once.
+
+    Args:
+        db: The session to run the update with. The caller commits.
+        group_ids: The groups to reconcile, or None to reconcile every group.
+
+    Returns:
+        The number of groups updated.
+    """
+    member_count = (
+        select(func.count())
+        .select_from(user_group_role_table)
+        .where(user_group_role_table.c.group_id == Group.id)
+        .scalar_subquery()
+    )
+    expense_count = (
+        select(func.count(Expense.id))
+        .where(Expense.group_id == Group.id)
+        .scalar_subquery()
+    )
+    one_time_spent = (
+        select(func.coalesce(func.sum(Expense.amount), 0))
+        .where(
+            Expense.group_id == Group.id,
+            Expense.expense_type == ExpenseTypeEnum.ONE_TIME.value,
+        )
+        .scalar_subquery()
+    )
+    charges_spent = (
+        select(func.coalesce(func.sum(SubscriptionCharge.amount), 0))
+        .join(Expense, Expense.id == SubscriptionCharge.subscription_id)
+        .where(Expense.group_id == Group.id)
+        .scalar_subquery()
+    )
+
+    stmt = update(Group).values(
+        member_count=member_count,
+        expense_count=expense_count,
+        total_spent=one_time_spent + charges_spent,
+    )
+    if group_ids is not None:
+        stmt = stmt.where(Group.id.in_(group_ids))
+
+    result = db.execute(stmt, execution_options={"synchronize_session": False})
+    return result.rowcount
@@ -0,0 +1,242 @@
+import datetime
+import hashlib
+from typing import Annotated, Any, Iterator, Optional
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from pydantic_core import to_json
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from api.database import get_db
+from api.middlewares import get_authenticated_user
+from api.models import IdempotencyKey, User
+
+IDEMPOTENCY_KEY_TTL = datetime.timedelta(hours=24)
+# How long a claimed key is held for its request, past it the request is
+# presumed dead, e.g. its worker killed, and a retry may run it again
+IDEMPOTENCY_KEY_LEASE = datetime.timedelta(minutes=1)
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+class IdempotentReplay(Exception):
+    """Raised to answer a retried request with the response stored for its key."""
+
+    def __init__(self, status_code: int, body: bytes):
+        self.status_code = status_code
+        self.body = body
+
+
+def idempotent_replay_handler(request: Request, exc: IdempotentReplay) -> Response:
+    return Response(
+        content=exc.body,
+        status_code=exc.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class Idempotency:
+    """Handle to store the response of a request sent with an Idempotency-Key."""
+
+    def __init__(
+        self, db: Optional[Session] = None, record: Optional[IdempotencyKey] = None
+    ):
+        self.db = db
+        self.record = record
+        # The lease this request holds the key with
+        self.locked_until = record.locked_until if record is not None else None
+        self.saved = False
+
+    def save(self, content: Any, status_code: int = status.HTTP_201_CREATED):
+        """
+        Stores the response to replay on retries.
+
+        Call it before committing the write, so the response is stored in the
+        same transaction. Does nothing for requests sent without a key.
+
+        Args:
+            content: The body the route returns.
+            status_code: The status the route responds with.
+
+        Raises:
+            HTTPException: 409 when the request outlived its lease and a
+                retry took the key over, so the caller must not commit.
+        """
+        if self.record is None:
+            return
+
+        result = self.db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == self.record.user_id,
+                IdempotencyKey.key == self.record.key,
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.locked_until == self.locked_until,
+            )
+            .values(status_code=status_code, response_body=to_json(content)),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount != 1:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Idempotency-Key was taken over by a retry",
+            )
+        self.saved = True
+
+
+async def request_fingerprint(request: Request) -> str:
+    """Dependency hashing the method, path and body of the request."""
+    body = await request.body()
+    return hashlib.sha256(
+        b"|".join([request.method.encode(), request.url.path.encode(), body])
+    ).hexdigest()
+
+
+def idempotency_key(
+    idempotency_key: Annotated[str | None, Header()] = None,
+    fingerprint: str = Depends(request_fingerprint),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+) -> Iterator[Idempotency]:
+    """
+    Dependency making a creating route idempotent per Idempotency-Key header.
+
+    The first request with a key claims it before the route runs. Retries of
+    a completed request are answered with its stored response, before the
+    route and its membership checks run. Retries while it is still running
+    get a 409, and reusing a key for a different request a 422. If the route
+    fails or stores nothing, the claim is released so the request can be
+    retried. A claim never completed nor released, its request having died,
+    is taken over by the first retry past IDEMPOTENCY_KEY_LEASE.
+    """
+    if idempotency_key is None:
+        yield Idempotency()
+        return
+
+    if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key"
+        )
+
+    user_id = user.id
+    now = datetime.datetime.now(datetime.timezone.utc)
+    record = db.get(IdempotencyKey, (user_id, idempotency_key))
+    if record is not None and _is_expired(record, now):
+        db.delete(record)
+        db.commit()
+        record = None
+
+    if record is None:
+        record = IdempotencyKey(
+            user_id=user_id,
+            key=idempotency_key,
+            fingerprint=fingerprint,
+            created_at=now,
+            expires_at=now + IDEMPOTENCY_KEY_TTL,
+            locked_until=now + IDEMPOTENCY_KEY_LEASE,
+        )
+        db.add(record)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Claimed by a concurrent request in the meantime
+            db.rollback()
+            record = db.get(IdempotencyKey, (user_id, idempotency_key))
+        else:
+            yield from _run_claimed(db, record)
+            return
+
+    if record.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key reused for a different request",
+        )
+
+    if record.status_code is None:
+        if _take_over(db, record, now):
+            yield from _run_claimed(db, record)
+            return
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is in progress",
+        )
+
+    raise IdempotentReplay(record.status_code, record.response_body)
+
+
+def _take_over(db: Session, record: IdempotencyKey, now: datetime.datetime) -> bool:
+    """Claims a key whose lease expired, unless another retry just did."""
+    locked_until = now + IDEMPOTENCY_KEY_LEASE
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.user_id == record.user_id,
+            IdempotencyKey.key == record.key,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.locked_until <= now,
+        )
+        .values(locked_until=locked_until),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        return False
+
+    db.commit()
+    db.refresh(record)
+    return True
+
+
+def _run_claimed(db: Session, record: IdempotencyKey) -> Iterator[Idempotency]:
+    idempotency = Idempotency(db, record)
+    user_id, key, locked_until = record.user_id, record.key, idempotency.locked_until
+    try:
+        yield idempotency
+    except Exception:
+        db.rollback()
+        _release(db, user_id, key, locked_until)
+        raise
+
+    if not idempotency.saved:
+        _release(db, user_id, key, locked_until)
+
+
+def _release(db: Session, user_id: str, key: str, locked_until: datetime.datetime):
+    # Only the claim this request holds, not one a retry took over since
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.locked_until == locked_until,
+        )
+    )
+    db.commit()
+
+
+def _is_expired(record: IdempotencyKey, now: datetime.datetime) -> bool:
+    # Stored in UTC, but read back naive on databases without timezone support
+    return record.expires_at.replace(tzinfo=datetime.timezone.utc) <= now
+
+
+def remove_expired_idempotency_keys(
+    db: Session, now: Optional[datetime.datetime] = None
+) -> int:
+    """
+    Deletes the idempotency keys past their expiry.
+
+    Args:
+        db: The session to delete with. The caller commits.
+        now: The reference time, the current time if None.
+
+    Returns:
+        The number of keys deleted.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    result = db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount
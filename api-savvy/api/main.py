@@ -1,24 +1,58 @@
+import asyncio
+import datetime
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from api.database import Base, engine
+from api.database import Base, SessionLocal, engine
+from api.expense_export import fail_interrupted_exports, sweep_expired_exports
+from api.idempotency import IdempotentReplay, idempotent_replay_handler
 from api.routes import auth
-from api.routes.v1 import groups, expenses, invitations
+from api.routes.v1 import (
+    budgets,
+    groups,
+    expenses,
+    exports,
+    imports,
+    invitations,
+    me,
+    reports,
+    sync,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
+    db = SessionLocal()
+    try:
+        # Exports queued by a previous process were lost with it
+        fail_interrupted_exports(db, datetime.datetime.now(datetime.timezone.utc))
+        db.commit()
+    finally:
+        db.close()
+    sweeper = asyncio.create_task(sweep_expired_exports(SessionLocal))
+
     yield
-    # Shutdown logic (if any)
+
+    # Shutdown logic
+    sweeper.cancel()
 
 
 # Base.metadata.drop_all(bind=engine)
+# Only creates missing tables, existing databases are upgraded with
+# `python -m api.commands upgrade-schema`, see api.schema_upgrade
 Base.metadata.create_all(bind=engine)
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_exception_handler(IdempotentReplay, idempotent_replay_handler)
 app.include_router(auth.router, prefix="/auth")
 
 app.include_router(groups.router, prefix="/v1")
 app.include_router(invitations.router, prefix="/v1")
 app.include_router(expenses.router, prefix="/v1")
+app.include_router(imports.router, prefix="/v1")
+app.include_router(exports.router, prefix="/v1")
+app.include_router(sync.router, prefix="/v1")
+app.include_router(reports.router, prefix="/v1")
+app.include_router(budgets.router, prefix="/v1")
+app.include_router(me.router, prefix="/v1")
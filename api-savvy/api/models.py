@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import datetime
+import hashlib
 from typing import List, Optional
 from enum import Enum
 from uuid import uuid4
-from sqlalchemy import Column, Enum as SAEnum, ForeignKey, Table
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    Enum as SAEnum,
+    ForeignKey,
+    Index,
+    Table,
+    event,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from api.database import Base
 
@@ -52,6 +62,10 @@ class User(Base):
 
     refresh_tokens: Mapped[List[UserRefreshToken]] = relationship(back_populates="user")
 
+    # Bumped by api.versioning when their invitations change, their groups
+    # are versioned on their own, see api.versioning.user_listing_version
+    version: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
+
 
 class UserRefreshToken(Base):
     __tablename__ = "refresh_tokens"
@@ -85,6 +99,20 @@ class Group(Base):
 
     expenses: Mapped[List[Expense]] = relationship(back_populates="group")
 
+    # Denormalized counters, kept in sync by api.group_stats on every write
+    member_count: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
+    expense_count: Mapped[int] = mapped_column(
+        nullable=False, default=0, server_default="0"
+    )
+    total_spent: Mapped[float] = mapped_column(
+        nullable=False, default=0.0, server_default="0"
+    )
+
+    # Bumped by api.versioning on every write to the group or its expenses
+    version: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
+
 
 class GroupInvitationStatusEnum(str, Enum):
     PENDING = "pending"
@@ -140,11 +168,92 @@ class Expense(Base):
     group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), index=True)
     group: Mapped[Group] = relationship(back_populates="expenses")
 
+    # Date the expense is listed under (OneTimeExpense.date or
+    # Subscription.start_date), copied here so listings can be ordered and
+    # paginated on a single index
+    effective_date: Mapped[datetime.date] = mapped_column(nullable=False)
+
+    # Hash of the identifying fields of one-time expenses, see
+    # expense_content_hash, used to skip rows already imported
+    content_hash: Mapped[Optional[str]] = mapped_column(default=None)
+
     expense_type: Mapped[str]
     __mapper_args__ = {
         "polymorphic_on": "expense_type",
     }
 
+    __table_args__ = (
+        Index(
+            "ix_expenses_group_id_effective_date_id", "group_id", "effective_date", "id"
+        ),
+        Index("ix_expenses_group_id_amount_id", "group_id", "amount", "id"),
+        Index("ix_expenses_group_id_name_id", "group_id", "name", "id"),
+        Index(
+            "ix_expenses_group_id_category_effective_date",
+            "group_id",
+            "category",
+            "effective_date",
+        ),
+        Index(
+            "ix_expenses_group_id_creator_id_effective_date",
+            "group_id",
+            "creator_id",
+            "effective_date",
+        ),
+        Index(
+            "ix_expenses_group_id_expense_type_effective_date",
+            "group_id",
+            "expense_type",
+            "effective_date",
+        ),
+        Index("ix_expenses_group_id_content_hash", "group_id", "content_hash"),
+    )
+
+
+# Search indexes over name and category, see api/expense_search.py. Postgres
+# gets a tsvector index for ranked prefix matching and a trigram index for
+# fuzzy matching, SQLite an FTS5 table kept in sync by triggers.
+EXPENSE_SEARCH_DOCUMENT = "coalesce(name, '') || ' ' || coalesce(category, '')"
+
+EXPENSE_SEARCH_DDL = {
+    "postgresql": (
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_expenses_search_document ON expenses "
+        f"USING GIN (to_tsvector('simple'::regconfig, {EXPENSE_SEARCH_DOCUMENT}))",
+        "CREATE INDEX IF NOT EXISTS ix_expenses_name_trgm ON expenses "
+        "USING GIN (name gin_trgm_ops)",
+    ),
+    "sqlite": (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts "
+        "USING fts5(name, category, content='expenses', content_rowid='rowid')",
+        "CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses "
+        "BEGIN INSERT INTO expenses_fts (rowid, name, category) "
+        "VALUES (new.rowid, new.name, new.category); END",
+        "CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses "
+        "BEGIN INSERT INTO expenses_fts (expenses_fts, rowid, name, category) "
+        "VALUES ('delete', old.rowid, old.name, old.category); END",
+        "CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE ON expenses "
+        "BEGIN INSERT INTO expenses_fts (expenses_fts, rowid, name, category) "
+        "VALUES ('delete', old.rowid, old.name, old.category); "
+        "INSERT INTO expenses_fts (rowid, name, category) "
+        "VALUES (new.rowid, new.name, new.category); END",
+    ),
+}
+
+for dialect, statements in EXPENSE_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(
+            Expense.__table__,
+            "after_create",
+            DDL(statement).execute_if(dialect=dialect),
+        )
+
+event.listen(
+    Expense.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS expenses_fts").execute_if(dialect="sqlite"),
+)
+
 
 class OneTimeExpense(Expense):
     __tablename__ = "one_time_expenses"
@@ -158,6 +267,34 @@ class OneTimeExpense(Expense):
     }
 
 
+@event.listens_for(OneTimeExpense, "before_insert")
+@event.listens_for(OneTimeExpense, "before_update")
+def _set_one_time_expense_derived_columns(mapper, connection, target: OneTimeExpense):
+    target.effective_date = target.date
+    target.content_hash = expense_content_hash(
+        target.group_id, target.date, target.amount, target.name
+    )
+
+
+def expense_content_hash(
+    group_id: str, date: datetime.date, amount: float, name: str
+) -> str:
+    """
+    Hashes the fields identifying a one-time expense within its group.
+
+    Args:
+        group_id: The group of the expense.
+        date: The date of the expense.
+        amount: The amount of the expense, rounded to cents.
+        name: The name of the expense, compared case-insensitively.
+
+    Returns:
+        The hex digest stored in Expense.content_hash.
+    """
+    key = f"{group_id}|{date.isoformat()}|{amount:.2f}|{name.strip().lower()}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
 class SubscriptionFrequencyEnum(str, Enum):
     DAILY = "daily"
     WEEKLY = "weekly"
@@ -187,6 +324,12 @@ class Subscription(Expense):
     }
 
 
+@event.listens_for(Subscription, "before_insert")
+@event.listens_for(Subscription, "before_update")
+def _set_subscription_effective_date(mapper, connection, target: Subscription):
+    target.effective_date = target.start_date
+
+
 class SubscriptionCharge(Base):
     __tablename__ = "subscription_charges"
 
@@ -201,3 +344,218 @@ class SubscriptionCharge(Base):
 
     creator_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
     creator: Mapped[User] = relationship(back_populates="created_subscription_charges")
+
+    __table_args__ = (
+        Index(
+            "ix_subscription_charges_subscription_id_charged_date",
+            "subscription_id",
+            "charged_date",
+        ),
+    )
+
+
+class ImportFormatEnum(str, Enum):
+    CSV = "csv"
+    OFX = "ofx"
+
+
+class JobStatusEnum(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    EXPIRED = "expired"
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id: Mapped[str] = mapped_column(primary_key=True, default=str(uuid4()))
+
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), index=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
+
+    format: Mapped[ImportFormatEnum] = mapped_column(nullable=False)
+    status: Mapped[JobStatusEnum] = mapped_column(
+        nullable=False, default=JobStatusEnum.PENDING
+    )
+
+    processed_rows: Mapped[int] = mapped_column(nullable=False, default=0)
+    imported_rows: Mapped[int] = mapped_column(nullable=False, default=0)
+    duplicate_rows: Mapped[int] = mapped_column(nullable=False, default=0)
+    invalid_rows: Mapped[int] = mapped_column(nullable=False, default=0)
+    # Credits, which are not expenses
+    skipped_rows: Mapped[int] = mapped_column(nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(default=None)
+
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+
+
+class ExportFormatEnum(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+    JSON = "json"
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id: Mapped[str] = mapped_column(primary_key=True, default=str(uuid4()))
+
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), index=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
+
+    format: Mapped[ExportFormatEnum] = mapped_column(nullable=False)
+    # ExpenseFilters of the export, serialized as JSON
+    filters: Mapped[str] = mapped_column(nullable=False, default="{}")
+    status: Mapped[JobStatusEnum] = mapped_column(
+        nullable=False, default=JobStatusEnum.PENDING
+    )
+
+    row_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    path: Mapped[Optional[str]] = mapped_column(default=None)
+    error: Mapped[Optional[str]] = mapped_column(default=None)
+
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(default=None)
+
+    __table_args__ = (
+        Index("ix_export_jobs_status_expires_at", "status", "expires_at"),
+    )
+
+
+class ChangeEntityEnum(str, Enum):
+    GROUP = "group"
+    EXPENSE = "expense"
+    SUBSCRIPTION_CHARGE = "subscription_charge"
+    INVITATION = "invitation"
+    # The user joined the group, whose earlier changes they never synced
+    MEMBERSHIP = "membership"
+
+
+class ChangeOperationEnum(str, Enum):
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+
+# Change log read by the sync endpoint, see api.sync. Deleted rows keep their
+# DELETE entry as a tombstone, so there are no foreign keys here.
+class Change(Base):
+    __tablename__ = "changes"
+
+    seq: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # Postgres transaction that wrote the change, 0 elsewhere. The log is read
+    # in (txid, seq) order, see api.sync.changes_after.
+    txid: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    entity: Mapped[ChangeEntityEnum] = mapped_column(nullable=False)
+    entity_id: Mapped[str] = mapped_column(nullable=False)
+    operation: Mapped[ChangeOperationEnum] = mapped_column(
+        nullable=False, default=ChangeOperationEnum.UPSERT
+    )
+
+    # Changes are visible to the members of group_id, or to user_id alone
+    group_id: Mapped[Optional[str]] = mapped_column(default=None)
+    user_id: Mapped[Optional[str]] = mapped_column(default=None)
+
+    changed_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        Index("ix_changes_group_id_txid_seq", "group_id", "txid", "seq"),
+        Index("ix_changes_user_id_txid_seq", "user_id", "txid", "seq"),
+    )
+
+
+# Responses of creating requests sent with an Idempotency-Key header, see
+# api.idempotency. status_code is None while the first request is running.
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    key: Mapped[str] = mapped_column(primary_key=True)
+
+    fingerprint: Mapped[str] = mapped_column(nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(default=None)
+    response_body: Mapped[Optional[bytes]] = mapped_column(default=None)
+
+    created_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    expires_at: Mapped[datetime.datetime] = mapped_column(nullable=False, index=True)
+    # Until when the request that claimed the key holds it, while it has no
+    # response stored. Retries take over claims past it.
+    locked_until: Mapped[Optional[datetime.datetime]] = mapped_column(default=None)
+
+
+# Spending of a group per month, category and expense type, maintained by
+# api.rollups alongside every payment written. Payments without a category
+# are rolled up under "", as primary key columns cannot be NULL.
+class GroupMonthlyRollup(Base):
+    __tablename__ = "group_monthly_rollups"
+
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    # First day of the month
+    month: Mapped[datetime.date] = mapped_column(primary_key=True)
+    category: Mapped[str] = mapped_column(primary_key=True)
+    expense_type: Mapped[str] = mapped_column(primary_key=True)
+
+    amount: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+# Monthly spending limit of a group for one category, see api.budgets
+class GroupBudget(Base):
+    __tablename__ = "group_budgets"
+
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    category: Mapped[str] = mapped_column(primary_key=True)
+
+    amount: Mapped[float] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+
+
+# Recorded once per month the spending of a budgeted category crosses one of
+# the api.budgets.BUDGET_ALERT_THRESHOLDS
+class BudgetAlert(Base):
+    __tablename__ = "budget_alerts"
+
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    category: Mapped[str] = mapped_column(primary_key=True)
+    # First day of the month
+    month: Mapped[datetime.date] = mapped_column(primary_key=True)
+    # Percentage of the budget
+    threshold: Mapped[int] = mapped_column(primary_key=True)
+
+    budget_amount: Mapped[float] = mapped_column(nullable=False)
+    spent: Mapped[float] = mapped_column(nullable=False)
+    crossed_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+
+
+# Running count, mean and sum of squared deviations (Welford) of the one-time
+# expense amounts of a group per category, see api.anomalies. Expenses
+# without a category are tracked under "".
+class CategorySpendingStats(Base):
+    __tablename__ = "category_spending_stats"
+
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    category: Mapped[str] = mapped_column(primary_key=True)
+
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+    mean: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    m2: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+
+# One-time expense whose amount was unusual for its category when created
+class FlaggedExpense(Base):
+    __tablename__ = "flagged_expenses"
+
+    expense_id: Mapped[str] = mapped_column(ForeignKey("expenses.id"), primary_key=True)
+    group_id: Mapped[str] = mapped_column(ForeignKey("groups.id"))
+
+    # Score against the category history before the expense
+    z_score: Mapped[float] = mapped_column(nullable=False)
+    mean: Mapped[float] = mapped_column(nullable=False)
+    stddev: Mapped[float] = mapped_column(nullable=False)
+    flagged_at: Mapped[datetime.datetime] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        Index("ix_flagged_expenses_group_id_flagged_at", "group_id", "flagged_at"),
+    )
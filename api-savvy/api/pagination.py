@@ -0,0 +1,47 @@
+import base64
+import binascii
+import json
+from typing import Any, List
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque cursor.
+
+    Args:
+        values: JSON serializable values identifying the row, in sort order.
+
+    Returns:
+        A URL safe string the client sends back to fetch the next page.
+    """
+    payload = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The cursor sent by the client.
+        length: The number of values the cursor is expected to hold.
+
+    Returns:
+        The values encoded in the cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != length:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    return values
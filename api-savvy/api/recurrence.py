@@ -0,0 +1,119 @@
+import bisect
+import calendar
+import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from api.models import SubscriptionFrequencyEnum
+
+# Length of one period of each frequency, in (days, months)
+FREQUENCY_STEPS: Dict[SubscriptionFrequencyEnum, Tuple[int, int]] = {
+    SubscriptionFrequencyEnum.DAILY: (1, 0),
+    SubscriptionFrequencyEnum.WEEKLY: (7, 0),
+    SubscriptionFrequencyEnum.MONTHLY: (0, 1),
+    SubscriptionFrequencyEnum.YEARLY: (0, 12),
+}
+
+
+class Recurrence(NamedTuple):
+    id: str
+    start_date: datetime.date
+    end_date: Optional[datetime.date]
+    on_every: int
+    frequency: SubscriptionFrequencyEnum
+
+
+def add_months(anchor: datetime.date, months: int) -> datetime.date:
+    """
+    Moves a date by whole months, keeping its day of the month.
+
+    Days past the end of the target month are clamped to its last day, and
+    the anchor's day is kept for later months: a subscription started on
+    Jan 31 recurs on Feb 29 in a leap year, then on Mar 31.
+    """
+    year, month = divmod(anchor.month - 1 + months, 12)
+    year += anchor.year
+    day = min(anchor.day, calendar.monthrange(year, month + 1)[1])
+    return datetime.date(year, month + 1, day)
+
+
+def schedule(
+    start_date: datetime.date,
+    on_every: int,
+    frequency: SubscriptionFrequencyEnum,
+    from_date: datetime.date,
+    to_date: datetime.date,
+) -> Tuple[datetime.date, ...]:
+    """
+    Lists the occurrences of a recurrence between two dates, both included.
+
+    The first occurrence in the range is found arithmetically rather than by
+    stepping from the start date, so the cost only depends on the number of
+    occurrences returned, however old the recurrence is.
+    """
+    if on_every < 1:
+        return ()
+
+    days, months = FREQUENCY_STEPS[frequency]
+    days, months = days * on_every, months * on_every
+    from_date = max(from_date, start_date)
+
+    if days:
+        # Ceiling division of the days elapsed since the start
+        index = -(-(from_date - start_date).days // days)
+        first = start_date + datetime.timedelta(days=index * days)
+        return tuple(
+            first + datetime.timedelta(days=offset)
+            for offset in range(0, (to_date - first).days + 1, days)
+        )
+
+    elapsed = (from_date.year - start_date.year) * 12 + (
+        from_date.month - start_date.month
+    )
+    index = -(-elapsed // months)
+    if add_months(start_date, index * months) < from_date:
+        index += 1
+
+    occurrences = []
+    occurrence = add_months(start_date, index * months)
+    while occurrence <= to_date:
+        occurrences.append(occurrence)
+        index += 1
+        occurrence = add_months(start_date, index * months)
+    return tuple(occurrences)
+
+
+def project_occurrences(
+    recurrences: Iterable[Recurrence],
+    from_date: datetime.date,
+    to_date: datetime.date,
+) -> Dict[str, List[datetime.date]]:
+    """
+    Expands recurrences into their occurrence dates over a horizon.
+
+    Each distinct schedule (start date, period) is expanded once for the
+    whole batch, then cut at every recurrence's own end date by bisection.
+
+    Args:
+        recurrences: The recurrences to expand.
+        from_date: First day of the horizon.
+        to_date: Last day of the horizon.
+
+    Returns:
+        The occurrences of each recurrence by id, in date order, empty for
+        recurrences with none in the horizon.
+    """
+    # Scoped to the batch, as the horizon of the next one usually differs
+    schedules = {}
+    projected = {}
+    for recurrence in recurrences:
+        key = (recurrence.start_date, recurrence.on_every, recurrence.frequency)
+        occurrences = schedules.get(key)
+        if occurrences is None:
+            occurrences = schedules[key] = schedule(*key, from_date, to_date)
+        if recurrence.end_date is not None:
+            occurrences = occurrences[
+                : bisect.bisect_right(occurrences, recurrence.end_date)
+            ]
+        projected[recurrence.id] = list(occurrences)
+
+    return projected
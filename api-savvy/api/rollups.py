@@ -0,0 +1,105 @@
+import datetime
+from collections import defaultdict
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from api.models import GroupMonthlyRollup
+from api.spending import bucket_start, spending_cte
+
+# A payment to roll up: (date, category, expense_type, amount)
+Payment = Tuple[datetime.date, str | None, str, float]
+
+
+def rollup_category(category: str | None) -> str:
+    """The category a payment is rolled up under, "" for uncategorized payments."""
+    return category or ""
+
+
+def add_to_monthly_rollups(
+    db: Session, group_id: str, payments: Iterable[Payment]
+) -> Set[Tuple[datetime.date, str]]:
+    """
+    Adds newly created payments to the monthly rollups of a group.
+
+    The payments are summed per rollup row in Python first, then applied as a
+    single multi-row upsert that increments the stored sums in the database,
+    so concurrent writers never lose updates.
+
+    Args:
+        db: The session the payments are being written with.
+        group_id: The group the payments belong to.
+        payments: The payments being created.
+
+    Returns:
+        The (month, category) keys whose spending changed.
+    """
+    deltas = defaultdict(lambda: [0.0, 0])
+    for date, category, expense_type, amount in payments:
+        delta = deltas[(date.replace(day=1), rollup_category(category), expense_type)]
+        delta[0] += amount
+        delta[1] += 1
+
+    if not deltas:
+        return set()
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(GroupMonthlyRollup).values(
+        [
+            {
+                "group_id": group_id,
+                "month": month,
+                "category": category,
+                "expense_type": expense_type,
+                "amount": amount,
+                "count": count,
+            }
+            for (month, category, expense_type), (amount, count) in deltas.items()
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["group_id", "month", "category", "expense_type"],
+            set_={
+                "amount": GroupMonthlyRollup.amount + stmt.excluded.amount,
+                "count": GroupMonthlyRollup.count + stmt.excluded.count,
+            },
+        )
+    )
+    return {(month, category) for month, category, _ in deltas}
+
+
+def rebuild_monthly_rollups(db: Session, group_id: str):
+    """
+    Recomputes the monthly rollups of a group from its payments.
+
+    Replaces the rollups with a single INSERT ... SELECT over spending_cte,
+    to backfill them or repair drift.
+
+    Args:
+        db: The session to rebuild with. The caller commits.
+        group_id: The group whose rollups are rebuilt.
+    """
+    db.execute(
+        delete(GroupMonthlyRollup).where(GroupMonthlyRollup.group_id == group_id)
+    )
+
+    spending = spending_cte(group_id)
+    month = bucket_start(db.get_bind().dialect.name, "month", spending.c.date)
+    category = func.coalesce(spending.c.category, "")
+    rows = select(
+        literal(group_id),
+        month,
+        category,
+        spending.c.expense_type,
+        func.sum(spending.c.amount),
+        func.count(),
+    ).group_by(month, category, spending.c.expense_type)
+
+    db.execute(
+        insert(GroupMonthlyRollup).from_select(
+            ["group_id", "month", "category", "expense_type", "amount", "count"], rows
+        )
+    )
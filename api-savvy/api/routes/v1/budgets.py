@@ -0,0 +1,188 @@
+import datetime
+from collections import defaultdict
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from api.budgets import evaluate_budgets, month_spent_stmt
+from api.database import get_db
+from api.group_access import check_group_write_access, get_member_group
+from api.models import BudgetAlert, GroupBudget, User
+from api.middlewares import get_authenticated_user
+from api.serialization import json_response
+from api.versioning import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    touch_group,
+)
+
+router = APIRouter()
+
+
+class BudgetUpdate(BaseModel):
+    amount: float = Field(gt=0)
+
+
+class BudgetResponse(BaseModel):
+    category: str
+    amount: float
+
+
+class BudgetAlertResponse(BaseModel):
+    threshold: int
+    budget_amount: float
+    spent: float
+    crossed_at: datetime.datetime
+
+
+class BudgetStatus(BudgetResponse):
+    spent: float
+    remaining: float
+    # Percentage of the budget spent
+    used: float
+    alerts: list[BudgetAlertResponse]
+
+
+class BudgetStatusResponse(BaseModel):
+    group_id: str
+    month: str
+    budgets: list[BudgetStatus]
+
+
+@router.put("/groups/{group_id}/budgets/{category}", response_model=BudgetResponse)
+def put_budget(
+    group_id: str,
+    category: str,
+    budget: BudgetUpdate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    check_group_write_access(db, user, group_id)
+
+    db_budget = db.get(GroupBudget, (group_id, category))
+    if db_budget is None:
+        db_budget = GroupBudget(group_id=group_id, category=category)
+        db.add(db_budget)
+
+    db_budget.amount = budget.amount
+    db_budget.updated_at = datetime.datetime.now(datetime.timezone.utc)
+    db.flush()
+
+    # Spending may already be past a threshold of the new amount
+    evaluate_budgets(db, group_id, [(datetime.date.today().replace(day=1), category)])
+    touch_group(db, group_id)
+    db.commit()
+
+    return BudgetResponse(category=db_budget.category, amount=db_budget.amount)
+
+
+@router.delete(
+    "/groups/{group_id}/budgets/{category}", status_code=status.HTTP_204_NO_CONTENT
+)
+def delete_budget(
+    group_id: str,
+    category: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    check_group_write_access(db, user, group_id)
+
+    db_budget = db.get(GroupBudget, (group_id, category))
+    if db_budget is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Budget not found"
+        )
+
+    db.delete(db_budget)
+    db.execute(
+        delete(BudgetAlert).where(
+            BudgetAlert.group_id == group_id, BudgetAlert.category == category
+        )
+    )
+    touch_group(db, group_id)
+    db.commit()
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/groups/{group_id}/budgets", response_model=BudgetStatusResponse)
+def get_budget_status(
+    group_id: str,
+    request: Request,
+    month: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}$"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    if month is None:
+        month_start = datetime.date.today().replace(day=1)
+    else:
+        try:
+            month_start = datetime.datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid month"
+            )
+
+    # The default month moves with the current date, so it is part of the tag
+    etag = make_etag(request, group.id, group.version, month_start)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    budgets = db.execute(
+        select(GroupBudget.category, GroupBudget.amount)
+        .where(GroupBudget.group_id == group_id)
+        .order_by(GroupBudget.category)
+    ).all()
+
+    spent = {}
+    if budgets:
+        spent = {
+            row.category: row.spent
+            for row in db.execute(
+                month_spent_stmt(
+                    group_id, [(month_start, budget.category) for budget in budgets]
+                )
+            )
+        }
+
+    alerts = defaultdict(list)
+    for alert in db.scalars(
+        select(BudgetAlert)
+        .where(BudgetAlert.group_id == group_id, BudgetAlert.month == month_start)
+        .order_by(BudgetAlert.threshold)
+    ):
+        alerts[alert.category].append(
+            BudgetAlertResponse.model_construct(
+                threshold=alert.threshold,
+                budget_amount=alert.budget_amount,
+                spent=alert.spent,
+                crossed_at=alert.crossed_at,
+            )
+        )
+
+    return json_response(
+        BudgetStatusResponse.model_construct(
+            group_id=group_id,
+            month=month_start.strftime("%Y-%m"),
+            budgets=[
+                BudgetStatus.model_construct(
+                    category=budget.category,
+                    amount=budget.amount,
+                    spent=spent.get(budget.category, 0.0),
+                    remaining=budget.amount - spent.get(budget.category, 0.0),
+                    used=round(
+                        spent.get(budget.category, 0.0) * 100 / budget.amount, 2
+                    ),
+                    alerts=alerts[budget.category],
+                )
+                for budget in budgets
+            ],
+        ),
+        headers={"ETag": etag},
+    )
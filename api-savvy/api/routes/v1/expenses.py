@@ -1,26 +1,55 @@
 import datetime
-from typing import Optional
+import enum
+from typing import Any, Iterator, List, Optional
 from uuid import uuid4
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from pydantic_core import to_json
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from api.database import get_db
-from api.iterable_operations import find_first
+from api.expense_export import (
+    EXPORT_MEDIA_TYPES,
+    export_chunks,
+    export_stmt,
+    gzip_chunks,
+    parquet_available,
+)
+from api.expense_listing import (
+    ExpenseFilters,
+    ExpenseProjection,
+    expense_item,
+    get_expense_filters,
+    iter_row_batches,
+    listing_stmt,
+    load_charges,
+    next_page_cursor,
+    parse_projection,
+    parse_sort,
+)
+from api.expense_search import search_stmt
+from api.group_access import check_group_write_access, get_member_group
+from api.group_stats import record_charges_created, record_expenses_created
+from api.idempotency import Idempotency, idempotency_key
 from api.models import (
+    Expense,
     ExpenseTypeEnum,
-    GroupRoleEnum,
+    FlaggedExpense,
     OneTimeExpense,
     Subscription,
     SubscriptionCharge,
     SubscriptionFrequencyEnum,
     User,
-    user_group_role_table,
 )
 from api.middlewares import get_authenticated_user
+from api.pagination import encode_cursor
+from api.serialization import construct_all, json_response
+from api.versioning import is_not_modified, make_etag, not_modified_response
 
 router = APIRouter()
 
@@ -67,27 +96,99 @@ def create_expense(
     expense: OneTimeExpenseCreate | SubscriptionExpenseCreate,
     db: Session = Depends(get_db),
     user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
 ):
-    stmt = select(user_group_role_table).where(
-        user_group_role_table.c.user_id == user.id,
-        user_group_role_table.c.group_id == group_id,
-    )
+    check_group_write_access(db, user, group_id)
 
-    result = db.execute(stmt).first()
+    new_expense = _new_expense(expense, user, group_id)
 
-    if result is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
-        )
+    db.add(new_expense)
+    record_expenses_created(db, group_id, [new_expense])
+    response = _created_expense_response(new_expense)
+    idempotency.save(response)
+    db.commit()
+
+    return response
+
+
+MAX_BULK_ITEMS = 1000
+
+expense_create_adapter = TypeAdapter(OneTimeExpenseCreate | SubscriptionExpenseCreate)
+
+
+class ExpenseBulkCreate(BaseModel):
+    expenses: list[dict[str, Any]] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: str | list[dict[str, Any]]
+
+
+class ExpenseBulkCreateResponse(BaseModel):
+    created: list[OneTimeExpenseResponse | SubscriptionExpenseResponse]
+    errors: list[BulkItemError]
+
+
+@router.post(
+    "/groups/{group_id}/expenses/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ExpenseBulkCreateResponse,
+)
+def create_expenses_bulk(
+    group_id: str,
+    bulk: ExpenseBulkCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
+):
+    check_group_write_access(db, user, group_id)
+
+    new_expenses = []
+    errors = []
+    for index, raw_expense in enumerate(bulk.expenses):
+        try:
+            expense = expense_create_adapter.validate_python(raw_expense)
+        except ValidationError as e:
+            errors.append(
+                BulkItemError(
+                    index=index,
+                    detail=jsonable_encoder(
+                        e.errors(include_url=False, include_context=False)
+                    ),
+                )
+            )
+            continue
 
-    if result[2] not in [GroupRoleEnum.ADMIN, GroupRoleEnum.MEMBER]:
+        new_expenses.append(_new_expense(expense, user, group_id))
+
+    if not new_expenses:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Insufficient privileges",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(errors),
         )
 
+    # Objects carry their primary keys, so the unit of work sends them as
+    # batched multi-row INSERTs per table, all in this one transaction
+    db.add_all(new_expenses)
+    record_expenses_created(db, group_id, new_expenses)
+    response = ExpenseBulkCreateResponse(
+        created=[_created_expense_response(expense) for expense in new_expenses],
+        errors=errors,
+    )
+    idempotency.save(response)
+    db.commit()
+
+    return response
+
+
+def _new_expense(
+    expense: OneTimeExpenseCreate | SubscriptionExpenseCreate,
+    user: User,
+    group_id: str,
+) -> OneTimeExpense | Subscription:
     if isinstance(expense, OneTimeExpenseCreate):
-        new_expense = OneTimeExpense(
+        return OneTimeExpense(
             id=str(uuid4()),
             name=expense.name,
             amount=expense.amount,
@@ -98,47 +199,45 @@ def create_expense(
             expense_type=expense.expense_type.value,
         )
 
-        db.add(new_expense)
-        db.commit()
+    return Subscription(
+        id=str(uuid4()),
+        name=expense.name,
+        amount=expense.amount,
+        category=expense.category,
+        creator=user,
+        group_id=group_id,
+        expense_type=expense.expense_type.value,
+        on_every=expense.on_every,
+        frequency=expense.frequency,
+        start_date=expense.start_date,
+        end_date=expense.end_date,
+    )
+
 
+def _created_expense_response(
+    expense: OneTimeExpense | Subscription,
+) -> OneTimeExpenseResponse | SubscriptionExpenseResponse:
+    if isinstance(expense, OneTimeExpense):
         return OneTimeExpenseResponse(
-            id=new_expense.id,
-            name=new_expense.name,
-            amount=new_expense.amount,
-            category=new_expense.category,
-            date=new_expense.date,
-            expense_type=new_expense.expense_type,
-        )
-
-    if isinstance(expense, SubscriptionExpenseCreate):
-        new_subscription = Subscription(
-            id=str(uuid4()),
+            id=expense.id,
             name=expense.name,
             amount=expense.amount,
             category=expense.category,
-            creator=user,
-            group_id=group_id,
-            expense_type=expense.expense_type.value,
-            on_every=expense.on_every,
-            frequency=expense.frequency,
-            start_date=expense.start_date,
-            end_date=expense.end_date,
+            date=expense.date,
+            expense_type=expense.expense_type,
         )
 
-        db.add(new_subscription)
-        db.commit()
-
-        return SubscriptionExpenseResponse(
-            id=new_subscription.id,
-            name=new_subscription.name,
-            amount=new_subscription.amount,
-            category=new_subscription.category,
-            expense_type=new_subscription.expense_type,
-            on_every=new_subscription.on_every,
-            frequency=new_subscription.frequency,
-            start_date=new_subscription.start_date,
-            end_date=new_subscription.end_date,
-        )
+    return SubscriptionExpenseResponse(
+        id=expense.id,
+        name=expense.name,
+        amount=expense.amount,
+        category=expense.category,
+        expense_type=expense.expense_type,
+        on_every=expense.on_every,
+        frequency=expense.frequency,
+        start_date=expense.start_date,
+        end_date=expense.end_date,
+    )
 
 
 class SubscriptionChargeResponse(BaseModel):
@@ -148,7 +247,7 @@ class SubscriptionChargeResponse(BaseModel):
 
 
 class SubscriptionWithChargesResponse(SubscriptionExpenseResponse):
-    charges: list[SubscriptionChargeResponse]
+    charges: Optional[list[SubscriptionChargeResponse]] = None
 
 
 class GroupExpenseResponse(BaseModel):
@@ -159,6 +258,7 @@ class GroupExpenseResponse(BaseModel):
     owner_id: str
     owner_name: str
     expenses: list[OneTimeExpenseResponse | SubscriptionWithChargesResponse]
+    next_cursor: Optional[str] = None
 
 
 @router.get(
@@ -168,62 +268,266 @@ class GroupExpenseResponse(BaseModel):
 )
 def get_expenses(
     group_id: str,
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "-date",
+    filters: ExpenseFilters = Depends(get_expense_filters),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    charges_limit: Optional[int] = Query(default=None, ge=0),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    etag = make_etag(request, group.id, group.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    projection = parse_projection(fields, include, charges_limit)
+    expense_sort = parse_sort(sort)
+    stmt = listing_stmt(group_id, projection, filters, expense_sort, cursor)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = next_page_cursor(rows, expense_sort)
+
+    charges_by_subscription = load_charges(db, rows, projection)
+
+    # Items only hold the projected fields, so they are encoded as they are
+    # instead of being validated against the full response model
+    return json_response(
+        {
+            "id": group.id,
+            "name": group.name,
+            "color": group.color,
+            "icon": group.icon,
+            "owner_id": group.owner_id,
+            "owner_name": group.owner.name,
+            "expenses": [
+                expense_item(row, projection, charges_by_subscription) for row in rows
+            ],
+            "next_cursor": next_cursor,
+        },
+        headers={"ETag": etag},
+    )
+
+
+class ExpenseSearchResult(BaseModel):
+    id: str
+    group_id: str
+    expense_type: ExpenseTypeEnum
+    name: str
+    category: str | None
+    amount: float
+    date: datetime.date
+    score: float
+
+
+class ExpenseSearchResponse(BaseModel):
+    results: list[ExpenseSearchResult]
+    next_cursor: Optional[str] = None
+
+
+@router.get(
+    "/expenses/search",
+    response_model=ExpenseSearchResponse,
+    status_code=status.HTTP_200_OK,
+)
+def search_expenses(
+    q: str = Query(min_length=1, max_length=200),
+    group_id: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    stmt = search_stmt(db, user.id, q, group_id, cursor)
+    rows = db.execute(stmt.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].score, rows[-1].id])
+
+    return ExpenseSearchResponse(
+        results=[
+            ExpenseSearchResult(
+                id=row.id,
+                group_id=row.group_id,
+                expense_type=row.expense_type,
+                name=row.name,
+                category=row.category,
+                amount=row.amount,
+                date=row.effective_date,
+                score=row.score,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+class ExpenseStreamFormatEnum(str, enum.Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+
+STREAM_BATCH_SIZE = 500
+
+
+@router.get("/groups/{group_id}/expenses/stream", status_code=status.HTTP_200_OK)
+def stream_expenses(
+    group_id: str,
+    format: ExpenseStreamFormatEnum = ExpenseStreamFormatEnum.NDJSON,
+    sort: str = "-date",
+    filters: ExpenseFilters = Depends(get_expense_filters),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    charges_limit: Optional[int] = Query(default=None, ge=0),
+    db: Session = Depends(get_db),
     user: User = Depends(get_authenticated_user),
 ):
-    group_link = find_first(user.group_links, lambda link: link.id == group_id)
+    get_member_group(db, user, group_id)
+
+    projection = parse_projection(fields, include, charges_limit)
+    stmt = listing_stmt(group_id, projection, filters, parse_sort(sort), None)
+
+    if format == ExpenseStreamFormatEnum.NDJSON:
+        return StreamingResponse(
+            _stream_ndjson(db, stmt, projection), media_type="application/x-ndjson"
+        )
+
+    return StreamingResponse(
+        _stream_json_array(db, stmt, projection), media_type="application/json"
+    )
 
-    if group_link is None:
+
+def _stream_expense_batches(
+    db: Session, stmt, projection: ExpenseProjection
+) -> Iterator[List[bytes]]:
+    """Yields the serialized expenses in batches of STREAM_BATCH_SIZE."""
+    for rows in iter_row_batches(db, stmt, STREAM_BATCH_SIZE):
+        charges_by_subscription = load_charges(db, rows, projection)
+        yield [
+            to_json(expense_item(row, projection, charges_by_subscription))
+            for row in rows
+        ]
+
+
+def _stream_ndjson(db: Session, stmt, projection: ExpenseProjection) -> Iterator[bytes]:
+    for batch in _stream_expense_batches(db, stmt, projection):
+        yield b"".join(line + b"\n" for line in batch)
+
+
+def _stream_json_array(
+    db: Session, stmt, projection: ExpenseProjection
+) -> Iterator[bytes]:
+    separator = b"["
+    for batch in _stream_expense_batches(db, stmt, projection):
+        yield separator + b",".join(batch)
+        separator = b","
+
+    yield b"]" if separator == b"," else b"[]"
+
+
+class ExpenseExportFormatEnum(str, enum.Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+@router.get("/groups/{group_id}/expenses/export", status_code=status.HTTP_200_OK)
+def export_expenses(
+    group_id: str,
+    format: ExpenseExportFormatEnum = ExpenseExportFormatEnum.CSV,
+    gzip: bool = False,
+    filters: ExpenseFilters = Depends(get_expense_filters),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    get_member_group(db, user, group_id)
+
+    if format == ExpenseExportFormatEnum.PARQUET and not parquet_available():
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export requires pyarrow",
         )
 
-    expense_report = []
-
-    for expense in group_link.expenses:
-        if expense.expense_type == ExpenseTypeEnum.ONE_TIME.value:
-            expense_report.append(
-                OneTimeExpenseResponse(
-                    id=expense.id,
-                    name=expense.name,
-                    amount=expense.amount,
-                    category=expense.category,
-                    date=expense.date,
-                    expense_type=expense.expense_type,
-                )
-            )
-        elif expense.expense_type == ExpenseTypeEnum.SUBSCRIPTION.value:
-            charges = [
-                SubscriptionChargeResponse(
-                    id=charge.id,
-                    amount=charge.amount,
-                    charged_date=charge.charged_date,
-                )
-                for charge in expense.charges
-            ]
-
-            expense_report.append(
-                SubscriptionWithChargesResponse(
-                    id=expense.id,
-                    name=expense.name,
-                    amount=expense.amount,
-                    category=expense.category,
-                    expense_type=expense.expense_type,
-                    on_every=expense.on_every,
-                    frequency=expense.frequency,
-                    start_date=expense.start_date,
-                    end_date=expense.end_date,
-                    charges=charges,
-                )
-            )
+    batches = iter_row_batches(db, export_stmt(group_id, filters), STREAM_BATCH_SIZE)
+    chunks = export_chunks(format.value, batches)
+
+    filename = f"expenses-{group_id}.{format.value}"
+    media_type = EXPORT_MEDIA_TYPES[format.value]
+    if gzip:
+        # Served as a .gz download rather than a Content-Encoding, so the
+        # client keeps the compressed file
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-    return GroupExpenseResponse(
-        id=group_link.id,
-        name=group_link.name,
-        color=group_link.color,
-        icon=group_link.icon,
-        owner_id=group_link.owner_id,
-        owner_name=group_link.owner.name,
-        expenses=expense_report,
+
+class FlaggedExpenseResponse(BaseModel):
+    id: str
+    name: str
+    amount: float
+    category: Optional[str]
+    date: datetime.date
+    creator_id: str
+    z_score: float
+    mean: float
+    stddev: float
+    flagged_at: datetime.datetime
+
+
+@router.get(
+    "/groups/{group_id}/expenses/flagged",
+    response_model=List[FlaggedExpenseResponse],
+)
+def get_flagged_expenses(
+    group_id: str,
+    request: Request,
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    etag = make_etag(request, group.id, group.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    stmt = (
+        select(
+            Expense.id,
+            Expense.name,
+            Expense.amount,
+            Expense.category,
+            Expense.effective_date.label("date"),
+            Expense.creator_id,
+            FlaggedExpense.z_score,
+            FlaggedExpense.mean,
+            FlaggedExpense.stddev,
+            FlaggedExpense.flagged_at,
+        )
+        .select_from(FlaggedExpense)
+        .join(Expense, Expense.id == FlaggedExpense.expense_id)
+        .where(FlaggedExpense.group_id == group_id)
+        .order_by(FlaggedExpense.flagged_at.desc(), FlaggedExpense.expense_id)
+        .limit(limit)
+    )
+
+    return json_response(
+        construct_all(FlaggedExpenseResponse, db.execute(stmt)),
+        headers={"ETag": etag},
     )
 
 
@@ -247,24 +551,9 @@ def create_subscription_charge(
     charge: SubscriptionChargeCreate,
     db: Session = Depends(get_db),
     user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
 ):
-    stmt = select(user_group_role_table).where(
-        user_group_role_table.c.user_id == user.id,
-        user_group_role_table.c.group_id == group_id,
-    )
-
-    result = db.execute(stmt).first()
-
-    if result is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
-        )
-
-    if result[2] not in [GroupRoleEnum.ADMIN, GroupRoleEnum.MEMBER]:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Insufficient privileges",
-        )
+    check_group_write_access(db, user, group_id)
 
     db_subscription = (
         db.query(Subscription)
@@ -287,10 +576,120 @@ def create_subscription_charge(
     )
 
     db.add(new_charge)
-    db.commit()
-
-    return SubscriptionChargeCreateResponse(
+    record_charges_created(db, group_id, [new_charge])
+    response = SubscriptionChargeCreateResponse(
         id=new_charge.id,
         amount=new_charge.amount,
         date=new_charge.charged_date,
     )
+    idempotency.save(response)
+    db.commit()
+
+    return response
+
+
+class SubscriptionChargeBulkItem(SubscriptionChargeCreate):
+    subscription_id: str
+
+
+class SubscriptionChargeBulkCreate(BaseModel):
+    charges: list[SubscriptionChargeBulkItem] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class SubscriptionChargeBulkItemResponse(SubscriptionChargeCreateResponse):
+    subscription_id: str
+
+
+class SubscriptionChargeBulkCreateResponse(BaseModel):
+    created: list[SubscriptionChargeBulkItemResponse]
+    errors: list[BulkItemError]
+
+
+@router.post(
+    "/groups/{group_id}/subscriptions/charges/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=SubscriptionChargeBulkCreateResponse,
+)
+def create_subscription_charges_bulk(
+    group_id: str,
+    bulk: SubscriptionChargeBulkCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
+):
+    check_group_write_access(db, user, group_id)
+
+    subscription_ids = {charge.subscription_id for charge in bulk.charges}
+    group_subscription_ids = set(
+        db.scalars(
+            select(Expense.id).where(
+                Expense.id.in_(subscription_ids),
+                Expense.group_id == group_id,
+                Expense.expense_type == ExpenseTypeEnum.SUBSCRIPTION.value,
+            )
+        )
+    )
+
+    # Narrowed down by both columns of the (subscription_id, charged_date)
+    # index, exact pairs are matched below
+    existing_charges = set(
+        db.execute(
+            select(
+                SubscriptionCharge.subscription_id, SubscriptionCharge.charged_date
+            ).where(
+                SubscriptionCharge.subscription_id.in_(group_subscription_ids),
+                SubscriptionCharge.charged_date.in_(
+                    {charge.date for charge in bulk.charges}
+                ),
+            )
+        ).tuples()
+    )
+
+    new_charges = []
+    errors = []
+    for index, charge in enumerate(bulk.charges):
+        if charge.subscription_id not in group_subscription_ids:
+            errors.append(BulkItemError(index=index, detail="Subscription not found"))
+            continue
+
+        charge_key = (charge.subscription_id, charge.date)
+        if charge_key in existing_charges:
+            errors.append(BulkItemError(index=index, detail="Duplicate charge"))
+            continue
+
+        existing_charges.add(charge_key)
+        new_charges.append(
+            SubscriptionCharge(
+                id=str(uuid4()),
+                subscription_id=charge.subscription_id,
+                charged_date=charge.date,
+                amount=charge.amount,
+                creator=user,
+            )
+        )
+
+    if not new_charges:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(errors),
+        )
+
+    # Sent through insertmanyvalues as batched multi-row INSERTs
+    db.add_all(new_charges)
+    record_charges_created(db, group_id, new_charges)
+    response = SubscriptionChargeBulkCreateResponse(
+        created=[
+            SubscriptionChargeBulkItemResponse(
+                id=new_charge.id,
+                subscription_id=new_charge.subscription_id,
+                amount=new_charge.amount,
+                date=new_charge.charged_date,
+            )
+            for new_charge in new_charges
+        ],
+        errors=errors,
+    )
+    idempotency.save(response)
+    db.commit()
+
+    return response
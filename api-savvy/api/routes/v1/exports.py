@@ -0,0 +1,148 @@
+import datetime
+from typing import Optional
+from uuid import uuid4
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.database import get_db
+from api.expense_export import (
+    EXPORT_MEDIA_TYPES,
+    expire_export,
+    is_export_expired,
+    parquet_available,
+    submit_export_job,
+)
+from api.expense_listing import ExpenseFilters
+from api.group_access import get_member_group
+from api.idempotency import Idempotency, idempotency_key
+from api.models import ExportFormatEnum, ExportJob, JobStatusEnum, User
+from api.middlewares import get_authenticated_user
+
+router = APIRouter()
+
+
+class ExportJobCreate(BaseModel):
+    format: ExportFormatEnum = ExportFormatEnum.CSV
+    filters: ExpenseFilters = Field(default_factory=ExpenseFilters)
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    group_id: str
+    format: ExportFormatEnum
+    status: JobStatusEnum
+    row_count: int
+    error: Optional[str]
+    expires_at: Optional[datetime.datetime]
+
+
+@router.post(
+    "/groups/{group_id}/exports/",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=ExportJobResponse,
+)
+def create_export(
+    group_id: str,
+    export: ExportJobCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
+):
+    get_member_group(db, user, group_id)
+
+    if export.format == ExportFormatEnum.PARQUET and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export requires pyarrow",
+        )
+
+    job = ExportJob(
+        id=str(uuid4()),
+        group_id=group_id,
+        user_id=user.id,
+        format=export.format,
+        filters=export.filters.model_dump_json(),
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+    db.add(job)
+    db.flush()
+    response = _process_export_job(job)
+    idempotency.save(response, status.HTTP_202_ACCEPTED)
+    db.commit()
+
+    submit_export_job(sessionmaker(bind=db.get_bind()), job.id)
+
+    return response
+
+
+@router.get("/groups/{group_id}/exports/{job_id}", response_model=ExportJobResponse)
+def get_export(
+    group_id: str,
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    return _process_export_job(_get_export_job(db, user, group_id, job_id))
+
+
+@router.get("/groups/{group_id}/exports/{job_id}/download")
+def download_export(
+    group_id: str,
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    job = _get_export_job(db, user, group_id, job_id)
+
+    if job.status == JobStatusEnum.EXPIRED:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Export expired")
+
+    if job.status != JobStatusEnum.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Export not ready"
+        )
+
+    # FileResponse answers Range requests and hands the file to the server's
+    # sendfile when it supports it, so the download never goes through Python
+    return FileResponse(
+        job.path,
+        media_type=EXPORT_MEDIA_TYPES[job.format.value],
+        filename=f"expenses-{group_id}.{job.format.value}",
+    )
+
+
+def _get_export_job(db: Session, user: User, group_id: str, job_id: str) -> ExportJob:
+    job = (
+        db.query(ExportJob)
+        .filter(ExportJob.id == job_id)
+        .filter(ExportJob.group_id == group_id)
+        .filter(ExportJob.user_id == user.id)
+        .first()
+    )
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Export not found"
+        )
+
+    # Expired since the last sweep, its file is deleted now rather than then
+    if job.status == JobStatusEnum.COMPLETED and is_export_expired(job):
+        expire_export(job)
+        db.commit()
+
+    return job
+
+
+def _process_export_job(job: ExportJob) -> ExportJobResponse:
+    return ExportJobResponse(
+        id=job.id,
+        group_id=job.group_id,
+        format=job.format,
+        status=job.status,
+        row_count=job.row_count,
+        error=job.error,
+        expires_at=job.expires_at,
+    )
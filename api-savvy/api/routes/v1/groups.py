@@ -1,13 +1,15 @@
 from typing import List, Optional
 from uuid import uuid4
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
 
 from pydantic import BaseModel
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from api.database import get_db
+from api.group_stats import record_member_joined
+from api.idempotency import Idempotency, idempotency_key
 from api.iterable_operations import find_first, object_is_empty
 from api.models import (
     Group,
@@ -17,6 +19,14 @@ from api.models import (
 )
 
 from api.middlewares import get_authenticated_user
+from api.serialization import construct_all, json_response
+from api.versioning import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    touch_group,
+    user_listing_version,
+)
 
 
 router = APIRouter()
@@ -35,6 +45,9 @@ class GroupResponse(BaseModel):
     icon: str | None
     owner_id: str
     owner_name: str
+    member_count: int
+    expense_count: int
+    total_spent: float
 
 
 @router.post("/groups/", status_code=201, response_model=GroupResponse)
@@ -42,6 +55,7 @@ def create_group(
     group: GroupCreate,
     db: Session = Depends(get_db),
     user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
 ):
     try:
         new_group = Group(
@@ -59,17 +73,23 @@ def create_group(
                 user_id=user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
             )
         )
+        record_member_joined(db, new_group.id, user.id)
 
-        db.commit()
-
-        return GroupResponse(
+        response = GroupResponse(
             id=new_group.id,
             name=new_group.name,
             color=new_group.color,
             icon=new_group.icon,
             owner_id=new_group.owner.id,
             owner_name=new_group.owner.name,
+            member_count=new_group.member_count,
+            expense_count=new_group.expense_count,
+            total_spent=new_group.total_spent,
         )
+        idempotency.save(response)
+        db.commit()
+
+        return response
     except Exception as e:
         db.rollback()
         print("Exception e", e)
@@ -77,45 +97,60 @@ def create_group(
 
 @router.get("/groups/", response_model=List[GroupResponse])
 def get_groups(
-    db: Session = Depends(get_db), user: User = Depends(get_authenticated_user)
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
 ):
-    user_group_links = db.query(User).filter(User.id == user.id).first().group_links
+    etag = make_etag(request, user.id, *user_listing_version(db, user))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    # One query for the groups and their owners, straight into the response
     stmt = (
-        select(user_group_role_table)
+        select(
+            Group.id,
+            Group.name,
+            Group.color,
+            Group.icon,
+            Group.owner_id,
+            User.name.label("owner_name"),
+            Group.member_count,
+            Group.expense_count,
+            Group.total_spent,
+        )
+        .join(user_group_role_table, user_group_role_table.c.group_id == Group.id)
+        .join(User, User.id == Group.owner_id)
         .where(user_group_role_table.c.user_id == user.id)
-        .join(Group)
     )
 
-    result = db.execute(stmt).all()
-
-    group_response: List[GroupResponse] = []
-    for group in user_group_links:
-        group_dict = GroupResponse(
-            id=group.id,
-            name=group.name,
-            color=group.color,
-            icon=group.icon,
-            owner_id=group.owner_id,
-            owner_name=group.owner.name,
-        )
-        group_response.append(group_dict)
-
-    return group_response
+    return json_response(
+        construct_all(GroupResponse, db.execute(stmt)), headers={"ETag": etag}
+    )
 
 
 @router.get("/groups/{group_id}", response_model=GroupResponse)
 def get_group(
     group_id: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     user: User = Depends(get_authenticated_user),
 ):
-    db_group = find_first(
-        user.group_links, lambda group_link: group_link.id == group_id
-    )
+    db_group = db.execute(
+        select(Group)
+        .join(user_group_role_table, user_group_role_table.c.group_id == Group.id)
+        .where(Group.id == group_id, user_group_role_table.c.user_id == user.id)
+        .options(joinedload(Group.owner))
+    ).scalar_one_or_none()
 
     if db_group is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
+    etag = make_etag(request, db_group.id, db_group.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+
     return GroupResponse(
         id=db_group.id,
         name=db_group.name,
@@ -123,6 +158,9 @@ def get_group(
         icon=db_group.icon,
         owner_id=db_group.owner_id,
         owner_name=db_group.owner.name,
+        member_count=db_group.member_count,
+        expense_count=db_group.expense_count,
+        total_spent=db_group.total_spent,
     )
 
 
@@ -183,6 +221,7 @@ def patch_group(
     db_group.name = group.name
     db_group.color = group.color
     db_group.icon = group.icon
+    touch_group(db, group_id, include_invitees=True)
 
     db.commit()
 
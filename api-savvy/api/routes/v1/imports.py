@@ -0,0 +1,132 @@
+import datetime
+import os
+import shutil
+import tempfile
+from typing import Optional
+from uuid import uuid4
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    UploadFile,
+    status,
+)
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, sessionmaker
+
+from api.database import get_db
+from api.group_access import check_group_write_access
+from api.models import ImportFormatEnum, ImportJob, JobStatusEnum, User
+from api.middlewares import get_authenticated_user
+from api.statement_import import CsvColumnMapping, run_import_job
+
+router = APIRouter()
+
+
+class ImportJobResponse(BaseModel):
+    id: str
+    group_id: str
+    format: ImportFormatEnum
+    status: JobStatusEnum
+    processed_rows: int
+    imported_rows: int
+    duplicate_rows: int
+    invalid_rows: int
+    skipped_rows: int
+    error: Optional[str]
+
+
+@router.post(
+    "/groups/{group_id}/imports/",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=ImportJobResponse,
+)
+def create_import(
+    group_id: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(),
+    format: ImportFormatEnum = Form(),
+    date_column: str = Form("date"),
+    amount_column: str = Form("amount"),
+    name_column: str = Form("name"),
+    category_column: Optional[str] = Form(None),
+    date_format: str = Form("%Y-%m-%d"),
+    delimiter: str = Form(","),
+    debits_negative: bool = Form(True),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    check_group_write_access(db, user, group_id)
+
+    # The upload is closed once the response is sent, so it is copied (in
+    # chunks) to a file the background job owns and deletes when done
+    file_descriptor, path = tempfile.mkstemp(prefix="savvy-import-")
+    with os.fdopen(file_descriptor, "wb") as statement:
+        shutil.copyfileobj(file.file, statement)
+
+    job = ImportJob(
+        id=str(uuid4()),
+        group_id=group_id,
+        user_id=user.id,
+        format=format,
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+    )
+    db.add(job)
+    db.commit()
+
+    mapping = CsvColumnMapping(
+        date=date_column,
+        amount=amount_column,
+        name=name_column,
+        category=category_column,
+        date_format=date_format,
+        delimiter=delimiter,
+        debits_negative=debits_negative,
+    )
+    background_tasks.add_task(
+        run_import_job, sessionmaker(bind=db.get_bind()), job.id, path, mapping
+    )
+
+    return _process_import_job(job)
+
+
+@router.get("/groups/{group_id}/imports/{job_id}", response_model=ImportJobResponse)
+def get_import(
+    group_id: str,
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    job = (
+        db.query(ImportJob)
+        .filter(ImportJob.id == job_id)
+        .filter(ImportJob.group_id == group_id)
+        .filter(ImportJob.user_id == user.id)
+        .first()
+    )
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Import not found"
+        )
+
+    return _process_import_job(job)
+
+
+def _process_import_job(job: ImportJob) -> ImportJobResponse:
+    return ImportJobResponse(
+        id=job.id,
+        group_id=job.group_id,
+        format=job.format,
+        status=job.status,
+        processed_rows=job.processed_rows,
+        imported_rows=job.imported_rows,
+        duplicate_rows=job.duplicate_rows,
+        invalid_rows=job.invalid_rows,
+        skipped_rows=job.skipped_rows,
+        error=job.error,
+    )
@@ -1,7 +1,7 @@
 import enum
-from typing import List, Optional
+from typing import Optional
 from uuid import uuid4
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from pydantic import BaseModel
 
@@ -9,8 +9,11 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from api.database import get_db
+from api.group_stats import record_member_joined
+from api.idempotency import Idempotency, idempotency_key
 from api.iterable_operations import find_first
 from api.models import (
+    Group,
     GroupInvitation,
     GroupInvitationStatusEnum,
     GroupRoleEnum,
@@ -18,6 +21,15 @@ from api.models import (
     user_group_role_table,
 )
 from api.middlewares import get_authenticated_user
+from api.serialization import construct_all, json_response
+from api.sync import record_invitation_changed
+from api.versioning import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    touch_users,
+    user_listing_version,
+)
 
 
 router = APIRouter()
@@ -42,6 +54,7 @@ def create_invitation(
     invitation: InvitationCreate,
     db: Session = Depends(get_db),
     user: User = Depends(get_authenticated_user),
+    idempotency: Idempotency = Depends(idempotency_key),
 ):
     if user.email == invitation.invitee_email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
@@ -99,9 +112,14 @@ def create_invitation(
         )
 
         db.add(db_invitation)
+        touch_users(db, [user.id, invitee_user.id])
+        record_invitation_changed(db, db_invitation)
+        db.flush()
+        response = _process_invitation(db_invitation)
+        idempotency.save(response)
         db.commit()
 
-        return _process_invitation(db_invitation)
+        return response
     except Exception as e:
         db.rollback()
         print("Exception e", e)
@@ -149,7 +167,10 @@ def rsvp_invitation(
                 user_id=user.id, group_id=invitation.group_id, role=invitation.role
             )
         )
+        record_member_joined(db, invitation.group_id, user.id)
 
+    touch_users(db, [invitation.emitter_id, invitation.invitee_id])
+    record_invitation_changed(db, invitation)
     db.commit()
 
     return _process_invitation(invitation)
@@ -180,19 +201,14 @@ def withdraw_invitation(
         )
 
     invitation.status = GroupInvitationStatusEnum.WITHDRAWN
+    touch_users(db, [invitation.emitter_id, invitation.invitee_id])
+    record_invitation_changed(db, invitation)
 
     db.commit()
 
     return _process_invitation(invitation)
 
 
-def _process_invitations(
-    invitations: List[GroupInvitation],
-) -> List[InvitationResponse]:
-    """Helper function to process a list of invitations."""
-    return [_process_invitation(invitation) for invitation in invitations]
-
-
 def _process_invitation(invitation: GroupInvitation):
     """Helper function to process a list of invitations."""
     return InvitationResponse(
@@ -204,16 +220,70 @@ def _process_invitation(invitation: GroupInvitation):
     )
 
 
+def _invitations_etag(request: Request, db: Session, user: User) -> str:
+    """Helper function to tag invitation listings with the user's version."""
+    return make_etag(request, user.id, *user_listing_version(db, user))
+
+
+def _invitations_response(db: Session, *conditions, etag: str) -> Response:
+    """Helper function to list invitations with their group name in one query."""
+    invitations = []
+    for condition in conditions:
+        stmt = (
+            select(
+                GroupInvitation.id,
+                GroupInvitation.group_id,
+                Group.name.label("group_name"),
+                GroupInvitation.role,
+                GroupInvitation.status,
+            )
+            .join(Group, Group.id == GroupInvitation.group_id)
+            .where(condition)
+        )
+        invitations.extend(construct_all(InvitationResponse, db.execute(stmt)))
+
+    return json_response(invitations, headers={"ETag": etag})
+
+
 @router.get("/groups/invitations/", response_model=list[InvitationResponse])
-def get_invitations(user: User = Depends(get_authenticated_user)):
-    return _process_invitations([*user.emitted_invitations, *user.received_invitations])
+def get_invitations(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    etag = _invitations_etag(request, db, user)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    return _invitations_response(
+        db,
+        GroupInvitation.emitter_id == user.id,
+        GroupInvitation.invitee_id == user.id,
+        etag=etag,
+    )
 
 
 @router.get("/groups/invitations/received", response_model=list[InvitationResponse])
-def get_received_invitations(user: User = Depends(get_authenticated_user)):
-    return _process_invitations(user.received_invitations)
+def get_received_invitations(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    etag = _invitations_etag(request, db, user)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    return _invitations_response(db, GroupInvitation.invitee_id == user.id, etag=etag)
 
 
 @router.get("/groups/invitations/emitted", response_model=list[InvitationResponse])
-def get_invitations(user: User = Depends(get_authenticated_user)):
-    return _process_invitations(user.emitted_invitations)
+def get_invitations(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    etag = _invitations_etag(request, db, user)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    return _invitations_response(db, GroupInvitation.emitter_id == user.id, etag=etag)
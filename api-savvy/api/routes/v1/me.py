@@ -0,0 +1,233 @@
+import datetime
+from fastapi import APIRouter, Depends, Request
+
+from pydantic import BaseModel
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from api.database import get_db
+from api.models import (
+    Expense,
+    Group,
+    GroupInvitation,
+    GroupInvitationStatusEnum,
+    GroupMonthlyRollup,
+    GroupRoleEnum,
+    Subscription,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.middlewares import get_authenticated_user
+from api.recurrence import Recurrence, project_occurrences
+from api.serialization import construct_all, json_response
+from api.versioning import (
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    user_listing_version,
+)
+
+router = APIRouter()
+
+RECENT_EXPENSES_LIMIT = 10
+UPCOMING_CHARGES_DAYS = 30
+UPCOMING_CHARGES_LIMIT = 20
+
+
+class DashboardGroup(BaseModel):
+    id: str
+    name: str
+    color: str | None
+    icon: str | None
+    role: GroupRoleEnum
+    member_count: int
+    expense_count: int
+    total_spent: float
+    month_spent: float
+
+
+class DashboardExpense(BaseModel):
+    id: str
+    group_id: str
+    group_name: str
+    name: str
+    amount: float
+    category: str | None
+    date: datetime.date
+    expense_type: str
+
+
+class DashboardInvitation(BaseModel):
+    id: str
+    group_id: str
+    group_name: str
+    emitter_name: str
+    role: GroupRoleEnum
+
+
+class UpcomingCharge(BaseModel):
+    subscription_id: str
+    group_id: str
+    name: str
+    amount: float
+    frequency: SubscriptionFrequencyEnum
+    date: datetime.date
+
+
+class DashboardResponse(BaseModel):
+    groups: list[DashboardGroup]
+    recent_expenses: list[DashboardExpense]
+    pending_invitations: list[DashboardInvitation]
+    upcoming_charges: list[UpcomingCharge]
+
+
+@router.get("/me/dashboard", response_model=DashboardResponse)
+def get_dashboard(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    today = datetime.date.today()
+
+    # The listing version covers every write to their groups and invitations,
+    # the date covers the month total and the upcoming window moving
+    etag = make_etag(request, user.id, *user_listing_version(db, user), today)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    # Four queries whatever the number of groups, each filtered on the user's
+    # memberships in SQL rather than looping over the groups
+    member_group_ids = select(user_group_role_table.c.group_id).where(
+        user_group_role_table.c.user_id == user.id
+    )
+
+    month_spent = (
+        select(
+            GroupMonthlyRollup.group_id,
+            func.sum(GroupMonthlyRollup.amount).label("month_spent"),
+        )
+        .where(
+            GroupMonthlyRollup.group_id.in_(member_group_ids),
+            GroupMonthlyRollup.month == today.replace(day=1),
+        )
+        .group_by(GroupMonthlyRollup.group_id)
+        .subquery("month_spent")
+    )
+    groups = db.execute(
+        select(
+            Group.id,
+            Group.name,
+            Group.color,
+            Group.icon,
+            user_group_role_table.c.role,
+            Group.member_count,
+            Group.expense_count,
+            Group.total_spent,
+            func.coalesce(month_spent.c.month_spent, 0.0).label("month_spent"),
+        )
+        .join(user_group_role_table, user_group_role_table.c.group_id == Group.id)
+        .outerjoin(month_spent, month_spent.c.group_id == Group.id)
+        .where(user_group_role_table.c.user_id == user.id)
+        .order_by(Group.name)
+    )
+
+    recent_expenses = db.execute(
+        select(
+            Expense.id,
+            Expense.group_id,
+            Group.name.label("group_name"),
+            Expense.name,
+            Expense.amount,
+            Expense.category,
+            Expense.effective_date.label("date"),
+            Expense.expense_type,
+        )
+        .join(Group, Group.id == Expense.group_id)
+        .where(Expense.group_id.in_(member_group_ids))
+        .order_by(Expense.effective_date.desc(), Expense.id.desc())
+        .limit(RECENT_EXPENSES_LIMIT)
+    )
+
+    pending_invitations = db.execute(
+        select(
+            GroupInvitation.id,
+            GroupInvitation.group_id,
+            Group.name.label("group_name"),
+            User.name.label("emitter_name"),
+            GroupInvitation.role,
+        )
+        .join(Group, Group.id == GroupInvitation.group_id)
+        .join(User, User.id == GroupInvitation.emitter_id)
+        .where(
+            GroupInvitation.invitee_id == user.id,
+            GroupInvitation.status == GroupInvitationStatusEnum.PENDING,
+        )
+    )
+
+    return json_response(
+        DashboardResponse.model_construct(
+            groups=construct_all(DashboardGroup, groups),
+            recent_expenses=construct_all(DashboardExpense, recent_expenses),
+            pending_invitations=construct_all(DashboardInvitation, pending_invitations),
+            upcoming_charges=_upcoming_charges(db, member_group_ids, today),
+        ),
+        headers={"ETag": etag},
+    )
+
+
+def _upcoming_charges(
+    db: Session, member_group_ids, today: datetime.date
+) -> list[UpcomingCharge]:
+    """Projects the charges of the subscriptions of the given groups due soon."""
+    to_date = today + datetime.timedelta(days=UPCOMING_CHARGES_DAYS)
+    subscriptions = {
+        subscription.id: subscription
+        for subscription in db.execute(
+            select(
+                Subscription.id,
+                Subscription.group_id,
+                Subscription.name,
+                Subscription.amount,
+                Subscription.start_date,
+                Subscription.end_date,
+                Subscription.on_every,
+                Subscription.frequency,
+            ).where(
+                Subscription.group_id.in_(member_group_ids),
+                Subscription.start_date <= to_date,
+                or_(Subscription.end_date.is_(None), Subscription.end_date >= today),
+            )
+        )
+    }
+    occurrences = project_occurrences(
+        (
+            Recurrence(
+                id=subscription.id,
+                start_date=subscription.start_date,
+                end_date=subscription.end_date,
+                on_every=subscription.on_every,
+                frequency=subscription.frequency,
+            )
+            for subscription in subscriptions.values()
+        ),
+        today,
+        to_date,
+    )
+
+    upcoming = sorted(
+        (date, subscription_id)
+        for subscription_id, dates in occurrences.items()
+        for date in dates
+    )
+    return [
+        UpcomingCharge.model_construct(
+            subscription_id=subscription_id,
+            group_id=subscriptions[subscription_id].group_id,
+            name=subscriptions[subscription_id].name,
+            amount=subscriptions[subscription_id].amount,
+            frequency=subscriptions[subscription_id].frequency,
+            date=date,
+        )
+        for date, subscription_id in upcoming[:UPCOMING_CHARGES_LIMIT]
+    ]
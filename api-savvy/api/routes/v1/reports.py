@@ -0,0 +1,412 @@
+import datetime
+import enum
+from collections import defaultdict
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from pydantic import BaseModel
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from api.analytics_cache import analytics_cache
+from api.balances import member_paid_stmt, net_positions, settle_up
+from api.database import get_db
+from api.group_access import get_member_group
+from api.models import ExpenseTypeEnum, Subscription, User
+from api.middlewares import get_authenticated_user
+from api.recurrence import Recurrence, project_occurrences
+from api.serialization import json_response
+from api.spending import (
+    bucket_count,
+    bucket_starts,
+    spending_cte,
+    summary_stmt,
+    timeseries_stmt,
+)
+from api.versioning import is_not_modified, make_etag, not_modified_response
+
+router = APIRouter()
+
+
+class SpendingTotal(BaseModel):
+    amount: float
+    count: int
+
+
+class CategoryTotal(SpendingTotal):
+    category: str | None
+
+
+class MonthTotal(SpendingTotal):
+    month: str
+
+
+class CreatorTotal(SpendingTotal):
+    creator_id: str
+    creator_name: str | None
+
+
+class ExpenseTypeTotal(SpendingTotal):
+    expense_type: ExpenseTypeEnum
+
+
+class GroupSummaryResponse(BaseModel):
+    group_id: str
+    from_date: datetime.date | None
+    to_date: datetime.date | None
+    total: SpendingTotal
+    by_category: list[CategoryTotal]
+    by_month: list[MonthTotal]
+    by_creator: list[CreatorTotal]
+    by_expense_type: list[ExpenseTypeTotal]
+
+
+@router.get("/groups/{group_id}/summary", response_model=GroupSummaryResponse)
+def get_group_summary(
+    group_id: str,
+    request: Request,
+    from_date: Optional[datetime.date] = Query(default=None, alias="from"),
+    to_date: Optional[datetime.date] = Query(default=None, alias="to"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    etag = make_etag(request, group.id, group.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    columns = analytics_cache.get(db, group)
+    if columns is not None:
+        rows = columns.summary_rows(from_date, to_date)
+    else:
+        spending = spending_cte(group_id, from_date, to_date)
+        rows = db.execute(summary_stmt(db.get_bind().dialect.name, spending))
+
+    rows_by_dimension = defaultdict(list)
+    for row in rows:
+        rows_by_dimension[row.dimension].append(row)
+
+    creator_ids = [row.key for row in rows_by_dimension["creator"]]
+    creator_names = dict(
+        db.execute(select(User.id, User.name).where(User.id.in_(creator_ids))).all()
+    )
+
+    def by_amount(rows):
+        return sorted(rows, key=lambda row: row.amount, reverse=True)
+
+    return json_response(
+        GroupSummaryResponse.model_construct(
+            group_id=group_id,
+            from_date=from_date,
+            to_date=to_date,
+            total=SpendingTotal.model_construct(
+                amount=sum(row.amount for row in rows_by_dimension["expense_type"]),
+                count=sum(row.count for row in rows_by_dimension["expense_type"]),
+            ),
+            by_category=[
+                CategoryTotal.model_construct(
+                    category=row.key, amount=row.amount, count=row.count
+                )
+                for row in by_amount(rows_by_dimension["category"])
+            ],
+            by_month=[
+                MonthTotal.model_construct(
+                    month=row.key, amount=row.amount, count=row.count
+                )
+                for row in sorted(rows_by_dimension["month"], key=lambda row: row.key)
+            ],
+            by_creator=[
+                CreatorTotal.model_construct(
+                    creator_id=row.key,
+                    creator_name=creator_names.get(row.key),
+                    amount=row.amount,
+                    count=row.count,
+                )
+                for row in by_amount(rows_by_dimension["creator"])
+            ],
+            by_expense_type=[
+                ExpenseTypeTotal.model_construct(
+                    expense_type=row.key, amount=row.amount, count=row.count
+                )
+                for row in by_amount(rows_by_dimension["expense_type"])
+            ],
+        ),
+        headers={"ETag": etag},
+    )
+
+
+class MemberBalance(BaseModel):
+    user_id: str
+    name: str
+    paid: float
+    share: float
+    # Positive when the member is owed money, negative when they owe it
+    net: float
+
+
+class SettlementResponse(BaseModel):
+    from_user_id: str
+    to_user_id: str
+    amount: float
+
+
+class GroupBalancesResponse(BaseModel):
+    group_id: str
+    balances: list[MemberBalance]
+    settlements: list[SettlementResponse]
+
+
+@router.get("/groups/{group_id}/balances", response_model=GroupBalancesResponse)
+def get_group_balances(
+    group_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    etag = make_etag(request, group.id, group.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    members = db.execute(member_paid_stmt(group_id)).all()
+    paid_cents = {member.user_id: round(member.paid * 100) for member in members}
+    positions = net_positions(paid_cents)
+
+    return json_response(
+        GroupBalancesResponse.model_construct(
+            group_id=group_id,
+            balances=[
+                MemberBalance.model_construct(
+                    user_id=member.user_id,
+                    name=member.name,
+                    paid=paid_cents[member.user_id] / 100,
+                    share=positions[member.user_id][0] / 100,
+                    net=positions[member.user_id][1] / 100,
+                )
+                for member in members
+            ],
+            settlements=[
+                SettlementResponse.model_construct(
+                    from_user_id=settlement.from_user_id,
+                    to_user_id=settlement.to_user_id,
+                    amount=settlement.amount_cents / 100,
+                )
+                for settlement in settle_up(
+                    {user_id: net for user_id, (_, net) in positions.items()}
+                )
+            ],
+        ),
+        headers={"ETag": etag},
+    )
+
+
+MAX_PROJECTION_DAYS = 5 * 366
+DEFAULT_PROJECTION_DAYS = 365
+# How far from today projections may reach
+MAX_PROJECTION_HORIZON_DAYS = 10 * 366
+
+
+class SubscriptionProjection(SpendingTotal):
+    subscription_id: str
+    name: str
+    category: str | None
+    next_date: datetime.date | None
+
+
+class ProjectedSpendResponse(BaseModel):
+    group_id: str
+    from_date: datetime.date
+    to_date: datetime.date
+    total: SpendingTotal
+    by_month: list[MonthTotal]
+    by_subscription: list[SubscriptionProjection]
+
+
+@router.get("/groups/{group_id}/projection", response_model=ProjectedSpendResponse)
+def get_group_projection(
+    group_id: str,
+    request: Request,
+    from_date: Optional[datetime.date] = Query(default=None, alias="from"),
+    to_date: Optional[datetime.date] = Query(default=None, alias="to"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    today = datetime.date.today()
+    from_date = from_date or today
+    horizon = today + datetime.timedelta(days=MAX_PROJECTION_HORIZON_DAYS)
+    if from_date > horizon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid projection range"
+        )
+
+    to_date = to_date or from_date + datetime.timedelta(days=DEFAULT_PROJECTION_DAYS)
+    if to_date > horizon or not 0 <= (to_date - from_date).days <= MAX_PROJECTION_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid projection range"
+        )
+
+    # The defaults move with the current date, so the range is part of the tag
+    etag = make_etag(request, group.id, group.version, from_date, to_date)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    subscriptions = db.execute(
+        select(
+            Subscription.id,
+            Subscription.name,
+            Subscription.category,
+            Subscription.amount,
+            Subscription.start_date,
+            Subscription.end_date,
+            Subscription.on_every,
+            Subscription.frequency,
+        ).where(
+            Subscription.group_id == group_id,
+            Subscription.start_date <= to_date,
+            or_(Subscription.end_date.is_(None), Subscription.end_date >= from_date),
+        )
+    ).all()
+    occurrences = project_occurrences(
+        (
+            Recurrence(
+                id=subscription.id,
+                start_date=subscription.start_date,
+                end_date=subscription.end_date,
+                on_every=subscription.on_every,
+                frequency=subscription.frequency,
+            )
+            for subscription in subscriptions
+        ),
+        from_date,
+        to_date,
+    )
+
+    by_subscription = []
+    by_month = defaultdict(lambda: [0.0, 0])
+    for subscription in subscriptions:
+        dates = occurrences[subscription.id]
+        by_subscription.append(
+            SubscriptionProjection.model_construct(
+                subscription_id=subscription.id,
+                name=subscription.name,
+                category=subscription.category,
+                amount=subscription.amount * len(dates),
+                count=len(dates),
+                next_date=dates[0] if dates else None,
+            )
+        )
+        for date in dates:
+            month = by_month[date.strftime("%Y-%m")]
+            month[0] += subscription.amount
+            month[1] += 1
+
+    return json_response(
+        ProjectedSpendResponse.model_construct(
+            group_id=group_id,
+            from_date=from_date,
+            to_date=to_date,
+            total=SpendingTotal.model_construct(
+                amount=sum(item.amount for item in by_subscription),
+                count=sum(item.count for item in by_subscription),
+            ),
+            by_month=[
+                MonthTotal.model_construct(month=month, amount=amount, count=count)
+                for month, (amount, count) in sorted(by_month.items())
+            ],
+            by_subscription=sorted(
+                by_subscription, key=lambda item: item.amount, reverse=True
+            ),
+        ),
+        headers={"ETag": etag},
+    )
+
+
+class TimeseriesBucketEnum(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+# Range covered when no start date is given
+DEFAULT_TIMESERIES_DAYS = {
+    TimeseriesBucketEnum.DAY: 30,
+    TimeseriesBucketEnum.WEEK: 12 * 7,
+    TimeseriesBucketEnum.MONTH: 365,
+}
+MAX_TIMESERIES_BUCKETS = 1000
+
+
+class TimeseriesResponse(BaseModel):
+    group_id: str
+    bucket: TimeseriesBucketEnum
+    from_date: datetime.date
+    to_date: datetime.date
+    # Parallel arrays, one entry per bucket including the empty ones
+    starts: list[datetime.date]
+    amounts: list[float]
+    counts: list[int]
+
+
+@router.get("/groups/{group_id}/timeseries", response_model=TimeseriesResponse)
+def get_group_timeseries(
+    group_id: str,
+    request: Request,
+    bucket: TimeseriesBucketEnum = TimeseriesBucketEnum.DAY,
+    from_date: Optional[datetime.date] = Query(default=None, alias="from"),
+    to_date: Optional[datetime.date] = Query(default=None, alias="to"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    group = get_member_group(db, user, group_id)
+
+    to_date = to_date or datetime.date.today()
+    # Clamped, as the default range may start before the first representable date
+    from_date = from_date or datetime.date.fromordinal(
+        max(to_date.toordinal() - DEFAULT_TIMESERIES_DAYS[bucket], 1)
+    )
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid date range"
+        )
+
+    # Counted before listing them, so huge ranges are rejected without work
+    if bucket_count(bucket.value, from_date, to_date) > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Too many buckets"
+        )
+    starts = bucket_starts(bucket.value, from_date, to_date)
+
+    # The defaults move with the current date, so the range is part of the tag
+    etag = make_etag(request, group.id, group.version, from_date, to_date)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    columns = analytics_cache.get(db, group)
+    if columns is not None:
+        rows = columns.timeseries_rows(bucket.value, from_date, to_date)
+    else:
+        spending = spending_cte(group_id, from_date, to_date)
+        rows = db.execute(
+            timeseries_stmt(db.get_bind().dialect.name, spending, bucket.value)
+        )
+    totals = {row.start: row for row in rows}
+
+    return json_response(
+        TimeseriesResponse.model_construct(
+            group_id=group_id,
+            bucket=bucket,
+            from_date=from_date,
+            to_date=to_date,
+            starts=starts,
+            amounts=[
+                totals[start].amount if start in totals else 0.0 for start in starts
+            ],
+            counts=[totals[start].count if start in totals else 0 for start in starts],
+        ),
+        headers={"ETag": etag},
+    )
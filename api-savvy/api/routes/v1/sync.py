@@ -0,0 +1,187 @@
+import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from pydantic import BaseModel
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, with_polymorphic
+
+from api.database import get_db
+from api.models import (
+    ChangeEntityEnum,
+    ChangeOperationEnum,
+    Expense,
+    Group,
+    GroupInvitation,
+    OneTimeExpense,
+    SubscriptionCharge,
+    User,
+)
+from api.middlewares import get_authenticated_user
+from api.pagination import decode_cursor, encode_cursor
+from api.routes.v1.expenses import OneTimeExpenseResponse, SubscriptionExpenseResponse
+from api.routes.v1.groups import GroupResponse
+from api.routes.v1.invitations import InvitationResponse
+from api.serialization import json_response
+from api.sync import changed_ids, read_changes
+
+router = APIRouter()
+
+
+class SyncOneTimeExpense(OneTimeExpenseResponse):
+    group_id: str
+
+
+class SyncSubscriptionExpense(SubscriptionExpenseResponse):
+    group_id: str
+
+
+class SyncSubscriptionCharge(BaseModel):
+    id: str
+    subscription_id: str
+    amount: float
+    charged_date: datetime.date
+
+
+class SyncDeletion(BaseModel):
+    entity: ChangeEntityEnum
+    id: str
+
+
+class SyncResponse(BaseModel):
+    groups: list[GroupResponse]
+    expenses: list[SyncOneTimeExpense | SyncSubscriptionExpense]
+    subscription_charges: list[SyncSubscriptionCharge]
+    invitations: list[InvitationResponse]
+    # Groups the user joined, to fetch in full as their earlier changes
+    # are not part of the sync
+    resync_groups: list[str]
+    deleted: list[SyncDeletion]
+    cursor: str
+    has_more: bool
+
+
+@router.get("/sync", response_model=SyncResponse)
+def sync(
+    since: Optional[str] = None,
+    limit: int = Query(default=1000, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_authenticated_user),
+):
+    since_position = (0, 0)
+    if since is not None:
+        since_position = tuple(decode_cursor(since, 2))
+        if not all(
+            isinstance(value, int) and not isinstance(value, bool)
+            for value in since_position
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    operations, position, has_more = read_changes(db, user.id, since_position, limit)
+
+    groups = db.scalars(
+        select(Group)
+        .where(Group.id.in_(changed_ids(operations, ChangeEntityEnum.GROUP)))
+        .options(joinedload(Group.owner))
+    ).all()
+
+    any_expense = with_polymorphic(Expense, "*")
+    expenses = db.scalars(
+        select(any_expense).where(
+            any_expense.id.in_(changed_ids(operations, ChangeEntityEnum.EXPENSE))
+        )
+    ).all()
+
+    charges = db.scalars(
+        select(SubscriptionCharge).where(
+            SubscriptionCharge.id.in_(
+                changed_ids(operations, ChangeEntityEnum.SUBSCRIPTION_CHARGE)
+            )
+        )
+    ).all()
+
+    invitations = db.scalars(
+        select(GroupInvitation)
+        .where(
+            GroupInvitation.id.in_(changed_ids(operations, ChangeEntityEnum.INVITATION))
+        )
+        .options(joinedload(GroupInvitation.group))
+    ).all()
+
+    return json_response(
+        SyncResponse.model_construct(
+            groups=[
+                GroupResponse.model_construct(
+                    id=group.id,
+                    name=group.name,
+                    color=group.color,
+                    icon=group.icon,
+                    owner_id=group.owner_id,
+                    owner_name=group.owner.name,
+                    member_count=group.member_count,
+                    expense_count=group.expense_count,
+                    total_spent=group.total_spent,
+                )
+                for group in groups
+            ],
+            expenses=[_process_sync_expense(expense) for expense in expenses],
+            subscription_charges=[
+                SyncSubscriptionCharge.model_construct(
+                    id=charge.id,
+                    subscription_id=charge.subscription_id,
+                    amount=charge.amount,
+                    charged_date=charge.charged_date,
+                )
+                for charge in charges
+            ],
+            invitations=[
+                InvitationResponse.model_construct(
+                    id=invitation.id,
+                    group_id=invitation.group_id,
+                    group_name=invitation.group.name,
+                    role=invitation.role,
+                    status=invitation.status,
+                )
+                for invitation in invitations
+            ],
+            resync_groups=changed_ids(operations, ChangeEntityEnum.MEMBERSHIP),
+            deleted=[
+                SyncDeletion.model_construct(entity=entity, id=entity_id)
+                for (entity, entity_id), operation in operations.items()
+                if operation == ChangeOperationEnum.DELETE
+            ],
+            cursor=encode_cursor(list(position)),
+            has_more=has_more,
+        )
+    )
+
+
+def _process_sync_expense(
+    expense: Expense,
+) -> SyncOneTimeExpense | SyncSubscriptionExpense:
+    if isinstance(expense, OneTimeExpense):
+        return SyncOneTimeExpense.model_construct(
+            id=expense.id,
+            group_id=expense.group_id,
+            name=expense.name,
+            amount=expense.amount,
+            category=expense.category,
+            date=expense.date,
+            expense_type=expense.expense_type,
+        )
+
+    return SyncSubscriptionExpense.model_construct(
+        id=expense.id,
+        group_id=expense.group_id,
+        name=expense.name,
+        amount=expense.amount,
+        category=expense.category,
+        expense_type=expense.expense_type,
+        on_every=expense.on_every,
+        frequency=expense.frequency,
+        start_date=expense.start_date,
+        end_date=expense.end_date,
+    )
@@ -0,0 +1,217 @@
+"""
+Upgrades a database created by an earlier version of the models in place.
+
+Base.metadata.create_all only creates missing tables, it never alters the
+existing ones. Run `python -m api.commands upgrade-schema` once after
+deploying a version adding columns or indexes to existing tables.
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import Column, func, inspect, literal, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from api.database import Base
+from api.group_stats import reconcile_group_stats
+from api.models import (
+    EXPENSE_SEARCH_DDL,
+    Expense,
+    OneTimeExpense,
+    Subscription,
+    expense_content_hash,
+)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _column_default(connection: Connection, column: Column) -> Optional[str]:
+    if column.server_default is not None:
+        return column.server_default.arg
+
+    if column.default is not None and column.default.is_scalar:
+        return str(
+            literal(column.default.arg).compile(
+                dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+            )
+        )
+
+    return None
+
+
+def _column_ddl(connection: Connection, column: Column) -> str:
+    ddl = f"{column.name} {column.type.compile(dialect=connection.dialect)}"
+
+    # Without a default the existing rows have nothing to hold, the column
+    # is added nullable and made NOT NULL once backfilled
+    default = _column_default(connection, column)
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+
+    return ddl
+
+
+def add_missing_columns(connection: Connection) -> List[Column]:
+    """
+    Adds the columns of the models missing from their existing tables.
+
+    Args:
+        connection: The connection to alter the tables with.
+
+    Returns:
+        The columns added.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {_column_ddl(connection, column)}"
+                    )
+                )
+                added.append(column)
+
+    return added
+
+
+def add_missing_indexes(connection: Connection) -> int:
+    """
+    Creates the indexes of the models missing from their tables, including
+    the search indexes of the expenses.
+
+    Args:
+        connection: The connection to create the indexes with.
+
+    Returns:
+        The number of model indexes created, the search ones aside.
+    """
+    inspector = inspect(connection)
+
+    created = 0
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                created += 1
+
+    dialect = connection.dialect.name
+    for statement in EXPENSE_SEARCH_DDL.get(dialect, ()):
+        connection.execute(text(statement))
+    if dialect == "sqlite":
+        # The FTS table only indexes the rows written since its triggers exist
+        connection.execute(
+            text("INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')")
+        )
+
+    return created
+
+
+def backfill_expenses(db: Session) -> int:
+    """
+    Fills the effective date and content hash of expenses written before
+    they existed.
+
+    Args:
+        db: The session to update with. The caller commits.
+
+    Returns:
+        The number of one-time expenses hashed.
+    """
+    expenses = Expense.__table__
+    one_time_expenses = OneTimeExpense.__table__
+    subscriptions = Subscription.__table__
+
+    db.execute(
+        update(expenses)
+        .where(expenses.c.effective_date.is_(None))
+        .values(
+            effective_date=func.coalesce(
+                select(one_time_expenses.c.date)
+                .where(one_time_expenses.c.id == expenses.c.id)
+                .scalar_subquery(),
+                select(subscriptions.c.start_date)
+                .where(subscriptions.c.id == expenses.c.id)
+                .scalar_subquery(),
+            )
+        )
+    )
+
+    # Hashed in Python, as expense_content_hash is, in batches to bound memory
+    hashed = 0
+    while True:
+        rows = db.execute(
+            select(
+                expenses.c.id,
+                expenses.c.group_id,
+                expenses.c.amount,
+                expenses.c.name,
+                one_time_expenses.c.date,
+            )
+            .join(one_time_expenses, one_time_expenses.c.id == expenses.c.id)
+            .where(expenses.c.content_hash.is_(None))
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return hashed
+
+        for row in rows:
+            db.execute(
+                update(expenses)
+                .where(expenses.c.id == row.id)
+                .values(
+                    content_hash=expense_content_hash(
+                        row.group_id, row.date, row.amount, row.name
+                    )
+                )
+            )
+        hashed += len(rows)
+
+
+def upgrade_schema(db: Session) -> List[str]:
+    """
+    Brings the schema of an existing database up to the models and backfills
+    the data derived from existing rows.
+
+    Creates the missing tables, columns and indexes, fills the expense
+    effective dates and content hashes, then recomputes the group counters.
+    Safe to run again. The monthly rollups and category statistics are
+    rebuilt per group afterwards, see api.commands.
+
+    Args:
+        db: The session to upgrade with. The caller commits.
+
+    Returns:
+        The columns added, as table.column.
+    """
+    connection = db.connection()
+    Base.metadata.create_all(connection)
+    added = add_missing_columns(connection)
+    add_missing_indexes(connection)
+
+    backfill_expenses(db)
+
+    if connection.dialect.name == "postgresql":
+        for column in added:
+            if not column.nullable and _column_default(connection, column) is None:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {column.table.name} "
+                        f"ALTER COLUMN {column.name} SET NOT NULL"
+                    )
+                )
+
+    reconcile_group_stats(db)
+
+    return [f"{column.table.name}.{column.name}" for column in added]
@@ -0,0 +1,196 @@
+import datetime
+from typing import List, Optional
+
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Date,
+    Select,
+    func,
+    literal,
+    select,
+    union_all,
+)
+
+from api.models import (
+    Expense,
+    ExpenseTypeEnum,
+    SubscriptionCharge,
+)
+
+expenses_table = Expense.__table__
+subscription_charges_table = SubscriptionCharge.__table__
+
+
+def spending_cte(
+    group_id: str,
+    from_date: Optional[datetime.date] = None,
+    to_date: Optional[datetime.date] = None,
+) -> CTE:
+    """
+    Builds the money actually spent by a group, one row per payment.
+
+    Payments are the one-time expenses plus the charges of subscriptions,
+    which take their category from the subscription. Subscriptions themselves
+    are not payments. Each branch is filtered on its own date index before the
+    union.
+
+    Args:
+        group_id: The group whose spending is selected.
+        from_date: First day of the range, unbounded if None.
+        to_date: Last day of the range, unbounded if None.
+
+    Returns:
+        A CTE with the id, amount, date, category, creator_id and
+        expense_type of each payment.
+    """
+    one_time = select(
+        expenses_table.c.id,
+        expenses_table.c.amount,
+        expenses_table.c.effective_date.label("date"),
+        expenses_table.c.category,
+        expenses_table.c.creator_id,
+        expenses_table.c.expense_type,
+    ).where(
+        expenses_table.c.group_id == group_id,
+        expenses_table.c.expense_type == ExpenseTypeEnum.ONE_TIME.value,
+    )
+
+    charges = (
+        select(
+            subscription_charges_table.c.id,
+            subscription_charges_table.c.amount,
+            subscription_charges_table.c.charged_date.label("date"),
+            expenses_table.c.category,
+            subscription_charges_table.c.creator_id,
+            expenses_table.c.expense_type,
+        )
+        .join(
+            expenses_table,
+            expenses_table.c.id == subscription_charges_table.c.subscription_id,
+        )
+        .where(expenses_table.c.group_id == group_id)
+    )
+
+    if from_date is not None:
+        one_time = one_time.where(expenses_table.c.effective_date >= from_date)
+        charges = charges.where(subscription_charges_table.c.charged_date >= from_date)
+
+    if to_date is not None:
+        one_time = one_time.where(expenses_table.c.effective_date <= to_date)
+        charges = charges.where(subscription_charges_table.c.charged_date <= to_date)
+
+    return union_all(one_time, charges).cte("spending")
+
+
+def bucket_start(dialect_name: str, bucket: str, date: ColumnElement) -> ColumnElement:
+    """
+    Truncates a date column to the first day of its bucket in the given SQL dialect.
+
+    Args:
+        dialect_name: The dialect the statement is compiled for.
+        bucket: "day", "week" (starting on Monday) or "month".
+        date: The date column to truncate.
+    """
+    if dialect_name == "postgresql":
+        return func.cast(func.date_trunc(bucket, date), Date)
+
+    if bucket == "week":
+        # The Monday on or before the date
+        return func.date(date, "-6 days", "weekday 1", type_=Date)
+    if bucket == "month":
+        return func.date(date, "start of month", type_=Date)
+    return func.date(date, type_=Date)
+
+
+def bucket_count(bucket: str, from_date: datetime.date, to_date: datetime.date) -> int:
+    """Counts the buckets bucket_starts lists for a range, without listing them."""
+    if bucket == "month":
+        return (
+            (to_date.year - from_date.year) * 12 + to_date.month - from_date.month + 1
+        )
+
+    if bucket == "week":
+        from_date -= datetime.timedelta(days=from_date.weekday())
+        return (to_date - from_date).days // 7 + 1
+
+    return (to_date - from_date).days + 1
+
+
+def bucket_starts(
+    bucket: str, from_date: datetime.date, to_date: datetime.date
+) -> List[datetime.date]:
+    """
+    Lists the first day of every bucket overlapping a date range, in order.
+
+    Matches bucket_start, so buckets without any payment can be filled in.
+    """
+    if bucket == "month":
+        first_month = from_date.year * 12 + from_date.month - 1
+        return [
+            datetime.date(month // 12, month % 12 + 1, 1)
+            for month in range(
+                first_month, first_month + bucket_count(bucket, from_date, to_date)
+            )
+        ]
+
+    start, step = from_date, 1
+    if bucket == "week":
+        start, step = from_date - datetime.timedelta(days=from_date.weekday()), 7
+    return [
+        start + datetime.timedelta(days=offset)
+        for offset in range(0, (to_date - start).days + 1, step)
+    ]
+
+
+def timeseries_stmt(dialect_name: str, spending: CTE, bucket: str) -> Select:
+    """Builds the total and number of payments of the spending per bucket."""
+    start = bucket_start(dialect_name, bucket, spending.c.date)
+    return (
+        select(
+            start.label("start"),
+            func.sum(spending.c.amount).label("amount"),
+            func.count().label("count"),
+        )
+        .group_by(start)
+        .order_by(start)
+    )
+
+
+def month_bucket(dialect_name: str, date: ColumnElement) -> ColumnElement:
+    """Truncates a date column to its "YYYY-MM" month in the given SQL dialect."""
+    if dialect_name == "postgresql":
+        return func.to_char(date, "YYYY-MM")
+
+    return func.strftime("%Y-%m", date)
+
+
+SUMMARY_DIMENSIONS = ["category", "month", "creator", "expense_type"]
+
+
+def summary_stmt(dialect_name: str, spending: CTE) -> Select:
+    """
+    Builds the totals of the spending along each of the SUMMARY_DIMENSIONS.
+
+    Every dimension is its own GROUP BY over the spending CTE, all sent as a
+    single UNION ALL query. The result has one row per (dimension, key),
+    whatever the number of payments.
+    """
+    keys = {
+        "category": spending.c.category,
+        "month": month_bucket(dialect_name, spending.c.date),
+        "creator": spending.c.creator_id,
+        "expense_type": spending.c.expense_type,
+    }
+
+    return union_all(
+        *(
+            select(
+                literal(dimension).label("dimension"),
+                key.label("key"),
+                func.sum(spending.c.amount).label("amount"),
+                func.count().label("count"),
+            ).group_by(key)
+            for dimension, key in keys.items()
+        )
+    )
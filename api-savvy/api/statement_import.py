@@ -0,0 +1,313 @@
+import csv
+import datetime
+import io
+import os
+import re
+from itertools import islice
+from typing import BinaryIO, Callable, Iterator, List, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from api.group_stats import record_expenses_created
+from api.models import (
+    Expense,
+    ExpenseTypeEnum,
+    ImportFormatEnum,
+    ImportJob,
+    JobStatusEnum,
+    OneTimeExpense,
+    expense_content_hash,
+)
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+class CsvColumnMapping(BaseModel):
+    date: str = "date"
+    amount: str = "amount"
+    name: str = "name"
+    category: Optional[str] = None
+    date_format: str = "%Y-%m-%d"
+    delimiter: str = ","
+    # Whether debits are the negative amounts, as in bank statements and OFX,
+    # or the positive ones, as in lists of expenses. The other rows are
+    # credits, skipped like OFX credits.
+    debits_negative: bool = True
+
+
+class ImportedExpense(BaseModel):
+    date: datetime.date
+    amount: float
+    name: str
+    category: Optional[str] = None
+
+
+class InvalidRow(BaseModel):
+    reason: str
+
+
+class SkippedRow(BaseModel):
+    """A valid row that is not an expense, e.g. a credit."""
+
+    reason: str
+
+
+def _debit_amount(amount: float, debits_negative: bool = True) -> Optional[float]:
+    """The expense amount of a debit, or None for credits and zero amounts."""
+    if debits_negative:
+        amount = -amount
+    return amount if amount > 0 else None
+
+
+def parse_csv(
+    stream: BinaryIO, mapping: CsvColumnMapping
+) -> Iterator[ImportedExpense | InvalidRow | SkippedRow]:
+    """
+    Lazily parses the debits of a CSV statement into expenses.
+
+    Args:
+        stream: The binary file holding the statement.
+        mapping: Which columns hold each expense field, and the sign of debits.
+
+    Yields:
+        One expense per debit row, a SkippedRow for credits, or an InvalidRow
+        for rows that cannot be mapped.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text, delimiter=mapping.delimiter):
+        try:
+            name = (row.get(mapping.name) or "").strip()
+            if not name:
+                raise ValueError("Missing name")
+
+            date = datetime.datetime.strptime(
+                row[mapping.date].strip(), mapping.date_format
+            ).date()
+            amount = _debit_amount(
+                float(row[mapping.amount].replace(",", "")), mapping.debits_negative
+            )
+            if amount is None:
+                yield SkippedRow(reason="Not a debit")
+                continue
+
+            category = row.get(mapping.category) if mapping.category else None
+            yield ImportedExpense(
+                date=date,
+                amount=amount,
+                name=name,
+                category=(category.strip() or None) if category else None,
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            yield InvalidRow(reason=str(e))
+
+
+OFX_TAG = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+
+
+def parse_ofx(
+    stream: BinaryIO,
+) -> Iterator[ImportedExpense | InvalidRow | SkippedRow]:
+    """
+    Lazily parses the debit transactions of an OFX statement into expenses.
+
+    Handles both the SGML (unclosed tags) and XML flavours of OFX, reading the
+    file line by line.
+
+    Args:
+        stream: The binary file holding the statement.
+
+    Yields:
+        One expense per debit transaction, a SkippedRow for credits, or an
+        InvalidRow for transactions missing a date or amount.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+    transaction = None
+    for line in text:
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    transaction = {}
+                elif transaction is not None:
+                    yield _ofx_transaction(transaction)
+                    transaction = None
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+
+
+def _ofx_transaction(transaction: dict) -> ImportedExpense | InvalidRow | SkippedRow:
+    try:
+        amount = _debit_amount(float(transaction["TRNAMT"]))
+        if amount is None:
+            # Credits are income, not expenses
+            return SkippedRow(reason="Not a debit")
+
+        return ImportedExpense(
+            date=datetime.datetime.strptime(
+                transaction["DTPOSTED"][:8], "%Y%m%d"
+            ).date(),
+            amount=amount,
+            name=transaction.get("NAME") or transaction.get("MEMO") or "Unknown",
+        )
+    except (KeyError, ValueError) as e:
+        return InvalidRow(reason=str(e))
+
+
+def run_import_job(
+    session_factory: Callable[[], Session],
+    job_id: str,
+    path: str,
+    mapping: CsvColumnMapping,
+):
+    """
+    Imports a statement stored at path into the group of the job.
+
+    Rows are parsed lazily and loaded in chunks of IMPORT_CHUNK_SIZE, each in
+    its own transaction that also records the job progress, so memory stays
+    constant and clients can poll the job while it runs. Rows whose content
+    hash already exists in the group are counted as duplicates and skipped.
+
+    Args:
+        session_factory: Creates the session the job runs with.
+        job_id: The ImportJob to run.
+        path: The uploaded statement, deleted once the job ends.
+        mapping: The column mapping, for CSV statements.
+    """
+    db = session_factory()
+    try:
+        job = db.get(ImportJob, job_id)
+        job.status = JobStatusEnum.RUNNING
+        db.commit()
+
+        with open(path, "rb") as stream:
+            if job.format == ImportFormatEnum.OFX:
+                rows = parse_ofx(stream)
+            else:
+                rows = parse_csv(stream, mapping)
+
+            while chunk := list(islice(rows, IMPORT_CHUNK_SIZE)):
+                _import_chunk(db, job, chunk)
+                db.commit()
+
+        job.status = JobStatusEnum.COMPLETED
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job = db.get(ImportJob, job_id)
+        if job is not None:
+            job.status = JobStatusEnum.FAILED
+            job.error = str(e)
+            db.commit()
+    finally:
+        db.close()
+        os.remove(path)
+
+
+def _import_chunk(
+    db: Session,
+    job: ImportJob,
+    chunk: List[ImportedExpense | InvalidRow | SkippedRow],
+):
+    new_expenses = []
+    content_hashes = set()
+    for row in chunk:
+        if isinstance(row, (InvalidRow, SkippedRow)):
+            continue
+
+        content_hash = expense_content_hash(
+            job.group_id, row.date, row.amount, row.name
+        )
+        if content_hash in content_hashes:
+            continue
+
+        content_hashes.add(content_hash)
+        new_expenses.append(
+            OneTimeExpense(
+                id=str(uuid4()),
+                name=row.name,
+                amount=row.amount,
+                category=row.category,
+                date=row.date,
+                effective_date=row.date,
+                content_hash=content_hash,
+                creator_id=job.user_id,
+                group_id=job.group_id,
+                expense_type=ExpenseTypeEnum.ONE_TIME.value,
+            )
+        )
+
+    existing_hashes = set(
+        db.scalars(
+            select(Expense.content_hash).where(
+                Expense.group_id == job.group_id,
+                Expense.content_hash.in_(content_hashes),
+            )
+        )
+    )
+    new_expenses = [
+        expense
+        for expense in new_expenses
+        if expense.content_hash not in existing_hashes
+    ]
+
+    if new_expenses:
+        _bulk_load(db, new_expenses)
+        record_expenses_created(db, job.group_id, new_expenses)
+
+    invalid_rows = sum(1 for row in chunk if isinstance(row, InvalidRow))
+    skipped_rows = sum(1 for row in chunk if isinstance(row, SkippedRow))
+    job.processed_rows += len(chunk)
+    job.invalid_rows += invalid_rows
+    job.skipped_rows += skipped_rows
+    job.imported_rows += len(new_expenses)
+    job.duplicate_rows += len(chunk) - invalid_rows - skipped_rows - len(new_expenses)
+
+
+EXPENSE_COPY_COLUMNS = [
+    "id",
+    "name",
+    "amount",
+    "category",
+    "creator_id",
+    "group_id",
+    "effective_date",
+    "content_hash",
+    "expense_type",
+]
+
+
+def _bulk_load(db: Session, expenses: List[OneTimeExpense]):
+    """Loads the expenses with COPY on Postgres and batched INSERTs elsewhere."""
+    if db.get_bind().dialect.name != "postgresql":
+        db.add_all(expenses)
+        db.flush()
+        return
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY expenses ({', '.join(EXPENSE_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            _csv_buffer(
+                [getattr(expense, column) for column in EXPENSE_COPY_COLUMNS]
+                for expense in expenses
+            ),
+        )
+        cursor.copy_expert(
+            "COPY one_time_expenses (id, date) FROM STDIN WITH (FORMAT csv)",
+            _csv_buffer([expense.id, expense.date] for expense in expenses),
+        )
+    finally:
+        cursor.close()
+
+
+def _csv_buffer(rows) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # Unquoted empty fields are read as NULL by COPY
+        writer.writerow(["" if value is None else value for value in row])
+    buffer.seek(0)
+    return buffer
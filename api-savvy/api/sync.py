@@ -0,0 +1,196 @@
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import ColumnElement, func, insert, literal, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from api.models import (
+    Change,
+    ChangeEntityEnum,
+    ChangeOperationEnum,
+    GroupInvitation,
+    user_group_role_table,
+)
+
+changes_table = Change.__table__
+
+# Position in the change log, the (txid, seq) of the last change read
+ChangePosition = Tuple[int, int]
+CHANGE_LOG_ORDER = (Change.txid, Change.seq)
+
+
+def record_changes(
+    db: Session,
+    entity: ChangeEntityEnum,
+    entity_ids: Iterable[str],
+    group_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    operation: ChangeOperationEnum = ChangeOperationEnum.UPSERT,
+):
+    """
+    Appends entries to the change log read by the sync endpoint.
+
+    Args:
+        db: The session the change is being written with.
+        entity: The kind of row that changed.
+        entity_ids: The rows that changed.
+        group_id: Makes the changes visible to the members of this group.
+        user_id: Makes the changes visible to this user.
+        operation: Whether the rows were created/updated or deleted.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows = [
+        {
+            "entity": entity,
+            "entity_id": entity_id,
+            "operation": operation,
+            "group_id": group_id,
+            "user_id": user_id,
+            "changed_at": now,
+        }
+        for entity_id in entity_ids
+    ]
+    if not rows:
+        return
+
+    db.execute(insert(Change).values(**_txid_values(db)), rows)
+
+
+def record_invitation_changed(db: Session, invitation: GroupInvitation):
+    """
+    Logs a change to an invitation, visible to its emitter and invitee.
+
+    Args:
+        db: The session the invitation is being written with.
+        invitation: The invitation that changed.
+    """
+    for user_id in {invitation.emitter_id, invitation.invitee_id}:
+        record_changes(
+            db, ChangeEntityEnum.INVITATION, [invitation.id], user_id=user_id
+        )
+
+
+def record_group_invitations_changed(db: Session, group_id: str):
+    """
+    Logs a change to every invitation to a group, e.g. when the group is renamed.
+
+    Args:
+        db: The session the group is being written with.
+        group_id: The group whose invitations changed.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    txid_values = _txid_values(db)
+    for user_column in (GroupInvitation.emitter_id, GroupInvitation.invitee_id):
+        db.execute(
+            insert(Change).from_select(
+                [
+                    "entity",
+                    "entity_id",
+                    "operation",
+                    "user_id",
+                    "changed_at",
+                    *txid_values,
+                ],
+                select(
+                    literal(ChangeEntityEnum.INVITATION, changes_table.c.entity.type),
+                    GroupInvitation.id,
+                    literal(ChangeOperationEnum.UPSERT, changes_table.c.operation.type),
+                    user_column,
+                    literal(now, changes_table.c.changed_at.type),
+                    *txid_values.values(),
+                ).where(GroupInvitation.group_id == group_id),
+            )
+        )
+
+
+def _txid_values(db: Session) -> Dict[str, ColumnElement]:
+    if db.get_bind().dialect.name == "postgresql":
+        return {"txid": func.txid_current()}
+    return {}
+
+
+def change_log_horizon(db: Session) -> Optional[int]:
+    """
+    The oldest transaction still running, on Postgres.
+
+    Sequence values are handed out at insert time but become visible at
+    commit time, so seq 11 can be read before seq 10 commits. Every
+    transaction below the horizon has committed or rolled back though, so
+    reading changes in (txid, seq) order up to it, none can show up later
+    before the position reached, without writers waiting on each other.
+
+    Returns:
+        The horizon, or None on databases whose writers are serialized,
+        where changes become visible in seq order.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return db.scalar(select(func.txid_snapshot_xmin(func.txid_current_snapshot())))
+
+
+def changes_after(
+    position: ChangePosition, horizon: Optional[int]
+) -> List[ColumnElement[bool]]:
+    """
+    The conditions selecting the changes after a position of the log, up to
+    the horizon. Read them ordered by CHANGE_LOG_ORDER.
+    """
+    conditions = [tuple_(Change.txid, Change.seq) > tuple_(*position)]
+    if horizon is not None:
+        conditions.append(Change.txid < horizon)
+    return conditions
+
+
+def read_changes(
+    db: Session, user_id: str, since: ChangePosition, limit: int
+) -> Tuple[
+    Dict[Tuple[ChangeEntityEnum, str], ChangeOperationEnum], ChangePosition, bool
+]:
+    """
+    Reads the changes visible to a user after a position of the change log.
+
+    Args:
+        db: The session to query with.
+        user_id: The user syncing.
+        since: The last position the user synced, (0, 0) to read from the start.
+        limit: The maximum number of log entries to read.
+
+    Returns:
+        The latest operation on each changed row, the position to resume from
+        and whether more changes remain after it.
+    """
+    group_ids = select(user_group_role_table.c.group_id).where(
+        user_group_role_table.c.user_id == user_id
+    )
+    entries = db.execute(
+        select(
+            Change.txid, Change.seq, Change.entity, Change.entity_id, Change.operation
+        )
+        .where(
+            *changes_after(since, change_log_horizon(db)),
+            or_(Change.group_id.in_(group_ids), Change.user_id == user_id),
+        )
+        .order_by(*CHANGE_LOG_ORDER)
+        .limit(limit + 1)
+    ).all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Entries are in log order, so later operations on a row win
+    operations = {(entry.entity, entry.entity_id): entry.operation for entry in entries}
+    position = (entries[-1].txid, entries[-1].seq) if entries else since
+    return operations, position, has_more
+
+
+def changed_ids(
+    operations: Dict[Tuple[ChangeEntityEnum, str], ChangeOperationEnum],
+    entity: ChangeEntityEnum,
+    operation: ChangeOperationEnum = ChangeOperationEnum.UPSERT,
+) -> List[str]:
+    """Picks the ids of one kind of row with the given latest operation."""
+    return [
+        entity_id
+        for (changed_entity, entity_id), changed_operation in operations.items()
+        if changed_entity == entity and changed_operation == operation
+    ]
@@ -0,0 +1,130 @@
+import hashlib
+from typing import Iterable
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from api.models import (
+    ChangeEntityEnum,
+    Group,
+    GroupInvitation,
+    User,
+    user_group_role_table,
+)
+from api.sync import record_changes, record_group_invitations_changed
+
+
+def touch_group(db: Session, group_id: str, include_invitees: bool = False):
+    """
+    Bumps the version of a group and logs the change for syncing clients.
+
+    Member listings are versioned through their groups, see
+    user_listing_version, so the write does not update a row per member.
+
+    Args:
+        db: The session the write is happening in.
+        group_id: The group that changed.
+        include_invitees: Whether users invited to the group are affected too,
+            e.g. when the group name shown in their invitations changes.
+    """
+    db.execute(
+        update(Group).where(Group.id == group_id).values(version=Group.version + 1),
+        execution_options={"synchronize_session": False},
+    )
+    record_changes(db, ChangeEntityEnum.GROUP, [group_id], group_id=group_id)
+
+    if include_invitees:
+        record_group_invitations_changed(db, group_id)
+        touch_users(
+            db,
+            db.scalars(
+                select(GroupInvitation.invitee_id).where(
+                    GroupInvitation.group_id == group_id
+                )
+            ),
+        )
+
+
+def touch_users(db: Session, user_ids: Iterable[str]):
+    """
+    Bumps the version of the given users.
+
+    The rows are locked in id order first, so concurrent writers touching
+    overlapping users wait on each other instead of deadlocking.
+
+    Args:
+        db: The session the write is happening in.
+        user_ids: The users whose listings changed.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    db.execute(
+        select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update()
+    )
+    db.execute(
+        update(User).where(User.id.in_(user_ids)).values(version=User.version + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def user_listing_version(db: Session, user: User) -> tuple[int, int, int]:
+    """
+    Versions the data listed for a user, derived from their groups on read.
+
+    Args:
+        db: The session to query with.
+        user: The user the listing is for.
+
+    Returns:
+        The user's own version, their number of groups and the sum of the
+        versions of those groups.
+    """
+    group_count, group_versions = db.execute(
+        select(func.count(Group.id), func.coalesce(func.sum(Group.version), 0))
+        .join(user_group_role_table, user_group_role_table.c.group_id == Group.id)
+        .where(user_group_role_table.c.user_id == user.id)
+    ).one()
+    return user.version, group_count, group_versions
+
+
+def make_etag(request: Request, *version_parts) -> str:
+    """
+    Builds a strong ETag for the requested URL at the given versions.
+
+    Args:
+        request: The request being served, its path and query are part of the tag.
+        version_parts: Identifiers and versions the representation depends on.
+
+    Returns:
+        The quoted ETag value.
+    """
+    key = "|".join(
+        [request.url.path, request.url.query, *(str(part) for part in version_parts)]
+    )
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Checks the If-None-Match header of the request against an ETag.
+
+    Args:
+        request: The request being served.
+        etag: The current ETag of the representation.
+
+    Returns:
+        True if the client already holds the current representation.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
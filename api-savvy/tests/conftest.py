@@ -1,8 +1,9 @@
 # conftest.py
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import StaticPool, create_engine
+from sqlalchemy import StaticPool, create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
+from api.analytics_cache import analytics_cache
 from api.database import Base, get_db
 from api.main import app
 
@@ -25,6 +26,8 @@ def session_fixture():
         session.rollback()
         session.close()
         Base.metadata.drop_all(engine)
+        # Cached groups would outlive the database they were read from
+        analytics_cache.clear()
 
 
 @pytest.fixture(name="client")
@@ -36,3 +39,15 @@ def client_fixture(test_db: Session):
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="executed_statements")
+def executed_statements_fixture():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,195 @@
+import datetime
+from uuid import uuid4
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from api import analytics_cache as analytics_cache_module
+from api.analytics_cache import AnalyticsCache, analytics_cache
+from api.models import (
+    Change,
+    ExpenseTypeEnum,
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_groups(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(admin)
+
+    groups = []
+    for group_id in ("group-id", "other-group-id"):
+        group = Group(id=group_id, name="Home", owner_id=admin.id)
+        test_db.add(group)
+        groups.append(group)
+        test_db.execute(
+            user_group_role_table.insert().values(
+                user_id=admin.id, group_id=group.id, role=GroupRoleEnum.ADMIN
+            )
+        )
+
+        for amount, category, date in [
+            (40.1, "Food", datetime.date(2024, 1, 10)),
+            (60, "Food", datetime.date(2024, 2, 3)),
+            (20.25, None, datetime.date(2024, 2, 20)),
+        ]:
+            group.expenses.append(
+                OneTimeExpense(
+                    id=str(uuid4()),
+                    name="Groceries",
+                    amount=amount,
+                    category=category,
+                    date=date,
+                    creator=admin,
+                )
+            )
+
+        subscription = Subscription(
+            id=str(uuid4()),
+            name="Netflix",
+            amount=15,
+            category="Entertainment",
+            start_date=datetime.date(2024, 1, 1),
+            on_every=1,
+            frequency=SubscriptionFrequencyEnum.MONTHLY,
+            creator=admin,
+        )
+        subscription.charges.append(
+            SubscriptionCharge(
+                id=str(uuid4()),
+                amount=15,
+                charged_date=datetime.date(2024, 1, 1),
+                creator=admin,
+            )
+        )
+        group.expenses.append(subscription)
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(admin.id)}"}
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/v1/groups/group-id/summary",
+        "/v1/groups/group-id/summary?from=2024-01-05&to=2024-02-10",
+        "/v1/groups/group-id/timeseries?bucket=week&from=2024-01-01&to=2024-03-01",
+        "/v1/groups/group-id/timeseries?bucket=month&from=2023-12-01&to=2024-03-01",
+    ],
+)
+def test_cached_reports_match_database_reports(
+    client: TestClient, seed_groups: dict, monkeypatch: pytest.MonkeyPatch, url: str
+):
+    cached = client.get(url, headers=seed_groups).json()
+
+    monkeypatch.setattr(analytics_cache, "max_bytes", 0)
+    queried = client.get(url, headers=seed_groups).json()
+
+    assert cached == queried
+
+
+def test_writes_are_appended_to_cached_group(client: TestClient, seed_groups: dict):
+    url = "/v1/groups/group-id/timeseries?bucket=month&from=2024-01-01&to=2024-02-29"
+    response = client.get(url, headers=seed_groups)
+    assert response.json()["counts"] == [2, 2]
+    amounts = analytics_cache._entries["group-id"].amounts
+
+    client.post(
+        "/v1/groups/group-id/expenses/",
+        json={
+            "name": "Dinner",
+            "amount": 30,
+            "date": "2024-01-20",
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+        },
+        headers=seed_groups,
+    )
+    response = client.get(url, headers=seed_groups)
+
+    assert response.json()["counts"] == [3, 2]
+    assert response.json()["amounts"] == [85.1, 80.25]
+    # Appended to the same columns rather than rebuilt
+    assert analytics_cache._entries["group-id"].amounts is amounts
+
+
+def test_least_recently_used_groups_are_evicted_past_budget(
+    test_db: Session, seed_groups: dict
+):
+    groups = [test_db.get(Group, id) for id in ("group-id", "other-group-id")]
+    entry = AnalyticsCache().get(test_db, groups[0])
+
+    cache = AnalyticsCache(max_bytes=entry.nbytes)
+    cache.get(test_db, groups[0])
+    cache.get(test_db, groups[1])
+
+    assert list(cache._entries) == ["other-group-id"]
+
+
+def test_groups_larger_than_budget_are_not_cached(
+    client: TestClient,
+    test_db: Session,
+    seed_groups: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    group = test_db.get(Group, "group-id")
+    cache = AnalyticsCache(max_bytes=1)
+
+    assert cache.get(test_db, group) is None
+    assert list(cache._entries) == []
+
+    url = "/v1/groups/group-id/summary"
+    monkeypatch.setattr(analytics_cache, "max_bytes", 0)
+    queried = client.get(url, headers=seed_groups).json()
+    monkeypatch.setattr(analytics_cache, "max_bytes", 1)
+    response = client.get(url, headers=seed_groups)
+
+    assert response.json() == queried
+    assert list(analytics_cache._entries) == []
+
+
+def test_writes_above_the_change_log_horizon_are_appended_once_it_passes(
+    client: TestClient,
+    test_db: Session,
+    seed_groups: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    url = "/v1/groups/group-id/timeseries?bucket=month&from=2024-01-01&to=2024-02-29"
+    client.get(url, headers=seed_groups)
+
+    client.post(
+        "/v1/groups/group-id/expenses/",
+        json={
+            "name": "Dinner",
+            "amount": 30,
+            "date": "2024-01-20",
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+        },
+        headers=seed_groups,
+    )
+    # Logged by transaction 5, while an older one is still running
+    test_db.execute(update(Change).where(Change.txid == 0).values(txid=5))
+    test_db.commit()
+
+    monkeypatch.setattr(analytics_cache_module, "change_log_horizon", lambda db: 5)
+    response = client.get(url, headers=seed_groups)
+
+    assert response.json()["counts"] == [2, 2]
+
+    monkeypatch.setattr(analytics_cache_module, "change_log_horizon", lambda db: 6)
+    response = client.get(url, headers=seed_groups)
+
+    assert response.json()["counts"] == [3, 2]
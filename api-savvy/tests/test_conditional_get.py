@@ -0,0 +1,154 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    ExpenseTypeEnum,
+    Group,
+    GroupRoleEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_admin(test_db: Session):
+    new_user = User(
+        id=str(uuid4()),
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id=str(uuid4()), name="Admin Group", owner_id=new_user.id)
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return new_user.id, new_group.id
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/v1/groups/",
+        "/v1/groups/{group_id}",
+        "/v1/groups/{group_id}/expenses/",
+        "/v1/groups/invitations/",
+    ],
+)
+def test_unchanged_resources_are_not_sent_again(
+    client: TestClient, seed_admin: tuple[str, str], path: str
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+    url = path.format(group_id=group_id)
+
+    response = client.get(url, headers=headers)
+    etag = response.headers["ETag"]
+
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/v1/groups/", "/v1/groups/{group_id}", "/v1/groups/{group_id}/expenses/"],
+)
+def test_creating_an_expense_changes_group_etags(
+    client: TestClient, seed_admin: tuple[str, str], path: str
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+    url = path.format(group_id=group_id)
+
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "Expense 1",
+            "amount": 15,
+            "date": datetime.date.today().isoformat(),
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+        },
+        headers=headers,
+    )
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("path", ["/v1/groups/", "/v1/me/dashboard"])
+def test_creating_an_expense_changes_user_etags_without_writing_the_user(
+    client: TestClient, test_db: Session, seed_admin: tuple[str, str], path: str
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+    user_version = test_db.get(User, user_id).version
+
+    etag = client.get(path, headers=headers).headers["ETag"]
+
+    client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "Expense 1",
+            "amount": 15,
+            "date": datetime.date.today().isoformat(),
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+        },
+        headers=headers,
+    )
+
+    response = client.get(path, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    test_db.expire_all()
+    assert test_db.get(User, user_id).version == user_version
+
+
+def test_receiving_an_invitation_changes_invitations_etag(
+    client: TestClient, test_db: Session, seed_admin: tuple[str, str]
+):
+    user_id, group_id = seed_admin
+    invitee = User(
+        id=str(uuid4()), name="Yana", email="invitee@email.com", password=b"1234"
+    )
+    test_db.add(invitee)
+    test_db.commit()
+    invitee_headers = {"Authorization": f"JWT {create_access_token(invitee.id)}"}
+
+    etag = client.get("/v1/groups/invitations/", headers=invitee_headers).headers[
+        "ETag"
+    ]
+
+    client.post(
+        f"/v1/groups/{group_id}/invite/",
+        json={"invitee_email": "invitee@email.com"},
+        headers={"Authorization": f"JWT {create_access_token(user_id)}"},
+    )
+
+    response = client.get(
+        "/v1/groups/invitations/",
+        headers={**invitee_headers, "If-None-Match": etag},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
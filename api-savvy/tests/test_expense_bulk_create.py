@@ -0,0 +1,119 @@
+import datetime
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Expense,
+    ExpenseTypeEnum,
+    Group,
+    GroupRoleEnum,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_admin(test_db: Session):
+    new_user = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id="group-admin-id", name="Admin Group", owner_id="user-admin-id")
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    test_db.refresh(new_user)
+    test_db.refresh(new_group)
+    return new_user, new_group
+
+
+def test_user_cannot_bulk_create_expenses_in_non_existing_group(
+    client: TestClient, seed_admin: tuple[User, Group]
+):
+    admin_user, _ = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(admin_user.id)}"}
+
+    response = client.post(
+        "/v1/groups/non-existing-group-id/expenses/bulk",
+        json={"expenses": []},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Group not found"
+
+
+def test_user_bulk_creates_expenses(
+    client: TestClient, seed_admin: tuple[User, Group], test_db: Session
+):
+    admin_user, admin_group = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(admin_user.id)}"}
+    today = datetime.date.today().isoformat()
+
+    response = client.post(
+        f"/v1/groups/{admin_group.id}/expenses/bulk",
+        json={
+            "expenses": [
+                {
+                    "name": "Groceries",
+                    "amount": 20,
+                    "date": today,
+                    "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+                },
+                {"name": "Missing amount", "expense_type": "one_time"},
+                {
+                    "name": "Netflix",
+                    "amount": 10,
+                    "on_every": 1,
+                    "frequency": SubscriptionFrequencyEnum.MONTHLY.value,
+                    "start_date": today,
+                    "expense_type": ExpenseTypeEnum.SUBSCRIPTION.value,
+                },
+            ]
+        },
+        headers=headers,
+    )
+
+    data = response.json()
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [expense["name"] for expense in data["created"]] == [
+        "Groceries",
+        "Netflix",
+    ]
+    assert [error["index"] for error in data["errors"]] == [1]
+
+    assert test_db.query(Expense).filter_by(group_id=admin_group.id).count() == 2
+
+    test_db.refresh(admin_group)
+    assert admin_group.expense_count == 2
+    assert admin_group.total_spent == 20
+
+
+def test_user_bulk_creating_only_invalid_expenses_gets_all_errors(
+    client: TestClient, seed_admin: tuple[User, Group]
+):
+    admin_user, admin_group = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(admin_user.id)}"}
+
+    response = client.post(
+        f"/v1/groups/{admin_group.id}/expenses/bulk",
+        json={"expenses": [{"name": "Missing amount"}, {"amount": 3}]},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert [error["index"] for error in response.json()["detail"]] == [0, 1]
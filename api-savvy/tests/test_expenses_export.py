@@ -0,0 +1,146 @@
+import datetime
+import csv
+import gzip
+import io
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_member(test_db: Session):
+    new_user = User(
+        id=str(uuid4()),
+        name="Yana",
+        email="member@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id=str(uuid4()), name="Member Group", owner_id=new_user.id)
+
+    new_group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name="Expense 1",
+            amount=15,
+            date=datetime.date.today(),
+            creator=new_user,
+        )
+    )
+
+    new_subscription = Subscription(
+        id=str(uuid4()),
+        name="Subscription 1",
+        amount=15,
+        start_date=datetime.date.today() - datetime.timedelta(days=1),
+        creator=new_user,
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.WEEKLY,
+    )
+    new_subscription.charges.append(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            amount=15,
+            charged_date=datetime.date.today(),
+            creator=new_user,
+        )
+    )
+    new_group.expenses.append(new_subscription)
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return new_user.id, new_group.id
+
+
+def test_user_cannot_export_expenses_of_groups_not_linked_to_them(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        "/v1/groups/non-existing-group-id/expenses/export", headers=headers
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+def test_user_exports_expenses_as_csv(client: TestClient, seed_member: tuple[str, str]):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(f"/v1/groups/{group_id}/expenses/export", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert (
+        response.headers["content-disposition"]
+        == f'attachment; filename="expenses-{group_id}.csv"'
+    )
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Subscription 1", "Expense 1"]
+    assert rows[0]["frequency"] == "weekly"
+    assert rows[0]["date"] == ""
+    assert rows[1]["date"] == datetime.date.today().isoformat()
+
+
+def test_user_exports_filtered_expenses_as_gzipped_csv(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group_id}/expenses/export",
+        params={"gzip": True, "expense_type": "one_time"},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.csv.gz"')
+
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert [row["name"] for row in rows] == ["Expense 1"]
+
+
+def test_user_exports_expenses_as_parquet(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group_id}/expenses/export",
+        params={"format": "parquet"},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    table = parquet.read_table(io.BytesIO(response.content))
+    assert table.column("name").to_pylist() == ["Subscription 1", "Expense 1"]
+    assert table.column("amount").to_pylist() == [15, 15]
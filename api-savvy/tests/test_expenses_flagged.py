@@ -0,0 +1,135 @@
+import statistics
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.anomalies import rebuild_category_stats, welford_update
+from api.models import (
+    CategorySpendingStats,
+    ExpenseTypeEnum,
+    Group,
+    GroupRoleEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(admin)
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=admin.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(admin.id)}"}
+
+
+def _expense(name: str, amount: float, category: str | None = "Food"):
+    return {
+        "name": name,
+        "amount": amount,
+        "category": category,
+        "date": "2024-03-15",
+        "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+    }
+
+
+def test_welford_update_matches_batch_statistics():
+    values = [12.5, 40, 33, 7.25, 19, 41]
+    running = (0, 0.0, 0.0)
+    for value in values:
+        running = welford_update(*running, value)
+
+    count, mean, m2 = running
+    assert count == len(values)
+    assert mean == pytest.approx(statistics.mean(values))
+    assert m2 / (count - 1) == pytest.approx(statistics.variance(values))
+
+
+def test_user_cannot_get_flagged_expenses_of_groups_not_linked_to_them(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/non-existing-group-id/expenses/flagged", headers=seed_group
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+def test_unusual_expenses_are_flagged_against_their_category(
+    client: TestClient, test_db: Session, seed_group: dict
+):
+    response = client.post(
+        "/v1/groups/group-id/expenses/bulk",
+        json={
+            "expenses": [
+                _expense(f"Groceries {index}", amount)
+                for index, amount in enumerate([40, 45, 38, 42, 41, 44])
+            ]
+            + [_expense("Car", 900, None)]
+        },
+        headers=seed_group,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.post(
+        "/v1/groups/group-id/expenses/", json=_expense("Usual", 43), headers=seed_group
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    response = client.post(
+        "/v1/groups/group-id/expenses/", json=_expense("Feast", 400), headers=seed_group
+    )
+    feast_id = response.json()["id"]
+
+    response = client.get("/v1/groups/group-id/expenses/flagged", headers=seed_group)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [expense["id"] for expense in data] == [feast_id]
+    assert data[0]["mean"] == pytest.approx(293 / 7)
+    assert data[0]["z_score"] > 3
+
+    stats = test_db.get(CategorySpendingStats, ("group-id", "Food"))
+    assert stats.count == 8
+    assert stats.mean == pytest.approx(693 / 8)
+
+
+def test_expenses_are_scored_after_rebuilding_equal_amounts(
+    client: TestClient, test_db: Session, seed_group: dict
+):
+    response = client.post(
+        "/v1/groups/group-id/expenses/bulk",
+        json={"expenses": [_expense(f"Coffee {index}", 0.3) for index in range(7)]},
+        headers=seed_group,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    rebuild_category_stats(test_db, "group-id")
+    test_db.commit()
+    stats = test_db.get(CategorySpendingStats, ("group-id", "Food"))
+    assert stats.count == 7
+    assert stats.m2 >= 0
+
+    response = client.post(
+        "/v1/groups/group-id/expenses/",
+        json=_expense("Coffee", 0.3),
+        headers=seed_group,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/v1/groups/group-id/expenses/flagged", headers=seed_group)
+    assert response.json() == []
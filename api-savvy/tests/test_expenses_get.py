@@ -4,6 +4,7 @@ from fastapi import status
 from fastapi.testclient import TestClient
 import pytest
 from sqlalchemy.orm import Session
+from api.iterable_operations import find_first
 from api.models import (
     Expense,
     ExpenseTypeEnum,
@@ -16,6 +17,7 @@ from api.models import (
     User,
     user_group_role_table,
 )
+from api.pagination import encode_cursor
 from api.security import create_access_token, hash_token
 
 
@@ -135,3 +137,378 @@ def test_user_gets_group_expenses(
     assert response.status_code == status.HTTP_200_OK
     assert isinstance(data["expenses"], list)
     assert len(data["expenses"]) == 2
+
+
+def _add_expenses(test_db: Session, user: User, group: Group, count: int):
+    for index in range(count):
+        subscription = Subscription(
+            id=str(uuid4()),
+            name=f"Subscription {index}",
+            amount=10,
+            start_date=datetime.date.today(),
+            creator=user,
+            group=group,
+            on_every=1,
+            frequency=SubscriptionFrequencyEnum.MONTHLY,
+        )
+        subscription.charges.append(
+            SubscriptionCharge(
+                id=str(uuid4()),
+                amount=10,
+                charged_date=datetime.date.today(),
+                creator=user,
+            )
+        )
+        test_db.add(subscription)
+        test_db.add(
+            OneTimeExpense(
+                id=str(uuid4()),
+                name=f"Expense {index}",
+                amount=5,
+                date=datetime.date.today(),
+                creator=user,
+                group=group,
+            )
+        )
+    test_db.commit()
+
+
+def test_get_expenses_query_count_does_not_depend_on_group_size(
+    client: TestClient,
+    test_db: Session,
+    seed_member: tuple[User, Group, OneTimeExpense, Subscription, SubscriptionCharge],
+    executed_statements: list[str],
+):
+    user, group, *_ = seed_member
+    group_id = group.id
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    test_db.expire_all()
+    executed_statements.clear()
+    client.get(
+        f"/v1/groups/{group_id}/expenses/",
+        params={"include": "charges"},
+        headers=headers,
+    )
+    small_group_queries = len(executed_statements)
+
+    _add_expenses(test_db, user, group, 25)
+
+    test_db.expire_all()
+    executed_statements.clear()
+    response = client.get(
+        f"/v1/groups/{group_id}/expenses/",
+        params={"include": "charges"},
+        headers=headers,
+    )
+    expenses = response.json()["expenses"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(expenses) == 52
+    assert all(
+        len(expense["charges"]) == 1
+        for expense in expenses
+        if expense["expense_type"] == ExpenseTypeEnum.SUBSCRIPTION.value
+    )
+    assert len(executed_statements) == small_group_queries
+    assert small_group_queries <= 4
+
+
+def _add_dated_expense(test_db: Session, user: User, group: Group, days_ago: int):
+    expense = OneTimeExpense(
+        id=str(uuid4()),
+        name=f"Expense {days_ago} days ago",
+        amount=5,
+        date=datetime.date.today() - datetime.timedelta(days=days_ago),
+        creator=user,
+        group=group,
+    )
+    test_db.add(expense)
+    test_db.commit()
+    return expense
+
+
+def test_user_pages_through_group_expenses(
+    client: TestClient, test_db: Session, seed_admin: tuple[User, Group]
+):
+    user, group = seed_admin
+    for days_ago in range(1, 6):
+        _add_dated_expense(test_db, user, group, days_ago)
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/", params={"limit": 2}, headers=headers
+    )
+    first_page = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [expense["name"] for expense in first_page["expenses"]] == [
+        "Expense 1 days ago",
+        "Expense 2 days ago",
+    ]
+
+    # Rows inserted between requests do not shift the following pages
+    _add_dated_expense(test_db, user, group, 0)
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+        headers=headers,
+    )
+    second_page = response.json()
+
+    assert [expense["name"] for expense in second_page["expenses"]] == [
+        "Expense 3 days ago",
+        "Expense 4 days ago",
+    ]
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"limit": 2, "cursor": second_page["next_cursor"]},
+        headers=headers,
+    )
+    last_page = response.json()
+
+    assert [expense["name"] for expense in last_page["expenses"]] == [
+        "Expense 5 days ago"
+    ]
+    assert last_page["next_cursor"] is None
+
+
+def test_user_filters_group_expenses_by_date_range(
+    client: TestClient, test_db: Session, seed_admin: tuple[User, Group]
+):
+    user, group = seed_admin
+    for days_ago in range(1, 6):
+        _add_dated_expense(test_db, user, group, days_ago)
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+    today = datetime.date.today()
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={
+            "from": (today - datetime.timedelta(days=4)).isoformat(),
+            "to": (today - datetime.timedelta(days=2)).isoformat(),
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [expense["name"] for expense in response.json()["expenses"]] == [
+        "Expense 2 days ago",
+        "Expense 3 days ago",
+        "Expense 4 days ago",
+    ]
+
+
+def test_user_cannot_page_with_invalid_cursor(
+    client: TestClient, seed_admin: tuple[User, Group]
+):
+    user, group = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"cursor": "not-a-cursor"},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_user_gets_projected_group_expenses(
+    client: TestClient,
+    seed_member: tuple[User, Group, OneTimeExpense, Subscription, SubscriptionCharge],
+):
+    user, group, expense, subscription, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"fields": "name,amount"},
+        headers=headers,
+    )
+
+    expenses = sorted(response.json()["expenses"], key=lambda item: item["name"])
+
+    assert response.status_code == status.HTTP_200_OK
+    assert expenses == [
+        {
+            "id": expense.id,
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+            "name": "Expense 1",
+            "amount": 15,
+        },
+        {
+            "id": subscription.id,
+            "expense_type": ExpenseTypeEnum.SUBSCRIPTION.value,
+            "name": "Subscription 1",
+            "amount": 15,
+        },
+    ]
+
+
+def test_user_gets_limited_subscription_charges(
+    client: TestClient,
+    test_db: Session,
+    seed_member: tuple[User, Group, OneTimeExpense, Subscription, SubscriptionCharge],
+):
+    user, group, _, subscription, charge = seed_member
+    older_charge = SubscriptionCharge(
+        id=str(uuid4()),
+        amount=15,
+        charged_date=datetime.date.today() - datetime.timedelta(days=7),
+        subscription=subscription,
+        creator=user,
+    )
+    test_db.add(older_charge)
+    test_db.commit()
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"fields": "name", "include": "charges", "charges_limit": 1},
+        headers=headers,
+    )
+
+    subscription_item = find_first(
+        response.json()["expenses"], lambda item: item["id"] == subscription.id
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in subscription_item["charges"]] == [charge.id]
+
+
+def test_user_cannot_project_unknown_fields(
+    client: TestClient, seed_admin: tuple[User, Group]
+):
+    user, group = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"fields": "name,password"},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Unknown fields: password"
+
+
+def test_user_filters_and_sorts_group_expenses(
+    client: TestClient, test_db: Session, seed_admin: tuple[User, Group]
+):
+    user, group = seed_admin
+    for name, amount, category in [
+        ("Rent", 900, "Home"),
+        ("Groceries", 60, "Food"),
+        ("Dinner", 45, "Food"),
+        ("Snacks", 5, "Food"),
+    ]:
+        test_db.add(
+            OneTimeExpense(
+                id=str(uuid4()),
+                name=name,
+                amount=amount,
+                category=category,
+                date=datetime.date.today(),
+                creator=user,
+                group=group,
+            )
+        )
+    test_db.commit()
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={
+            "category": "Food",
+            "min_amount": 10,
+            "creator_id": user.id,
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+            "sort": "-amount",
+            "limit": 1,
+        },
+        headers=headers,
+    )
+    first_page = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [expense["name"] for expense in first_page["expenses"]] == ["Groceries"]
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={
+            "category": "Food",
+            "min_amount": 10,
+            "sort": "-amount",
+            "limit": 1,
+            "cursor": first_page["next_cursor"],
+        },
+        headers=headers,
+    )
+    second_page = response.json()
+
+    assert [expense["name"] for expense in second_page["expenses"]] == ["Dinner"]
+    assert second_page["next_cursor"] is None
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"sort": "name", "max_amount": 100},
+        headers=headers,
+    )
+
+    assert [expense["name"] for expense in response.json()["expenses"]] == [
+        "Dinner",
+        "Groceries",
+        "Snacks",
+    ]
+
+
+def test_user_cannot_reuse_cursor_with_another_sort(
+    client: TestClient, test_db: Session, seed_admin: tuple[User, Group]
+):
+    user, group = seed_admin
+    for days_ago in range(1, 3):
+        _add_dated_expense(test_db, user, group, days_ago)
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/", params={"limit": 1}, headers=headers
+    )
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"limit": 1, "sort": "amount", "cursor": response.json()["next_cursor"]},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize(
+    "sort, cursor",
+    [
+        ("date", ["date", "2026-01-01", {"a": 1}]),
+        ("date", ["date", {"a": 1}, "id"]),
+        ("amount", ["amount", {"x": 1}, "id"]),
+        ("amount", ["amount", "12", "id"]),
+        ("name", ["name", 12, "id"]),
+    ],
+)
+def test_user_cannot_page_with_mistyped_cursor(
+    client: TestClient, seed_admin: tuple[User, Group], sort: str, cursor: list
+):
+    user, group = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group.id}/expenses/",
+        params={"sort": sort, "cursor": encode_cursor(cursor)},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
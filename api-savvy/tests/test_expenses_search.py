@@ -0,0 +1,176 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    User,
+    user_group_role_table,
+)
+from api.pagination import encode_cursor
+from api.security import create_access_token, hash_token
+
+
+def _add_group(test_db: Session, user: User, name: str) -> Group:
+    new_group = Group(id=str(uuid4()), name=name, owner_id=user.id)
+    test_db.add(new_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+    return new_group
+
+
+def _add_expense(group: Group, user: User, name: str, category: str | None = None):
+    group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name=name,
+            amount=10,
+            category=category,
+            date=datetime.date.today(),
+            creator=user,
+        )
+    )
+
+
+@pytest.fixture
+def seed_member(test_db: Session):
+    new_user = User(
+        id=str(uuid4()),
+        name="Yana",
+        email="member@email.com",
+        password=hash_token("1234"),
+    )
+    other_user = User(
+        id=str(uuid4()),
+        name="Asier",
+        email="other@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add_all([new_user, other_user])
+
+    home = _add_group(test_db, new_user, "Home")
+    _add_expense(home, new_user, "Netflix", "Entertainment")
+    _add_expense(home, new_user, "Weekly groceries", "Food")
+    _add_expense(home, new_user, "Rent")
+
+    trip = _add_group(test_db, new_user, "Trip")
+    _add_expense(trip, new_user, "Netflix family plan")
+
+    other = _add_group(test_db, other_user, "Other")
+    _add_expense(other, other_user, "Netflix")
+
+    test_db.commit()
+    return new_user.id, home.id
+
+
+def test_user_searches_expenses_of_their_groups_by_prefix(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get("/v1/expenses/search", params={"q": "netfl"}, headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert sorted(result["name"] for result in results) == [
+        "Netflix",
+        "Netflix family plan",
+    ]
+    assert results[0]["score"] >= results[1]["score"]
+    assert response.json()["next_cursor"] is None
+
+
+def test_user_searches_expenses_by_category_within_a_group(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        "/v1/expenses/search",
+        params={"q": "food", "group_id": group_id},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["name"] for result in response.json()["results"]] == [
+        "Weekly groceries"
+    ]
+
+
+def test_user_searches_renamed_expenses(
+    client: TestClient, test_db: Session, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    expense = test_db.query(OneTimeExpense).filter_by(name="Rent").one()
+    expense.name = "Apartment rent"
+    test_db.commit()
+
+    response = client.get(
+        "/v1/expenses/search", params={"q": "apartment"}, headers=headers
+    )
+
+    assert [result["name"] for result in response.json()["results"]] == [
+        "Apartment rent"
+    ]
+
+
+def test_user_paginates_search_results(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    first_page = client.get(
+        "/v1/expenses/search", params={"q": "netflix", "limit": 1}, headers=headers
+    ).json()
+    second_page = client.get(
+        "/v1/expenses/search",
+        params={"q": "netflix", "limit": 1, "cursor": first_page["next_cursor"]},
+        headers=headers,
+    ).json()
+
+    assert first_page["next_cursor"] is not None
+    assert second_page["next_cursor"] is None
+    assert sorted(
+        result["name"] for result in first_page["results"] + second_page["results"]
+    ) == ["Netflix", "Netflix family plan"]
+
+
+def test_user_cannot_search_without_words(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get("/v1/expenses/search", params={"q": "*"}, headers=headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid search query"}
+
+
+@pytest.mark.parametrize("cursor", [[True, "x"], [1.0, {"a": 1}]])
+def test_user_cannot_search_from_a_mistyped_cursor(
+    client: TestClient, seed_member: tuple[str, str], cursor: list
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        "/v1/expenses/search",
+        params={"q": "netflix", "cursor": encode_cursor(cursor)},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
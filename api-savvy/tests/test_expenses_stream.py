@@ -0,0 +1,131 @@
+import datetime
+import json
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_member(test_db: Session):
+    new_user = User(
+        id=str(uuid4()),
+        name="Yana",
+        email="member@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id=str(uuid4()), name="Member Group", owner_id=new_user.id)
+
+    new_group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name="Expense 1",
+            amount=15,
+            date=datetime.date.today(),
+            creator=new_user,
+        )
+    )
+
+    new_subscription = Subscription(
+        id=str(uuid4()),
+        name="Subscription 1",
+        amount=15,
+        start_date=datetime.date.today() - datetime.timedelta(days=1),
+        creator=new_user,
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.WEEKLY,
+    )
+    new_subscription.charges.append(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            amount=15,
+            charged_date=datetime.date.today(),
+            creator=new_user,
+        )
+    )
+    new_group.expenses.append(new_subscription)
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return new_user.id, new_group.id
+
+
+def test_user_cannot_stream_expenses_of_groups_not_linked_to_them(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        "/v1/groups/non-existing-group-id/expenses/stream", headers=headers
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Group not found"
+
+
+def test_user_streams_group_expenses_as_ndjson(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group_id}/expenses/stream",
+        params={"include": "charges"},
+        headers=headers,
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [line["name"] for line in lines] == ["Expense 1", "Subscription 1"]
+    assert len(lines[1]["charges"]) == 1
+
+
+def test_user_streams_group_expenses_as_json_array(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(
+        f"/v1/groups/{group_id}/expenses/stream",
+        params={"format": "json"},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [expense["name"] for expense in response.json()] == [
+        "Expense 1",
+        "Subscription 1",
+    ]
+
+    response = client.get(
+        f"/v1/groups/{group_id}/expenses/stream",
+        params={"format": "json", "from": datetime.date.today().isoformat()},
+        headers=headers,
+    )
+
+    assert [expense["name"] for expense in response.json()] == ["Expense 1"]
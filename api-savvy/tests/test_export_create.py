@@ -0,0 +1,282 @@
+import datetime
+import csv
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api import expense_export
+from api.models import (
+    ExportFormatEnum,
+    ExportJob,
+    JobStatusEnum,
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_member(test_db: Session):
+    new_user = User(
+        id=str(uuid4()),
+        name="Yana",
+        email="member@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id=str(uuid4()), name="Member Group", owner_id=new_user.id)
+
+    new_group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name="Expense 1",
+            amount=15,
+            date=datetime.date.today(),
+            creator=new_user,
+        )
+    )
+
+    new_subscription = Subscription(
+        id=str(uuid4()),
+        name="Subscription 1",
+        amount=15,
+        start_date=datetime.date.today() - datetime.timedelta(days=1),
+        creator=new_user,
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.WEEKLY,
+    )
+    new_subscription.charges.append(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            amount=15,
+            charged_date=datetime.date.today(),
+            creator=new_user,
+        )
+    )
+    new_group.expenses.append(new_subscription)
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return new_user.id, new_group.id
+
+
+@pytest.fixture(autouse=True)
+def export_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(expense_export, "EXPORT_DIRECTORY", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def export_executor(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(expense_export, "export_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def _wait_for_exports():
+    expense_export.export_executor.shutdown(wait=True)
+
+
+def test_user_cannot_export_expenses_of_groups_not_linked_to_them(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, _ = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(
+        "/v1/groups/non-existing-group-id/exports/", json={}, headers=headers
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+def test_user_exports_expenses_in_the_background(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(
+        f"/v1/groups/{group_id}/exports/",
+        json={"format": "csv", "filters": {"expense_type": "one_time"}},
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["status"] == "pending"
+
+    _wait_for_exports()
+    job_id = response.json()["id"]
+    response = client.get(f"/v1/groups/{group_id}/exports/{job_id}", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "completed"
+    assert response.json()["row_count"] == 1
+    assert response.json()["expires_at"] is not None
+
+    response = client.get(
+        f"/v1/groups/{group_id}/exports/{job_id}/download", headers=headers
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["accept-ranges"] == "bytes"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in rows] == ["Expense 1"]
+
+
+def test_user_downloads_a_range_of_an_export(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(
+        f"/v1/groups/{group_id}/exports/", json={"format": "json"}, headers=headers
+    )
+    job_id = response.json()["id"]
+    _wait_for_exports()
+    download_url = f"/v1/groups/{group_id}/exports/{job_id}/download"
+    content = client.get(download_url, headers=headers).content
+
+    response = client.get(download_url, headers={**headers, "Range": "bytes=0-9"})
+
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == content[:10]
+
+
+def test_user_cannot_download_an_expired_export(
+    client: TestClient, test_db: Session, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(f"/v1/groups/{group_id}/exports/", json={}, headers=headers)
+    job_id = response.json()["id"]
+    _wait_for_exports()
+    path = test_db.get(ExportJob, job_id).path
+
+    expired = expense_export.remove_expired_exports(
+        test_db,
+        datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=2),
+    )
+    test_db.commit()
+
+    assert expired == 1
+    assert not os.path.exists(path)
+    assert test_db.get(ExportJob, job_id).status == JobStatusEnum.EXPIRED
+
+    response = client.get(
+        f"/v1/groups/{group_id}/exports/{job_id}/download", headers=headers
+    )
+
+    assert response.status_code == status.HTTP_410_GONE
+    assert response.json() == {"detail": "Export expired"}
+
+
+def test_user_cannot_download_an_export_expired_since_the_last_sweep(
+    client: TestClient, test_db: Session, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(f"/v1/groups/{group_id}/exports/", json={}, headers=headers)
+    job_id = response.json()["id"]
+    _wait_for_exports()
+    job = test_db.get(ExportJob, job_id)
+    path = job.path
+    job.expires_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        minutes=1
+    )
+    test_db.commit()
+
+    response = client.get(
+        f"/v1/groups/{group_id}/exports/{job_id}/download", headers=headers
+    )
+
+    assert response.status_code == status.HTTP_410_GONE
+    assert not os.path.exists(path)
+    assert test_db.get(ExportJob, job_id).status == JobStatusEnum.EXPIRED
+
+
+def test_exports_interrupted_by_a_restart_are_failed(
+    test_db: Session, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    for job_status, created_at in [
+        (JobStatusEnum.PENDING, started_at - datetime.timedelta(minutes=5)),
+        (JobStatusEnum.RUNNING, started_at - datetime.timedelta(minutes=5)),
+        (JobStatusEnum.PENDING, started_at + datetime.timedelta(seconds=1)),
+    ]:
+        test_db.add(
+            ExportJob(
+                id=str(uuid4()),
+                group_id=group_id,
+                user_id=user_id,
+                format=ExportFormatEnum.CSV,
+                status=job_status,
+                created_at=created_at,
+            )
+        )
+    test_db.commit()
+
+    failed = expense_export.fail_interrupted_exports(test_db, started_at)
+    test_db.commit()
+
+    assert failed == 2
+    statuses = [job.status for job in test_db.query(ExportJob).all()]
+    assert statuses.count(JobStatusEnum.FAILED) == 2
+    assert statuses.count(JobStatusEnum.PENDING) == 1
+
+
+def test_user_cannot_get_unknown_exports(
+    client: TestClient, seed_member: tuple[str, str]
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(f"/v1/groups/{group_id}/exports/unknown-id", headers=headers)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Export not found"}
+
+
+def test_exports_past_the_cap_stay_pending_without_blocking_requests(
+    client: TestClient, seed_member: tuple[str, str], export_executor
+):
+    user_id, group_id = seed_member
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+    running = threading.Event()
+    export_executor.submit(running.wait)
+
+    response = client.post(f"/v1/groups/{group_id}/exports/", json={}, headers=headers)
+    job_id = response.json()["id"]
+    response = client.get(f"/v1/groups/{group_id}/exports/{job_id}", headers=headers)
+
+    assert response.json()["status"] == "pending"
+
+    running.set()
+    _wait_for_exports()
+    response = client.get(f"/v1/groups/{group_id}/exports/{job_id}", headers=headers)
+
+    assert response.json()["status"] == "completed"
@@ -0,0 +1,141 @@
+import datetime
+import random
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.balances import settle_up
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    member = User(
+        id="user-member-id",
+        name="Yana",
+        email="member@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add_all([admin, member])
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    for user, role in [(admin, GroupRoleEnum.ADMIN), (member, GroupRoleEnum.VIEWER)]:
+        test_db.execute(
+            user_group_role_table.insert().values(
+                user_id=user.id, group_id=new_group.id, role=role
+            )
+        )
+
+    for name, amount, category, date, creator in [
+        ("Groceries", 40, "Food", datetime.date(2024, 1, 10), admin),
+        ("Dinner", 60, "Food", datetime.date(2024, 2, 3), member),
+        ("Train", 20, None, datetime.date(2024, 2, 20), member),
+    ]:
+        new_group.expenses.append(
+            OneTimeExpense(
+                id=str(uuid4()),
+                name=name,
+                amount=amount,
+                category=category,
+                date=date,
+                creator=creator,
+            )
+        )
+
+    subscription = Subscription(
+        id=str(uuid4()),
+        name="Netflix",
+        amount=15,
+        category="Entertainment",
+        start_date=datetime.date(2024, 1, 1),
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.MONTHLY,
+        creator=admin,
+    )
+    for month in (1, 2):
+        subscription.charges.append(
+            SubscriptionCharge(
+                id=str(uuid4()),
+                amount=15,
+                charged_date=datetime.date(2024, month, 1),
+                creator=admin,
+            )
+        )
+    new_group.expenses.append(subscription)
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(member.id)}"}
+
+
+def test_user_cannot_get_balances_of_groups_not_linked_to_them(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/non-existing-group-id/balances", headers=seed_group
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+def test_user_gets_member_balances_and_settlements(
+    client: TestClient, seed_group: dict
+):
+    response = client.get("/v1/groups/group-id/balances", headers=seed_group)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["balances"] == [
+        {
+            "user_id": "user-admin-id",
+            "name": "Asier",
+            "paid": 70,
+            "share": 75,
+            "net": -5,
+        },
+        {
+            "user_id": "user-member-id",
+            "name": "Yana",
+            "paid": 80,
+            "share": 75,
+            "net": 5,
+        },
+    ]
+    assert data["settlements"] == [
+        {"from_user_id": "user-admin-id", "to_user_id": "user-member-id", "amount": 5}
+    ]
+
+
+def test_settle_up_clears_every_position_in_at_most_n_minus_one_transfers():
+    generator = random.Random(42)
+    net_cents = {
+        f"user-{index}": generator.randint(-10_000, 10_000) for index in range(300)
+    }
+    net_cents["user-0"] -= sum(net_cents.values())
+
+    settlements = settle_up(net_cents)
+
+    for settlement in settlements:
+        assert settlement.amount_cents > 0
+        net_cents[settlement.from_user_id] += settlement.amount_cents
+        net_cents[settlement.to_user_id] -= settlement.amount_cents
+    assert set(net_cents.values()) == {0}
+    assert len(settlements) <= 299
@@ -0,0 +1,145 @@
+import datetime
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    ExpenseTypeEnum,
+    Group,
+    GroupRoleEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    viewer = User(
+        id="user-viewer-id",
+        name="Yana",
+        email="viewer@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add_all([admin, viewer])
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    for user, role in [(admin, GroupRoleEnum.ADMIN), (viewer, GroupRoleEnum.VIEWER)]:
+        test_db.execute(
+            user_group_role_table.insert().values(
+                user_id=user.id, group_id=new_group.id, role=role
+            )
+        )
+
+    test_db.commit()
+    return {
+        "admin": {"Authorization": f"JWT {create_access_token(admin.id)}"},
+        "viewer": {"Authorization": f"JWT {create_access_token(viewer.id)}"},
+    }
+
+
+def _create_expense(client: TestClient, headers: dict, amount: float, category: str):
+    response = client.post(
+        "/v1/groups/group-id/expenses/",
+        json={
+            "name": "Groceries",
+            "amount": amount,
+            "category": category,
+            "date": "2024-03-15",
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+        },
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_viewer_cannot_set_budgets(client: TestClient, seed_group: dict):
+    response = client.put(
+        "/v1/groups/group-id/budgets/Food",
+        json={"amount": 100},
+        headers=seed_group["viewer"],
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Insufficient privileges"}
+
+
+def test_user_cannot_delete_non_existing_budget(client: TestClient, seed_group: dict):
+    response = client.delete(
+        "/v1/groups/group-id/budgets/Food", headers=seed_group["admin"]
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Budget not found"}
+
+
+def test_budget_alerts_are_recorded_as_spending_crosses_thresholds(
+    client: TestClient, seed_group: dict
+):
+    response = client.put(
+        "/v1/groups/group-id/budgets/Food",
+        json={"amount": 100},
+        headers=seed_group["admin"],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"category": "Food", "amount": 100}
+
+    _create_expense(client, seed_group["admin"], 50, "Food")
+    _create_expense(client, seed_group["admin"], 500, "Travel")
+
+    response = client.get(
+        "/v1/groups/group-id/budgets?month=2024-03", headers=seed_group["viewer"]
+    )
+    assert response.json()["budgets"] == [
+        {
+            "category": "Food",
+            "amount": 100,
+            "spent": 50,
+            "remaining": 50,
+            "used": 50,
+            "alerts": [],
+        }
+    ]
+
+    _create_expense(client, seed_group["admin"], 35, "Food")
+    _create_expense(client, seed_group["admin"], 30, "Food")
+
+    response = client.get(
+        "/v1/groups/group-id/budgets?month=2024-03", headers=seed_group["viewer"]
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    budget = response.json()["budgets"][0]
+    assert budget["spent"] == 115
+    assert budget["remaining"] == -15
+    assert budget["used"] == 115
+    assert [(alert["threshold"], alert["spent"]) for alert in budget["alerts"]] == [
+        (80, 85),
+        (100, 115),
+    ]
+
+
+def test_deleted_budgets_are_no_longer_reported(client: TestClient, seed_group: dict):
+    client.put(
+        "/v1/groups/group-id/budgets/Food",
+        json={"amount": 100},
+        headers=seed_group["admin"],
+    )
+
+    response = client.delete(
+        "/v1/groups/group-id/budgets/Food", headers=seed_group["admin"]
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get(
+        f"/v1/groups/group-id/budgets?month={datetime.date.today():%Y-%m}",
+        headers=seed_group["admin"],
+    )
+    assert response.json()["budgets"] == []
@@ -0,0 +1,183 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.recurrence import Recurrence, project_occurrences
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(admin)
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=admin.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    for id, name, amount, start_date, end_date, frequency in [
+        (
+            "rent-id",
+            "Rent",
+            500,
+            datetime.date(2023, 1, 31),
+            None,
+            SubscriptionFrequencyEnum.MONTHLY,
+        ),
+        (
+            "gym-id",
+            "Gym",
+            10,
+            datetime.date(2024, 1, 5),
+            datetime.date(2024, 1, 20),
+            SubscriptionFrequencyEnum.WEEKLY,
+        ),
+        (
+            "domain-id",
+            "Domain",
+            12,
+            datetime.date(2020, 6, 1),
+            datetime.date(2023, 6, 1),
+            SubscriptionFrequencyEnum.YEARLY,
+        ),
+    ]:
+        new_group.expenses.append(
+            Subscription(
+                id=id,
+                name=name,
+                amount=amount,
+                start_date=start_date,
+                end_date=end_date,
+                on_every=1,
+                frequency=frequency,
+                creator=admin,
+            )
+        )
+    new_group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name="Groceries",
+            amount=40,
+            date=datetime.date(2024, 1, 10),
+            creator=admin,
+        )
+    )
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(admin.id)}"}
+
+
+def test_monthly_occurrences_are_clamped_to_the_end_of_the_month():
+    projected = project_occurrences(
+        [
+            Recurrence(
+                id="rent-id",
+                start_date=datetime.date(2023, 1, 31),
+                end_date=None,
+                on_every=1,
+                frequency=SubscriptionFrequencyEnum.MONTHLY,
+            ),
+            Recurrence(
+                id="leap-id",
+                start_date=datetime.date(2020, 2, 29),
+                end_date=None,
+                on_every=1,
+                frequency=SubscriptionFrequencyEnum.YEARLY,
+            ),
+        ],
+        datetime.date(2024, 1, 15),
+        datetime.date(2025, 3, 31),
+    )
+
+    assert projected["rent-id"][:4] == [
+        datetime.date(2024, 1, 31),
+        datetime.date(2024, 2, 29),
+        datetime.date(2024, 3, 31),
+        datetime.date(2024, 4, 30),
+    ]
+    assert projected["leap-id"] == [
+        datetime.date(2024, 2, 29),
+        datetime.date(2025, 2, 28),
+    ]
+
+
+def test_user_cannot_get_projection_of_groups_not_linked_to_them(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/non-existing-group-id/projection", headers=seed_group
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "from=2024-02-01&to=2024-01-01",
+        "from=9999-06-01",
+        "from=9999-06-01&to=9999-12-31",
+        "from=2024-01-01&to=2029-12-31",
+    ],
+)
+def test_user_cannot_get_projection_over_invalid_range(
+    client: TestClient, seed_group: dict, query: str
+):
+    response = client.get(f"/v1/groups/group-id/projection?{query}", headers=seed_group)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid projection range"}
+
+
+def test_user_gets_projected_subscription_spend(client: TestClient, seed_group: dict):
+    response = client.get(
+        "/v1/groups/group-id/projection?from=2024-01-01&to=2024-02-29",
+        headers=seed_group,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == {"amount": 1030, "count": 5}
+    assert data["by_month"] == [
+        {"month": "2024-01", "amount": 530, "count": 4},
+        {"month": "2024-02", "amount": 500, "count": 1},
+    ]
+    assert data["by_subscription"] == [
+        {
+            "subscription_id": "rent-id",
+            "name": "Rent",
+            "category": None,
+            "amount": 1000,
+            "count": 2,
+            "next_date": "2024-01-31",
+        },
+        {
+            "subscription_id": "gym-id",
+            "name": "Gym",
+            "category": None,
+            "amount": 30,
+            "count": 3,
+            "next_date": "2024-01-05",
+        },
+    ]
@@ -0,0 +1,148 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.group_stats import reconcile_group_stats
+from api.models import (
+    ExpenseTypeEnum,
+    Group,
+    GroupInvitation,
+    GroupInvitationStatusEnum,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_admin(test_db: Session):
+    new_user = User(
+        id=str(uuid4()),
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+    test_db.commit()
+    return new_user
+
+
+def test_group_counters_are_maintained_on_write(
+    client: TestClient, test_db: Session, seed_admin: User
+):
+    headers = {"Authorization": f"JWT {create_access_token(seed_admin.id)}"}
+
+    response = client.post("/v1/groups/", json={"name": "Group 1"}, headers=headers)
+    group_id = response.json()["id"]
+
+    client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "Groceries",
+            "amount": 20,
+            "date": datetime.date.today().isoformat(),
+            "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+        },
+        headers=headers,
+    )
+    response = client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "Netflix",
+            "amount": 10,
+            "on_every": 1,
+            "frequency": SubscriptionFrequencyEnum.MONTHLY.value,
+            "start_date": datetime.date.today().isoformat(),
+            "expense_type": ExpenseTypeEnum.SUBSCRIPTION.value,
+        },
+        headers=headers,
+    )
+    subscription_id = response.json()["id"]
+
+    client.post(
+        f"/v1/groups/{group_id}/subscriptions/{subscription_id}/charges/",
+        json={"amount": 12.5, "date": datetime.date.today().isoformat()},
+        headers=headers,
+    )
+
+    invitee = User(
+        id=str(uuid4()), name="Yana", email="invitee@email.com", password=b"1234"
+    )
+    invitation = GroupInvitation(
+        id=str(uuid4()),
+        group_id=group_id,
+        emitter_id=seed_admin.id,
+        invitee_id=invitee.id,
+        role=GroupRoleEnum.MEMBER,
+    )
+    test_db.add_all([invitee, invitation])
+    test_db.commit()
+
+    client.post(
+        f"/v1/groups/invitations/{invitation.id}/rsvp",
+        json={"rsvp": GroupInvitationStatusEnum.ACCEPTED.value},
+        headers={"Authorization": f"JWT {create_access_token(invitee.id)}"},
+    )
+
+    response = client.get(f"/v1/groups/{group_id}", headers=headers)
+    data = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert data["member_count"] == 2
+    assert data["expense_count"] == 2
+    assert data["total_spent"] == 32.5
+
+
+def test_reconcile_repairs_drifted_counters(test_db: Session, seed_admin: User):
+    group = Group(
+        id=str(uuid4()), name="Group 1", owner_id=seed_admin.id, expense_count=99
+    )
+    subscription = Subscription(
+        id=str(uuid4()),
+        name="Netflix",
+        amount=10,
+        start_date=datetime.date.today(),
+        creator=seed_admin,
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.MONTHLY,
+    )
+    subscription.charges.append(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            amount=10,
+            charged_date=datetime.date.today(),
+            creator=seed_admin,
+        )
+    )
+    group.expenses.append(subscription)
+    group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name="Groceries",
+            amount=5,
+            date=datetime.date.today(),
+            creator=seed_admin,
+        )
+    )
+    test_db.add(group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=seed_admin.id, group_id=group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+    test_db.commit()
+
+    assert reconcile_group_stats(test_db, [group.id]) == 1
+    test_db.commit()
+    test_db.refresh(group)
+
+    assert group.member_count == 1
+    assert group.expense_count == 2
+    assert group.total_spent == 15
@@ -0,0 +1,144 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    member = User(
+        id="user-member-id",
+        name="Yana",
+        email="member@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add_all([admin, member])
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    for user, role in [(admin, GroupRoleEnum.ADMIN), (member, GroupRoleEnum.VIEWER)]:
+        test_db.execute(
+            user_group_role_table.insert().values(
+                user_id=user.id, group_id=new_group.id, role=role
+            )
+        )
+
+    for name, amount, category, date, creator in [
+        ("Groceries", 40, "Food", datetime.date(2024, 1, 10), admin),
+        ("Dinner", 60, "Food", datetime.date(2024, 2, 3), member),
+        ("Train", 20, None, datetime.date(2024, 2, 20), member),
+    ]:
+        new_group.expenses.append(
+            OneTimeExpense(
+                id=str(uuid4()),
+                name=name,
+                amount=amount,
+                category=category,
+                date=date,
+                creator=creator,
+            )
+        )
+
+    subscription = Subscription(
+        id=str(uuid4()),
+        name="Netflix",
+        amount=15,
+        category="Entertainment",
+        start_date=datetime.date(2024, 1, 1),
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.MONTHLY,
+        creator=admin,
+    )
+    for month in (1, 2):
+        subscription.charges.append(
+            SubscriptionCharge(
+                id=str(uuid4()),
+                amount=15,
+                charged_date=datetime.date(2024, month, 1),
+                creator=admin,
+            )
+        )
+    new_group.expenses.append(subscription)
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(member.id)}"}
+
+
+def test_user_cannot_get_summary_of_groups_not_linked_to_them(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/non-existing-group-id/summary", headers=seed_group
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+def test_user_gets_group_spending_summary(client: TestClient, seed_group: dict):
+    response = client.get("/v1/groups/group-id/summary", headers=seed_group)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == {"amount": 150, "count": 5}
+    assert data["by_category"] == [
+        {"category": "Food", "amount": 100, "count": 2},
+        {"category": "Entertainment", "amount": 30, "count": 2},
+        {"category": None, "amount": 20, "count": 1},
+    ]
+    assert data["by_month"] == [
+        {"month": "2024-01", "amount": 55, "count": 2},
+        {"month": "2024-02", "amount": 95, "count": 3},
+    ]
+    assert data["by_creator"] == [
+        {
+            "creator_id": "user-member-id",
+            "creator_name": "Yana",
+            "amount": 80,
+            "count": 2,
+        },
+        {
+            "creator_id": "user-admin-id",
+            "creator_name": "Asier",
+            "amount": 70,
+            "count": 3,
+        },
+    ]
+    assert data["by_expense_type"] == [
+        {"expense_type": "one_time", "amount": 120, "count": 3},
+        {"expense_type": "subscription", "amount": 30, "count": 2},
+    ]
+
+
+def test_user_gets_group_spending_summary_within_dates(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/group-id/summary",
+        params={"from": "2024-02-01", "to": "2024-02-10"},
+        headers=seed_group,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == {"amount": 75, "count": 2}
+    assert data["by_month"] == [{"month": "2024-02", "amount": 75, "count": 2}]
@@ -0,0 +1,171 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+from api.spending import bucket_count, bucket_starts
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(admin)
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=admin.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    for amount, date in [
+        (40, datetime.date(2024, 1, 10)),
+        (60, datetime.date(2024, 1, 12)),
+        (20, datetime.date(2024, 1, 24)),
+    ]:
+        new_group.expenses.append(
+            OneTimeExpense(
+                id=str(uuid4()),
+                name="Groceries",
+                amount=amount,
+                date=date,
+                creator=admin,
+            )
+        )
+
+    subscription = Subscription(
+        id=str(uuid4()),
+        name="Netflix",
+        amount=15,
+        start_date=datetime.date(2023, 12, 10),
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.MONTHLY,
+        creator=admin,
+    )
+    subscription.charges.append(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            amount=15,
+            charged_date=datetime.date(2024, 1, 10),
+            creator=admin,
+        )
+    )
+    new_group.expenses.append(subscription)
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(admin.id)}"}
+
+
+def test_user_cannot_get_timeseries_of_groups_not_linked_to_them(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/non-existing-group-id/timeseries", headers=seed_group
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Group not found"}
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "bucket=day&from=2000-01-01&to=2024-01-01",
+        "bucket=day&from=0001-01-01&to=9999-12-31",
+        "bucket=month&from=0001-01-01&to=9999-12-31",
+    ],
+)
+def test_user_cannot_get_timeseries_with_too_many_buckets(
+    client: TestClient, seed_group: dict, query: str
+):
+    response = client.get(f"/v1/groups/group-id/timeseries?{query}", headers=seed_group)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Too many buckets"}
+
+
+def test_user_gets_gap_filled_daily_timeseries(client: TestClient, seed_group: dict):
+    response = client.get(
+        "/v1/groups/group-id/timeseries?bucket=day&from=2024-01-09&to=2024-01-12",
+        headers=seed_group,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["starts"] == ["2024-01-09", "2024-01-10", "2024-01-11", "2024-01-12"]
+    assert data["amounts"] == [0, 55, 0, 60]
+    assert data["counts"] == [0, 2, 0, 1]
+
+
+def test_user_gets_weekly_timeseries_starting_on_monday(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/group-id/timeseries?bucket=week&from=2024-01-10&to=2024-01-31",
+        headers=seed_group,
+    )
+
+    data = response.json()
+    assert data["starts"] == ["2024-01-08", "2024-01-15", "2024-01-22", "2024-01-29"]
+    assert data["amounts"] == [115, 0, 20, 0]
+    assert data["counts"] == [3, 0, 1, 0]
+
+
+def test_user_gets_monthly_timeseries(client: TestClient, seed_group: dict):
+    response = client.get(
+        "/v1/groups/group-id/timeseries?bucket=month&from=2023-12-01&to=2024-02-29",
+        headers=seed_group,
+    )
+
+    data = response.json()
+    assert data["starts"] == ["2023-12-01", "2024-01-01", "2024-02-01"]
+    assert data["amounts"] == [0, 135, 0]
+    assert data["counts"] == [0, 4, 0]
+
+
+def test_user_gets_timeseries_at_the_edges_of_the_calendar(
+    client: TestClient, seed_group: dict
+):
+    response = client.get(
+        "/v1/groups/group-id/timeseries?bucket=month&from=9999-11-15&to=9999-12-31",
+        headers=seed_group,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["starts"] == ["9999-11-01", "9999-12-01"]
+
+    response = client.get(
+        "/v1/groups/group-id/timeseries?bucket=day&to=0001-01-05",
+        headers=seed_group,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["from_date"] == "0001-01-01"
+    assert len(response.json()["starts"]) == 5
+
+
+@pytest.mark.parametrize("bucket", ["day", "week", "month"])
+def test_bucket_count_matches_bucket_starts(bucket: str):
+    from_date, to_date = datetime.date(2023, 11, 29), datetime.date(2024, 3, 4)
+
+    assert bucket_count(bucket, from_date, to_date) == len(
+        bucket_starts(bucket, from_date, to_date)
+    )
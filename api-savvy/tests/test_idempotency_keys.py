@@ -0,0 +1,214 @@
+import datetime
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from api.idempotency import idempotency_key, remove_expired_idempotency_keys
+from api.models import (
+    Expense,
+    IdempotencyKey,
+    ExpenseTypeEnum,
+    Group,
+    GroupRoleEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+EXPENSE = {
+    "name": "Expense 1",
+    "amount": 15,
+    "date": datetime.date.today().isoformat(),
+    "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+}
+
+
+@pytest.fixture
+def seed_admin(test_db: Session):
+    new_user = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id="group-admin-id", name="Admin Group", owner_id="user-admin-id")
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return {
+        "Authorization": f"JWT {create_access_token(new_user.id)}",
+        "Idempotency-Key": "retry-1",
+    }
+
+
+def test_retried_request_replays_the_original_response(
+    client: TestClient, test_db: Session, seed_admin: dict
+):
+    response = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+    retry = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == response.json()
+    assert test_db.query(Expense).count() == 1
+    assert test_db.get(Group, "group-admin-id").expense_count == 1
+
+
+def test_retried_request_skips_membership_checks(
+    client: TestClient, test_db: Session, seed_admin: dict
+):
+    response = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+
+    test_db.execute(delete(user_group_role_table))
+    test_db.commit()
+
+    retry = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == response.json()
+
+
+def test_key_cannot_be_reused_for_a_different_request(
+    client: TestClient, seed_admin: dict
+):
+    client.post("/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin)
+
+    response = client.post(
+        "/v1/groups/group-admin-id/expenses/",
+        json={**EXPENSE, "amount": 20},
+        headers=seed_admin,
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json() == {
+        "detail": "Idempotency-Key reused for a different request"
+    }
+
+
+def test_failed_request_releases_its_key(
+    client: TestClient, test_db: Session, seed_admin: dict
+):
+    charge = {"amount": 10, "date": datetime.date.today().isoformat()}
+    url = "/v1/groups/group-admin-id/subscriptions/non-existing-id/charges/"
+
+    response = client.post(url, json=charge, headers=seed_admin)
+    retry = client.post(url, json=charge, headers=seed_admin)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert retry.status_code == status.HTTP_404_NOT_FOUND
+    assert "idempotent-replayed" not in retry.headers
+
+
+def test_expired_key_runs_the_request_again(
+    client: TestClient, test_db: Session, seed_admin: dict
+):
+    client.post("/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin)
+
+    removed = remove_expired_idempotency_keys(
+        test_db,
+        datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=2),
+    )
+    test_db.commit()
+
+    retry = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+
+    assert removed == 1
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert "idempotent-replayed" not in retry.headers
+    assert test_db.query(Expense).count() == 2
+
+
+def _abandon_claim(
+    test_db: Session, locked_until: datetime.datetime, key: str = "retry-1"
+):
+    # As left by a request whose worker died, or is still running, before
+    # storing its response
+    record = test_db.get(IdempotencyKey, ("user-admin-id", key))
+    record.status_code = None
+    record.response_body = None
+    record.locked_until = locked_until
+    test_db.commit()
+
+
+def test_retry_while_request_holds_its_key_conflicts(
+    client: TestClient, test_db: Session, seed_admin: dict
+):
+    client.post("/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin)
+    _abandon_claim(
+        test_db,
+        datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30),
+    )
+
+    retry = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+
+    assert retry.status_code == status.HTTP_409_CONFLICT
+
+
+def test_retry_takes_over_a_key_whose_lease_expired(
+    client: TestClient, test_db: Session, seed_admin: dict
+):
+    client.post("/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin)
+    _abandon_claim(
+        test_db,
+        datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1),
+    )
+
+    retry = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+    replay = client.post(
+        "/v1/groups/group-admin-id/expenses/", json=EXPENSE, headers=seed_admin
+    )
+
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert "idempotent-replayed" not in retry.headers
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json() == retry.json()
+
+
+def test_request_outliving_its_lease_cannot_store_its_response(
+    test_db: Session, seed_admin: dict
+):
+    user = test_db.get(User, "user-admin-id")
+    first_claim = idempotency_key("slow-1", "fingerprint", test_db, user)
+    first = next(first_claim)
+    _abandon_claim(
+        test_db,
+        datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1),
+        key="slow-1",
+    )
+
+    retry = next(idempotency_key("slow-1", "fingerprint", test_db, user))
+    retry.save({"id": "retry"})
+    test_db.commit()
+
+    with pytest.raises(HTTPException) as e:
+        first.save({"id": "first"})
+
+    assert e.value.status_code == status.HTTP_409_CONFLICT
+    test_db.rollback()
+    record = test_db.get(IdempotencyKey, ("user-admin-id", "slow-1"))
+    test_db.refresh(record)
+    assert record.response_body == b'{"id":"retry"}'
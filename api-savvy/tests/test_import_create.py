@@ -0,0 +1,190 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Expense,
+    Group,
+    GroupRoleEnum,
+    ImportFormatEnum,
+    JobStatusEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+CSV_STATEMENT = b"""Date,Description,Amount,Category
+2024-03-01,Groceries,-45.10,Food
+2024-03-02,Netflix,-12.99,Entertainment
+2024-03-02,Netflix,-12.99,Entertainment
+not-a-date,Broken,-1,Food
+"""
+
+OFX_STATEMENT = b"""OFXHEADER:100
+DATA:OFXSGML
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240301120000
+<TRNAMT>-45.10
+<NAME>Groceries
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240302
+<TRNAMT>1500.00
+<NAME>Salary
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+@pytest.fixture
+def seed_admin(test_db: Session):
+    new_user = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id="group-admin-id", name="Admin Group", owner_id="user-admin-id")
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    test_db.commit()
+    return new_user.id, new_group.id
+
+
+def _import(client: TestClient, group_id: str, headers: dict, content: bytes, data):
+    response = client.post(
+        f"/v1/groups/{group_id}/imports/",
+        files={"file": ("statement", content)},
+        data=data,
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+    return client.get(
+        f"/v1/groups/{group_id}/imports/{response.json()['id']}", headers=headers
+    ).json()
+
+
+def test_user_imports_csv_statement(
+    client: TestClient, test_db: Session, seed_admin: tuple[str, str]
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+    csv_mapping = {
+        "format": ImportFormatEnum.CSV.value,
+        "date_column": "Date",
+        "name_column": "Description",
+        "amount_column": "Amount",
+        "category_column": "Category",
+    }
+
+    job = _import(client, group_id, headers, CSV_STATEMENT, csv_mapping)
+
+    assert job["status"] == JobStatusEnum.COMPLETED.value
+    assert job["processed_rows"] == 4
+    assert job["imported_rows"] == 2
+    assert job["duplicate_rows"] == 1
+    assert job["invalid_rows"] == 1
+
+    expenses = test_db.query(Expense).filter_by(group_id=group_id).all()
+    assert sorted((expense.name, expense.amount) for expense in expenses) == [
+        ("Groceries", 45.10),
+        ("Netflix", 12.99),
+    ]
+
+    job = _import(client, group_id, headers, CSV_STATEMENT, csv_mapping)
+
+    assert job["imported_rows"] == 0
+    assert job["duplicate_rows"] == 3
+
+
+MIXED_SIGN_CSV_STATEMENT = b"""date,name,amount
+2024-03-01,Salary,+1000
+2024-03-02,Groceries,-25
+2024-03-03,Transfer,0
+"""
+
+
+@pytest.mark.parametrize(
+    "debits_negative, imported",
+    [("true", ("Groceries", 25)), ("false", ("Salary", 1000))],
+)
+def test_user_imports_only_the_debits_of_a_csv_statement(
+    client: TestClient,
+    test_db: Session,
+    seed_admin: tuple[str, str],
+    debits_negative: str,
+    imported: tuple[str, float],
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    job = _import(
+        client,
+        group_id,
+        headers,
+        MIXED_SIGN_CSV_STATEMENT,
+        {"format": ImportFormatEnum.CSV.value, "debits_negative": debits_negative},
+    )
+
+    assert job["processed_rows"] == 3
+    assert job["imported_rows"] == 1
+    assert job["skipped_rows"] == 2
+    assert job["duplicate_rows"] == 0
+
+    expenses = test_db.query(Expense).filter_by(group_id=group_id).all()
+    assert [(expense.name, expense.amount) for expense in expenses] == [imported]
+    assert test_db.get(Group, group_id).total_spent == imported[1]
+
+
+def test_user_imports_ofx_statement_skipping_existing_expenses(
+    client: TestClient, test_db: Session, seed_admin: tuple[str, str]
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "groceries",
+            "amount": 45.1,
+            "date": "2024-03-01",
+            "expense_type": "one_time",
+        },
+        headers=headers,
+    )
+
+    job = _import(
+        client, group_id, headers, OFX_STATEMENT, {"format": ImportFormatEnum.OFX.value}
+    )
+
+    assert job["status"] == JobStatusEnum.COMPLETED.value
+    assert job["processed_rows"] == 2
+    assert job["imported_rows"] == 0
+    assert job["duplicate_rows"] == 1
+    assert job["skipped_rows"] == 1
+
+
+def test_user_cannot_poll_unknown_import(
+    client: TestClient, seed_admin: tuple[str, str]
+):
+    user_id, group_id = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.get(f"/v1/groups/{group_id}/imports/unknown", headers=headers)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Import not found"
@@ -0,0 +1,146 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupInvitation,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_groups(test_db: Session):
+    user = User(
+        id="user-id",
+        name="Asier",
+        email="user@email.com",
+        password=hash_token("1234"),
+    )
+    other = User(
+        id="user-other-id",
+        name="Yana",
+        email="other@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add_all([user, other])
+
+    today = datetime.date.today()
+    groups = []
+    for index in range(3):
+        group = Group(id=f"group-{index}-id", name=f"Group {index}", owner_id=user.id)
+        test_db.add(group)
+        groups.append(group)
+        test_db.execute(
+            user_group_role_table.insert().values(
+                user_id=user.id, group_id=group.id, role=GroupRoleEnum.ADMIN
+            )
+        )
+        group.expenses.append(
+            OneTimeExpense(
+                id=f"expense-{index}-id",
+                name=f"Expense {index}",
+                amount=10 * (index + 1),
+                date=today - datetime.timedelta(days=index),
+                creator=user,
+            )
+        )
+
+    groups[0].expenses.append(
+        Subscription(
+            id="subscription-id",
+            name="Netflix",
+            amount=15,
+            start_date=today - datetime.timedelta(days=7),
+            on_every=1,
+            frequency=SubscriptionFrequencyEnum.WEEKLY,
+            creator=user,
+        )
+    )
+
+    other_group = Group(id="other-group-id", name="Other", owner_id=other.id)
+    test_db.add(other_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=other.id, group_id=other_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+    other_group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()), name="Hidden", amount=99, date=today, creator=other
+        )
+    )
+    test_db.add(
+        GroupInvitation(
+            id="invitation-id",
+            group_id=other_group.id,
+            emitter_id=other.id,
+            invitee_id=user.id,
+            role=GroupRoleEnum.MEMBER,
+        )
+    )
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(user.id)}"}
+
+
+def test_user_gets_dashboard_across_groups(
+    client: TestClient, seed_groups: dict, executed_statements: list[str]
+):
+    executed_statements.clear()
+    response = client.get("/v1/me/dashboard", headers=seed_groups)
+
+    assert response.status_code == status.HTTP_200_OK
+    # Authentication, the listing version, then the four dashboard queries
+    selects = [s for s in executed_statements if s.lstrip().startswith("SELECT")]
+    assert len(selects) == 6
+
+    data = response.json()
+    assert [group["id"] for group in data["groups"]] == [
+        "group-0-id",
+        "group-1-id",
+        "group-2-id",
+    ]
+    assert [expense["name"] for expense in data["recent_expenses"]] == [
+        "Expense 0",
+        "Expense 1",
+        "Expense 2",
+        "Netflix",
+    ]
+    assert data["pending_invitations"] == [
+        {
+            "id": "invitation-id",
+            "group_id": "other-group-id",
+            "group_name": "Other",
+            "emitter_name": "Yana",
+            "role": GroupRoleEnum.MEMBER.value,
+        }
+    ]
+
+    today = datetime.date.today()
+    assert [charge["date"] for charge in data["upcoming_charges"]] == [
+        (today + datetime.timedelta(days=days)).isoformat()
+        for days in (0, 7, 14, 21, 28)
+    ]
+    assert data["upcoming_charges"][0]["subscription_id"] == "subscription-id"
+
+
+def test_dashboard_is_not_modified_until_user_version_changes(
+    client: TestClient, seed_groups: dict
+):
+    response = client.get("/v1/me/dashboard", headers=seed_groups)
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/v1/me/dashboard", headers={**seed_groups, "If-None-Match": etag}
+    )
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
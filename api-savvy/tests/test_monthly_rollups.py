@@ -0,0 +1,172 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from api.models import (
+    ExpenseTypeEnum,
+    Group,
+    GroupMonthlyRollup,
+    GroupRoleEnum,
+    OneTimeExpense,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.rollups import rebuild_monthly_rollups
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_group(test_db: Session):
+    admin = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(admin)
+
+    new_group = Group(id="group-id", name="Home", owner_id=admin.id)
+    test_db.add(new_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=admin.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    subscription = Subscription(
+        id="subscription-id",
+        name="Netflix",
+        amount=15,
+        category="Entertainment",
+        start_date=datetime.date(2024, 1, 1),
+        on_every=1,
+        frequency=SubscriptionFrequencyEnum.MONTHLY,
+        creator=admin,
+    )
+    new_group.expenses.append(subscription)
+
+    test_db.commit()
+    return {"Authorization": f"JWT {create_access_token(admin.id)}"}
+
+
+def _rollups(test_db: Session):
+    return [
+        (row.month, row.category, row.expense_type, row.amount, row.count)
+        for row in test_db.scalars(
+            select(GroupMonthlyRollup).order_by(
+                GroupMonthlyRollup.month,
+                GroupMonthlyRollup.category,
+                GroupMonthlyRollup.expense_type,
+            )
+        )
+    ]
+
+
+def test_rollups_are_maintained_on_write(
+    client: TestClient, test_db: Session, seed_group: dict
+):
+    for name, amount, category, date in [
+        ("Groceries", 40, "Food", "2024-01-10"),
+        ("Dinner", 60, "Food", "2024-01-25"),
+        ("Train", 20, None, "2024-02-20"),
+    ]:
+        response = client.post(
+            "/v1/groups/group-id/expenses/",
+            json={
+                "name": name,
+                "amount": amount,
+                "category": category,
+                "date": date,
+                "expense_type": ExpenseTypeEnum.ONE_TIME.value,
+            },
+            headers=seed_group,
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.post(
+        "/v1/groups/group-id/subscriptions/subscription-id/charges/",
+        json={"amount": 15, "date": "2024-01-01"},
+        headers=seed_group,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.post(
+        "/v1/groups/group-id/subscriptions/charges/bulk",
+        json={
+            "charges": [
+                {"subscription_id": "subscription-id", "amount": 15, "date": date}
+                for date in ("2024-02-01", "2024-03-01")
+            ]
+        },
+        headers=seed_group,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    one_time = ExpenseTypeEnum.ONE_TIME.value
+    subscription = ExpenseTypeEnum.SUBSCRIPTION.value
+    assert _rollups(test_db) == [
+        (datetime.date(2024, 1, 1), "Entertainment", subscription, 15, 1),
+        (datetime.date(2024, 1, 1), "Food", one_time, 100, 2),
+        (datetime.date(2024, 2, 1), "", one_time, 20, 1),
+        (datetime.date(2024, 2, 1), "Entertainment", subscription, 15, 1),
+        (datetime.date(2024, 3, 1), "Entertainment", subscription, 15, 1),
+    ]
+
+
+def test_rebuild_recomputes_rollups_from_payments(test_db: Session, seed_group: dict):
+    group = test_db.get(Group, "group-id")
+    group.expenses.append(
+        OneTimeExpense(
+            id=str(uuid4()),
+            name="Groceries",
+            amount=5,
+            date=datetime.date(2024, 1, 31),
+            creator_id="user-admin-id",
+        )
+    )
+    test_db.add(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            subscription_id="subscription-id",
+            amount=15,
+            charged_date=datetime.date(2024, 1, 1),
+            creator_id="user-admin-id",
+        )
+    )
+    test_db.add(
+        GroupMonthlyRollup(
+            group_id="group-id",
+            month=datetime.date(2023, 12, 1),
+            category="Stale",
+            expense_type=ExpenseTypeEnum.ONE_TIME.value,
+            amount=99,
+            count=9,
+        )
+    )
+    test_db.commit()
+
+    rebuild_monthly_rollups(test_db, "group-id")
+    test_db.commit()
+
+    assert _rollups(test_db) == [
+        (
+            datetime.date(2024, 1, 1),
+            "",
+            ExpenseTypeEnum.ONE_TIME.value,
+            5,
+            1,
+        ),
+        (
+            datetime.date(2024, 1, 1),
+            "Entertainment",
+            ExpenseTypeEnum.SUBSCRIPTION.value,
+            15,
+            1,
+        ),
+    ]
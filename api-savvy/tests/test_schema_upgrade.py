@@ -0,0 +1,111 @@
+import datetime
+import pytest
+from sqlalchemy import StaticPool, create_engine, inspect, text
+from sqlalchemy.orm import Session
+from api.expense_search import search_stmt
+from api.models import (
+    Expense,
+    Group,
+    OneTimeExpense,
+    User,
+    expense_content_hash,
+)
+from api.schema_upgrade import upgrade_schema
+
+# The tables touched by the series as they were before it
+BASELINE_SCHEMA = [
+    "CREATE TABLE users (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, "
+    "email VARCHAR NOT NULL UNIQUE, password BLOB NOT NULL)",
+    "CREATE TABLE groups (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, "
+    "color VARCHAR, icon VARCHAR, owner_id VARCHAR NOT NULL REFERENCES users (id))",
+    "CREATE TABLE user_group_role (user_id VARCHAR REFERENCES users (id), "
+    "group_id VARCHAR REFERENCES groups (id), role VARCHAR(6), "
+    "PRIMARY KEY (user_id, group_id))",
+    "CREATE TABLE expenses (id VARCHAR PRIMARY KEY, category VARCHAR, "
+    "name VARCHAR NOT NULL, amount FLOAT NOT NULL, "
+    "creator_id VARCHAR NOT NULL REFERENCES users (id), "
+    "group_id VARCHAR NOT NULL REFERENCES groups (id), "
+    "expense_type VARCHAR NOT NULL)",
+    "CREATE TABLE one_time_expenses (id VARCHAR PRIMARY KEY REFERENCES expenses (id), "
+    "date DATE NOT NULL)",
+    "CREATE TABLE subscriptions (id VARCHAR PRIMARY KEY REFERENCES expenses (id), "
+    "on_every INTEGER NOT NULL, frequency VARCHAR(7) NOT NULL, "
+    "start_date DATE NOT NULL, end_date DATE)",
+]
+
+BASELINE_ROWS = [
+    "INSERT INTO users VALUES ('user-id', 'Asier', 'admin@email.com', x'00')",
+    "INSERT INTO groups VALUES ('group-id', 'Home', NULL, NULL, 'user-id')",
+    "INSERT INTO user_group_role VALUES ('user-id', 'group-id', 'ADMIN')",
+    "INSERT INTO expenses VALUES "
+    "('expense-id', 'Food', 'Groceries', 40, 'user-id', 'group-id', 'one_time'), "
+    "('subscription-id', NULL, 'Netflix', 15, 'user-id', 'group-id', 'subscription')",
+    "INSERT INTO one_time_expenses VALUES ('expense-id', '2024-01-10')",
+    "INSERT INTO subscriptions VALUES "
+    "('subscription-id', 1, 'MONTHLY', '2023-12-10', NULL)",
+]
+
+
+@pytest.fixture
+def baseline_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA + BASELINE_ROWS:
+            connection.execute(text(statement))
+
+    session = Session(engine)
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_upgrade_schema_adds_and_backfills_the_new_columns(baseline_db: Session):
+    added = upgrade_schema(baseline_db)
+    baseline_db.commit()
+
+    assert {
+        "users.version",
+        "groups.member_count",
+        "groups.expense_count",
+        "groups.total_spent",
+        "groups.version",
+        "expenses.effective_date",
+        "expenses.content_hash",
+    } <= set(added)
+    index_names = {
+        index["name"]
+        for index in inspect(baseline_db.get_bind()).get_indexes("expenses")
+    }
+    assert "ix_expenses_group_id_effective_date_id" in index_names
+
+    group = baseline_db.get(Group, "group-id")
+    assert (group.member_count, group.expense_count, group.total_spent) == (1, 2, 40)
+    assert group.version == 1
+    assert baseline_db.get(User, "user-id").version == 1
+
+    assert baseline_db.get(Expense, "subscription-id").effective_date == (
+        datetime.date(2023, 12, 10)
+    )
+    expense = baseline_db.get(OneTimeExpense, "expense-id")
+    assert expense.effective_date == datetime.date(2024, 1, 10)
+    assert expense.content_hash == expense_content_hash(
+        "group-id", datetime.date(2024, 1, 10), 40, "Groceries"
+    )
+
+    # The rows written before the search index are searchable too
+    rows = baseline_db.execute(search_stmt(baseline_db, "user-id", "groc", None, None))
+    assert [row.id for row in rows] == ["expense-id"]
+
+
+def test_upgrade_schema_can_run_again(baseline_db: Session):
+    upgrade_schema(baseline_db)
+    baseline_db.commit()
+
+    assert upgrade_schema(baseline_db) == []
+    baseline_db.commit()
@@ -0,0 +1,136 @@
+import datetime
+from uuid import uuid4
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api.models import (
+    Group,
+    GroupRoleEnum,
+    Subscription,
+    SubscriptionCharge,
+    SubscriptionFrequencyEnum,
+    User,
+    user_group_role_table,
+)
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_admin(test_db: Session):
+    new_user = User(
+        id="user-admin-id",
+        name="Asier",
+        email="admin@email.com",
+        password=hash_token("1234"),
+    )
+    test_db.add(new_user)
+
+    new_group = Group(id="group-admin-id", name="Admin Group", owner_id="user-admin-id")
+    test_db.add(new_group)
+
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=new_user.id, group_id=new_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+
+    subscriptions = [
+        Subscription(
+            id=str(uuid4()),
+            on_every=1,
+            frequency=SubscriptionFrequencyEnum.MONTHLY,
+            start_date=datetime.date.today(),
+            creator=new_user,
+            group=new_group,
+            name=name,
+            amount=10,
+        )
+        for name in ["Netflix", "Spotify"]
+    ]
+    test_db.add_all(subscriptions)
+
+    test_db.add(
+        SubscriptionCharge(
+            id=str(uuid4()),
+            subscription=subscriptions[0],
+            charged_date=datetime.date(2024, 1, 1),
+            amount=10,
+            creator=new_user,
+        )
+    )
+
+    test_db.commit()
+    return (
+        new_user.id,
+        new_group.id,
+        [subscription.id for subscription in subscriptions],
+    )
+
+
+def test_user_bulk_creates_subscription_charges(
+    client: TestClient, test_db: Session, seed_admin
+):
+    user_id, group_id, (netflix_id, spotify_id) = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(
+        f"/v1/groups/{group_id}/subscriptions/charges/bulk",
+        json={
+            "charges": [
+                {"subscription_id": netflix_id, "amount": 10, "date": "2024-02-01"},
+                {"subscription_id": netflix_id, "amount": 10, "date": "2024-01-01"},
+                {"subscription_id": spotify_id, "amount": 5, "date": "2024-02-01"},
+                {"subscription_id": spotify_id, "amount": 5, "date": "2024-02-01"},
+                {"subscription_id": "unknown-id", "amount": 5, "date": "2024-02-01"},
+            ]
+        },
+        headers=headers,
+    )
+
+    data = response.json()
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [
+        (charge["subscription_id"], charge["date"]) for charge in data["created"]
+    ] == [(netflix_id, "2024-02-01"), (spotify_id, "2024-02-01")]
+    assert data["errors"] == [
+        {"index": 1, "detail": "Duplicate charge"},
+        {"index": 3, "detail": "Duplicate charge"},
+        {"index": 4, "detail": "Subscription not found"},
+    ]
+    assert test_db.query(SubscriptionCharge).count() == 3
+
+    group = test_db.get(Group, group_id)
+    test_db.refresh(group)
+    assert group.total_spent == 15
+
+
+def test_user_cannot_bulk_create_charges_for_other_group_subscriptions(
+    client: TestClient, test_db: Session, seed_admin
+):
+    user_id, _, (netflix_id, _) = seed_admin
+    other_group = Group(id=str(uuid4()), name="Other Group", owner_id=user_id)
+    test_db.add(other_group)
+    test_db.execute(
+        user_group_role_table.insert().values(
+            user_id=user_id, group_id=other_group.id, role=GroupRoleEnum.ADMIN
+        )
+    )
+    test_db.commit()
+    headers = {"Authorization": f"JWT {create_access_token(user_id)}"}
+
+    response = client.post(
+        f"/v1/groups/{other_group.id}/subscriptions/charges/bulk",
+        json={
+            "charges": [
+                {"subscription_id": netflix_id, "amount": 10, "date": "2024-02-01"}
+            ]
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"] == [
+        {"index": 0, "detail": "Subscription not found"}
+    ]
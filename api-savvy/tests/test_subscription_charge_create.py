@@ -200,3 +200,24 @@ def test_user_creates_subscription_charge(
     assert db_subscription_charge.amount == 15
     assert db_subscription_charge.creator_id == admin_user.id
     assert db_subscription_charge.subscription_id == admin_subscription.id
+
+
+def test_zero_amount_charge_changes_group_summary_etag(
+    client: TestClient, seed_admin: tuple[User, Group, Subscription]
+):
+    admin_user, admin_group, admin_subscription = seed_admin
+    headers = {"Authorization": f"JWT {create_access_token(admin_user.id)}"}
+    url = f"/v1/groups/{admin_group.id}/summary"
+    etag = client.get(url, headers=headers).headers["ETag"]
+
+    response = client.post(
+        f"/v1/groups/{admin_group.id}/subscriptions/{admin_subscription.id}/charges/",
+        json={"amount": 0, "date": datetime.date.today().isoformat()},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] == {"amount": 0, "count": 1}
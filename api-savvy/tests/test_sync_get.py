@@ -0,0 +1,205 @@
+import datetime
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from api import sync
+from api.models import Change, ChangeEntityEnum, ChangeOperationEnum, User
+from api.security import create_access_token, hash_token
+
+
+@pytest.fixture
+def seed_users(test_db: Session):
+    test_db.add_all(
+        [
+            User(
+                id="user-1",
+                name="Asier",
+                email="asier@email.com",
+                password=hash_token("1234"),
+            ),
+            User(
+                id="user-2",
+                name="Yana",
+                email="yana@email.com",
+                password=hash_token("1234"),
+            ),
+        ]
+    )
+    test_db.commit()
+    return (
+        {"Authorization": f"JWT {create_access_token('user-1')}"},
+        {"Authorization": f"JWT {create_access_token('user-2')}"},
+    )
+
+
+def _create_group_with_expense(client: TestClient, headers: dict) -> tuple[str, str]:
+    group_id = client.post(
+        "/v1/groups/", json={"name": "Home"}, headers=headers
+    ).json()["id"]
+    expense_id = client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "Groceries",
+            "amount": 20,
+            "expense_type": "one_time",
+            "date": datetime.date.today().isoformat(),
+        },
+        headers=headers,
+    ).json()["id"]
+    return group_id, expense_id
+
+
+def test_user_syncs_everything_from_scratch(
+    client: TestClient, seed_users: tuple[dict, dict]
+):
+    headers, other_headers = seed_users
+    group_id, expense_id = _create_group_with_expense(client, headers)
+    _create_group_with_expense(client, other_headers)
+
+    response = client.get("/v1/sync", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [group["id"] for group in body["groups"]] == [group_id]
+    assert body["groups"][0]["expense_count"] == 1
+    assert [expense["id"] for expense in body["expenses"]] == [expense_id]
+    assert body["expenses"][0]["group_id"] == group_id
+    assert body["resync_groups"] == [group_id]
+    assert body["deleted"] == []
+    assert body["has_more"] is False
+
+
+def test_user_syncs_only_changes_since_their_cursor(
+    client: TestClient, seed_users: tuple[dict, dict]
+):
+    headers, _ = seed_users
+    group_id, _ = _create_group_with_expense(client, headers)
+    cursor = client.get("/v1/sync", headers=headers).json()["cursor"]
+
+    response = client.get("/v1/sync", params={"since": cursor}, headers=headers)
+
+    assert response.json()["groups"] == []
+    assert response.json()["expenses"] == []
+    assert response.json()["cursor"] == cursor
+
+    subscription_id = client.post(
+        f"/v1/groups/{group_id}/expenses/",
+        json={
+            "name": "Netflix",
+            "amount": 12,
+            "expense_type": "subscription",
+            "on_every": 1,
+            "frequency": "monthly",
+            "start_date": datetime.date.today().isoformat(),
+        },
+        headers=headers,
+    ).json()["id"]
+    client.post(
+        f"/v1/groups/{group_id}/subscriptions/{subscription_id}/charges/",
+        json={"amount": 12, "date": datetime.date.today().isoformat()},
+        headers=headers,
+    )
+
+    body = client.get("/v1/sync", params={"since": cursor}, headers=headers).json()
+
+    assert [group["id"] for group in body["groups"]] == [group_id]
+    assert [expense["id"] for expense in body["expenses"]] == [subscription_id]
+    assert body["expenses"][0]["frequency"] == "monthly"
+    assert [charge["subscription_id"] for charge in body["subscription_charges"]] == [
+        subscription_id
+    ]
+    assert body["resync_groups"] == []
+
+
+def test_invitee_syncs_invitations_and_joined_groups(
+    client: TestClient, seed_users: tuple[dict, dict]
+):
+    headers, invitee_headers = seed_users
+    group_id, _ = _create_group_with_expense(client, headers)
+    cursor = client.get("/v1/sync", headers=invitee_headers).json()["cursor"]
+
+    client.post(
+        f"/v1/groups/{group_id}/invite/",
+        json={"invitee_email": "yana@email.com"},
+        headers=headers,
+    )
+    body = client.get(
+        "/v1/sync", params={"since": cursor}, headers=invitee_headers
+    ).json()
+
+    assert [invitation["status"] for invitation in body["invitations"]] == ["pending"]
+    assert body["groups"] == []
+
+    invitation_id = body["invitations"][0]["id"]
+    cursor = body["cursor"]
+    client.post(
+        f"/v1/groups/invitations/{invitation_id}/rsvp",
+        json={"rsvp": "accepted"},
+        headers=invitee_headers,
+    )
+    body = client.get(
+        "/v1/sync", params={"since": cursor}, headers=invitee_headers
+    ).json()
+
+    assert [invitation["status"] for invitation in body["invitations"]] == ["accepted"]
+    assert body["groups"][0]["member_count"] == 2
+    assert body["resync_groups"] == [group_id]
+
+
+def test_user_pages_through_changes(client: TestClient, seed_users: tuple[dict, dict]):
+    headers, _ = seed_users
+    _create_group_with_expense(client, headers)
+
+    first_page = client.get("/v1/sync", params={"limit": 2}, headers=headers).json()
+    second_page = client.get(
+        "/v1/sync", params={"since": first_page["cursor"]}, headers=headers
+    ).json()
+
+    assert first_page["has_more"] is True
+    assert second_page["has_more"] is False
+    assert len(first_page["expenses"]) + len(second_page["expenses"]) == 1
+
+
+def test_user_cannot_sync_from_an_invalid_cursor(
+    client: TestClient, seed_users: tuple[dict, dict]
+):
+    headers, _ = seed_users
+
+    response = client.get("/v1/sync", params={"since": "not-a-cursor"}, headers=headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_user_syncs_changes_committed_out_of_seq_order(
+    client: TestClient,
+    test_db: Session,
+    seed_users: tuple[dict, dict],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    headers, _ = seed_users
+    # Transaction 12 committed seq 1 before transaction 10 committed seq 2,
+    # while transaction 11 is still running
+    for entity_id, txid in (("late", 12), ("early", 10)):
+        test_db.add(
+            Change(
+                entity=ChangeEntityEnum.EXPENSE,
+                entity_id=entity_id,
+                operation=ChangeOperationEnum.DELETE,
+                user_id="user-1",
+                txid=txid,
+                changed_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+        )
+    test_db.commit()
+
+    monkeypatch.setattr(sync, "change_log_horizon", lambda db: 11)
+    body = client.get("/v1/sync", headers=headers).json()
+
+    assert [deleted["id"] for deleted in body["deleted"]] == ["early"]
+
+    monkeypatch.setattr(sync, "change_log_horizon", lambda db: 13)
+    body = client.get("/v1/sync", params={"since": body["cursor"]}, headers=headers)
+
+    assert [deleted["id"] for deleted in body.json()["deleted"]] == ["late"]